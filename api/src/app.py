@@ -1,21 +1,35 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import StreamingResponse
 import strawberry
 from strawberry.fastapi import GraphQLRouter
 from strawberry.schema.config import StrawberryConfig
 from strawberry.tools import merge_types
+from src.config.es import close_es, es_metrics, get_es
 from src.config.settings import settings
 from src.graphql.graphql_context import GraphQLContext
 from src.middleware.version_manager import VersionManager
 from src.graphql.annotation_schema import FunctionomeQuery
+from src.resolvers.cache import result_cache
+from src.resolvers.export_resolver import (ExportFormat, export_media_types, get_export_filter_args, open_export,
+                                           stream_annotations_export)
+from src.models.annotation_model import AnnotationFilterArgs
 from fastapi.middleware.cors import CORSMiddleware
 
 #Queries = merge_types("Queries", AnnotationQuery))
 
 schema = strawberry.Schema(query=FunctionomeQuery, config=StrawberryConfig(auto_camel_case=True))
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  # One Elasticsearch client, and its connection pool, for every request the app serves
+  get_es()
+  yield
+  await close_es()
+
 def create_app():     
 
-  app = FastAPI()
+  app = FastAPI(lifespan=lifespan)
 
   origins = ["*"]
 
@@ -45,4 +59,21 @@ def create_app():
   
   app.include_router(graphql_app, prefix="/graphql")
 
+  @app.get("/export/annotations")
+  async def export_annotations(request: Request, format: ExportFormat = ExportFormat.TSV, gzip: bool = False,
+                               filter_args: AnnotationFilterArgs = Depends(get_export_filter_args)):
+    context = await get_context(request)
+    annotation_index = context.get_index(settings.PANGO_ANNOTATIONS_INDEX)
+    pit_id = await open_export(annotation_index)
+
+    filename = f"pango-annotations.{format.value}" + (".gz" if gzip else "")
+    return StreamingResponse(
+      stream_annotations_export(pit_id, filter_args, format, gzip),
+      media_type="application/gzip" if gzip else export_media_types[format],
+      headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+  @app.get("/metrics")
+  async def metrics():
+    return {"cache": result_cache.stats(), "elasticsearch": es_metrics.stats()}
+
   return app
\ No newline at end of file
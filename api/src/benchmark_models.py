@@ -0,0 +1,96 @@
+import load_env
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from src.app import schema
+from src.config.settings import ApiVersion
+from src.graphql.graphql_context import GraphQLContext
+from src.graphql.loaders import ESLoaders
+from src.models.annotation_model import Annotation
+
+annotations_query = """
+query {
+    annotations(pageArgs: {size: %d}) {
+        id gene geneSymbol geneName termType groups evidenceCount
+        term { id label aspect displayId }
+        slimTerms { id label displayId }
+        evidence { withGeneId { gene geneSymbol } references { pmid title authors date } }
+    }
+}
+"""
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Time turning Elasticsearch hits into models and GraphQL output')
+    parser.add_argument('-s', dest='size', type=int, default=50, help='Hits per page')
+    parser.add_argument('-e', dest='evidence', type=int, default=10, help='Evidence per annotation')
+    parser.add_argument('-r', dest='repeat', type=int, default=50, help='Timed pages')
+
+    return parser.parse_args()
+
+
+def get_hits(size, evidence, seed=0):
+    rng = random.Random(seed)
+    term = lambda: {"id": f"GO:{rng.randrange(10**7):07d}", "label": "a term", "aspect": "biological process"}
+    return [{
+        "_index": "pango-2-annotations",
+        "_id": str(i),
+        "sort": [i],
+        "_source": {
+            "gene": f"UniProtKB:P{i:05d}", "gene_symbol": f"GENE{i}", "gene_name": f"Gene {i}",
+            "term_type": "known", "term": term(), "slim_terms": [term() for _ in range(3)],
+            "groups": ["GO_Central"], "evidence_count": evidence,
+            "evidence": [{
+                "with_gene_id": {"gene": f"MGI:MGI:{rng.randrange(10**6)}", "gene_symbol": "Gene"},
+                "references": [{"pmid": f"PMID:{rng.randrange(10**8)}", "title": "A title",
+                                "authors": ["Author A", "Author B"], "date": "2001 Jan"} for _ in range(3)],
+            } for _ in range(evidence)],
+        },
+    } for i in range(size)]
+
+
+class HitsES:
+    """Answers every search with the same page of hits, so only the API side is timed"""
+
+    def __init__(self, hits):
+        self.hits = hits
+
+    async def msearch(self, searches):
+        return {"responses": [{"hits": {"hits": self.hits}} for _ in searches[::2]]}
+
+
+def time_models(hits, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        [Annotation(id=hit['_id'], **hit['_source']) for hit in hits]
+        seconds.append(time.perf_counter() - start_time)
+    return statistics.median(seconds) * 1000
+
+
+async def time_graphql(hits, repeat):
+    seconds = []
+    query = annotations_query % len(hits)
+    for _ in range(repeat):
+        context = GraphQLContext(version=ApiVersion.V2)
+        context.loaders = ESLoaders(HitsES(hits))
+        start_time = time.perf_counter()
+        result = await schema.execute(query, context_value=context)
+        seconds.append(time.perf_counter() - start_time)
+        if result.errors:
+            raise result.errors[0]
+    return statistics.median(seconds) * 1000
+
+
+def main():
+    args = parse_arguments()
+    hits = get_hits(args.size, args.evidence)
+    print(f"{args.size} hits, {args.evidence} evidence each, median of {args.repeat}")
+    print(f"hits to models   {time_models(hits, args.repeat):8.2f} ms")
+    print(f"hits to GraphQL  {asyncio.run(time_graphql(hits, args.repeat)):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
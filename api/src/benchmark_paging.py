@@ -0,0 +1,75 @@
+import load_env
+import argparse
+import asyncio
+import statistics
+import time
+from src.config.es import close_es
+from src.config.settings import ApiVersion, settings
+from src.core.exceptions import SearchError
+from src.graphql.loaders import ESLoaders
+from src.models.base_model import PageArgs
+from src.resolvers.annotation_resolver import get_annotations, get_genes
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Time one page at increasing depths with from/size '
+                                                 'against search_after cursors')
+    parser.add_argument('-v', dest='version', default=ApiVersion.V2.value,
+                        choices=[v.value for v in ApiVersion if v != ApiVersion.LATEST])
+    parser.add_argument('-t', dest='type', default='annotations', choices=['annotations', 'genes'])
+    parser.add_argument('-s', dest='size', type=int, default=50, help='Page size')
+    parser.add_argument('-d', dest='depths', type=int, nargs='+', default=[0, 10, 50, 100, 190, 500],
+                        help='Page numbers to time')
+    parser.add_argument('-r', dest='repeat', type=int, default=5, help='Timed requests per page')
+
+    return parser.parse_args()
+
+
+async def time_page(resolver, index, page_args, repeat):
+    # A new ESLoaders per request, as each GraphQL request gets, so nothing is served from a previous one
+    seconds = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        results = await resolver(index, None, page_args, ESLoaders())
+        seconds.append(time.perf_counter() - start_time)
+    return statistics.median(seconds) * 1000, results
+
+
+async def run(args):
+    base_index = settings.PANGO_ANNOTATIONS_INDEX if args.type == 'annotations' else settings.PANGO_GENES_INDEX
+    index = f"{args.version}-{base_index}"
+    resolver = get_annotations if args.type == 'annotations' else get_genes
+    print(f"{index}, {args.size} per page, median of {args.repeat}")
+    print(f"{'page':>6} {'from/size ms':>13} {'cursor ms':>10}")
+
+    cursor = None
+    cursor_page = 0
+    for depth in sorted(args.depths):
+        try:
+            offset_ms, _ = await time_page(resolver, index, PageArgs(page=depth, size=args.size), args.repeat)
+            offset = f"{offset_ms:13.1f}"
+        except SearchError:
+            offset = f"{'failed':>13}"
+
+        # Walk to the page before depth with cursors, untimed, then time the page itself
+        while cursor_page < depth:
+            results = await resolver(index, None, PageArgs(size=args.size, cursor=cursor), ESLoaders())
+            if not results:
+                break
+            cursor = results[-1].cursor
+            cursor_page += 1
+        if cursor_page < depth:
+            print(f"{depth:>6} past the last page")
+            break
+        cursor_ms, _ = await time_page(resolver, index, PageArgs(size=args.size, cursor=cursor), args.repeat)
+        print(f"{depth:>6} {offset} {cursor_ms:10.1f}")
+
+    await close_es()
+
+
+def main():
+    asyncio.run(run(parse_arguments()))
+
+
+if __name__ == "__main__":
+    main()
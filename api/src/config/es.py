@@ -1,11 +1,137 @@
-import os
+import asyncio
+import time
+from collections import Counter, defaultdict, deque
+from typing import Any, Dict, Optional
+import aiohttp
 from elasticsearch import AsyncElasticsearch
+from elastic_transport import AiohttpHttpNode
+from elastic_transport._node._http_aiohttp import _NEEDS_CLEANUP_CLOSED
 from src.config.settings import settings
 
-es = AsyncElasticsearch(settings.PANGO_ES_URL,
-    maxsize=400,
-    timeout=120,
-    max_retries=10,
-    retry_on_timeout=True)
 
+class ESMetrics:
+    """Latency of recent Elasticsearch requests per operation, and how much of the connection pool is in use"""
 
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.latencies = defaultdict(lambda: deque(maxlen=self.window))
+        self.requests = Counter()
+        self.errors = Counter()
+        self.pool_size = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def start(self) -> float:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return time.perf_counter()
+
+    def finish(self, operation: str, start_time: float, failed: bool = False) -> None:
+        self.in_flight -= 1
+        self.latencies[operation].append((time.perf_counter() - start_time) * 1000)
+        self.requests[operation] += 1
+        if failed:
+            self.errors[operation] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool": {
+                "size": self.pool_size,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "utilization": self.in_flight / self.pool_size if self.pool_size else 0,
+            },
+            "requests": {operation: get_latency_stats(self.latencies[operation], self.requests[operation],
+                                                      self.errors[operation])
+                         for operation in sorted(self.requests)},
+        }
+
+
+def get_latency_stats(latencies, count: int, errors: int) -> Dict[str, Any]:
+    # Percentiles over the last window requests, counts over all of them
+    ordered = sorted(latencies)
+    percentile = lambda p: round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+    return {
+        "count": count,
+        "errors": errors,
+        "mean_ms": round(sum(ordered) / len(ordered), 2),
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+
+def get_operation(target: str) -> str:
+    """The API a request target calls, e.g. _msearch for /_msearch or _search for /index/_search?q=..."""
+    path = target.split('?', 1)[0]
+    return next((part for part in reversed(path.split('/')) if part.startswith('_')), path)
+
+
+es_metrics = ESMetrics()
+
+
+class InstrumentedNode(AiohttpHttpNode):
+    """The default aiohttp node, timing every request into es_metrics and keeping idle connections open longer"""
+
+    async def perform_request(self, method, target, *args, **kwargs):
+        start_time = es_metrics.start()
+        failed = True
+        try:
+            response = await super().perform_request(method, target, *args, **kwargs)
+            failed = response.meta.status >= 400
+            return response
+        finally:
+            es_metrics.finish(get_operation(target), start_time, failed)
+
+    def _create_aiohttp_session(self) -> None:
+        # As AiohttpHttpNode creates it in elastic-transport 8.19.0 (pinned in pyproject.toml, poetry.lock
+        # and requirements.txt, as this method is private), but with the keep-alive from settings, and
+        # without aiohttp's default limit of 100 connections in total capping connections_per_node
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            skip_auto_headers=("accept", "accept-encoding", "user-agent"),
+            auto_decompress=True,
+            cookie_jar=aiohttp.DummyCookieJar(),
+            connector=aiohttp.TCPConnector(
+                limit=self.config.connections_per_node,
+                limit_per_host=self.config.connections_per_node,
+                keepalive_timeout=settings.PANGO_ES_KEEP_ALIVE,
+                use_dns_cache=True,
+                enable_cleanup_closed=_NEEDS_CLEANUP_CLOSED,
+                ssl=self._ssl_context or False,
+            ),
+        )
+
+
+def create_es_client() -> AsyncElasticsearch:
+    es_metrics.pool_size = settings.PANGO_ES_POOL_SIZE
+    return AsyncElasticsearch(settings.PANGO_ES_URL,
+        node_class=InstrumentedNode,
+        connections_per_node=settings.PANGO_ES_POOL_SIZE,
+        http_compress=settings.PANGO_ES_COMPRESS,
+        request_timeout=120,
+        max_retries=10,
+        retry_on_timeout=True)
+
+
+_es: Optional[AsyncElasticsearch] = None
+
+
+def get_es() -> AsyncElasticsearch:
+    """
+    The shared client. The app opens it on startup and closes it on shutdown; scripts and tests
+    that run without the app's lifespan get one on first use.
+    """
+    global _es
+    if _es is None:
+        _es = create_es_client()
+    return _es
+
+
+async def close_es() -> None:
+    global _es
+    if _es is not None:
+        await _es.close()
+        _es = None
@@ -12,6 +12,10 @@ class ApiVersion(str, Enum):
 class Settings(BaseSettings):
     DEBUG: bool = bool(os.environ.get("DEBUG"))
     PANGO_ES_URL: str = os.environ.get("PANGO_ES_URL")
+    # Elasticsearch connections kept open, gzip for request and response bodies, and seconds an idle connection is kept
+    PANGO_ES_POOL_SIZE: int = int(os.environ.get("PANGO_ES_POOL_SIZE", 400))
+    PANGO_ES_COMPRESS: bool = os.environ.get("PANGO_ES_COMPRESS", "true").lower() == "true"
+    PANGO_ES_KEEP_ALIVE: float = float(os.environ.get("PANGO_ES_KEEP_ALIVE", 60))
     PANGO_ANNOTATIONS_INDEX: str = os.environ.get("PANGO_ANNOTATIONS_INDEX")
     PANGO_GENES_INDEX: str = os.environ.get("PANGO_GENES_INDEX")
     PROJECT_TITLE: str = "PANGO"
@@ -20,6 +24,15 @@ class Settings(BaseSettings):
     HOST_URL: str = os.environ.get("HOST_URL")
     HOST_PORT: int = int(os.environ.get("HOST_PORT"))
     DEFAULT_API_VERSION: ApiVersion = ApiVersion.LATEST
+    # Count and stats results cache, in process unless PANGO_CACHE_URL names a Redis-compatible server
+    PANGO_CACHE_URL: Optional[str] = os.environ.get("PANGO_CACHE_URL")
+    PANGO_CACHE_SIZE: int = int(os.environ.get("PANGO_CACHE_SIZE", 1024))
+    PANGO_CACHE_TTL: int = int(os.environ.get("PANGO_CACHE_TTL", 3600))
+    # Seconds before an index alias is looked up again, i.e. how long a swapped release can be served stale
+    PANGO_ALIAS_TTL: int = int(os.environ.get("PANGO_ALIAS_TTL", 60))
+    # Hits per search_after page of /export/annotations, and how long its point in time stays open between pages
+    PANGO_EXPORT_PAGE_SIZE: int = int(os.environ.get("PANGO_EXPORT_PAGE_SIZE", 5000))
+    PANGO_EXPORT_KEEP_ALIVE: str = os.environ.get("PANGO_EXPORT_KEEP_ALIVE", "2m")
 
     @property
     def BASE_URL(self) -> str:
@@ -8,9 +8,19 @@ class IndexError(HTTPException):
     def __init__(self, detail: str):
         super().__init__(status_code=400, detail=detail)
 
+class CursorError(HTTPException):
+    def __init__(self, cursor: str, index: str):
+        super().__init__(status_code=400, detail=f"Cursor '{cursor}' is not a cursor for index '{index}'")
+
 class DocumentNotFoundError(HTTPException):
     def __init__(self, index: str, id: str):
         super().__init__(
             status_code=404, 
             detail=f"Document with id '{id}' not found in index '{index}'"
-        )
\ No newline at end of file
+        )
+class SearchError(HTTPException):
+    def __init__(self, index: str, response: dict):
+        super().__init__(
+            status_code=response.get('status', 500),
+            detail=f"Search on index '{index}' failed: {response.get('error')}"
+        )
@@ -11,6 +11,7 @@ from src.resolvers.gene_stats_resolver import get_genes_count, get_genes_stats
 from src.resolvers.autocomplete_resolver import get_autocomplete, get_slim_term_autocomplete_query_multi
 from src.resolvers.annotation_resolver import get_annotation, get_annotations, get_annotations_export, get_genes
 from src.models.annotation_model import Annotation, AnnotationExport, AnnotationFilterArgs, AnnotationStats, GeneFilterArgs
+from src.utils import get_source_includes
 
 @strawberry.type
 class FunctionomeQuery:
@@ -25,43 +26,43 @@ class FunctionomeQuery:
 
     @strawberry.field
     async def annotation(self, info: Info, id: str) -> Annotation:
-        return await get_annotation(FunctionomeQuery._get_annotations_index(info.context), id)
+        return await get_annotation(FunctionomeQuery._get_annotations_index(info.context), id, info.context.loaders, get_source_includes(info))
 
     @strawberry.field
     async def annotations(self, info: Info, filter_args: Optional[AnnotationFilterArgs] = None, 
                          page_args: Optional[PageArgs] = None) -> List[Annotation]:
-        return await get_annotations(FunctionomeQuery._get_annotations_index(info.context), filter_args, page_args)
+        return await get_annotations(FunctionomeQuery._get_annotations_index(info.context), filter_args, page_args, info.context.loaders, get_source_includes(info))
     
     @strawberry.field
     async def genes(self, info: Info, filter_args: Optional[GeneFilterArgs] = None, 
                    page_args: Optional[PageArgs] = None) -> List[Gene]:
-        return await get_genes(FunctionomeQuery._get_genes_index(info.context), filter_args, page_args)
+        return await get_genes(FunctionomeQuery._get_genes_index(info.context), filter_args, page_args, info.context.loaders, get_source_includes(info))
     
-    @strawberry.field
+    @strawberry.field(description="At most 10,000 annotations; GET /export/annotations streams all of them")
     async def annotations_export(self, info: Info, filter_args: Optional[AnnotationFilterArgs] = None, 
                                page_args: Optional[PageArgs] = None) -> AnnotationExport:
-        return await get_annotations_export(FunctionomeQuery._get_annotations_index(info.context), filter_args, page_args)
+        return await get_annotations_export(FunctionomeQuery._get_annotations_index(info.context), filter_args, page_args, info.context.loaders)
 
     @strawberry.field
     async def annotations_count(self, info: Info, filter_args: Optional[AnnotationFilterArgs] = None) -> ResultCount:
-        return await get_annotations_count(FunctionomeQuery._get_annotations_index(info.context), filter_args)
+        return await get_annotations_count(FunctionomeQuery._get_annotations_index(info.context), filter_args, info.context.loaders)
     
     @strawberry.field
     async def genes_count(self, info:Info, filter_args:Optional[GeneFilterArgs]=None) -> ResultCount:
-        return await get_genes_count(FunctionomeQuery._get_genes_index(info.context), filter_args)       
+        return await get_genes_count(FunctionomeQuery._get_genes_index(info.context), filter_args, info.context.loaders)       
 
 
     @strawberry.field
     async def gene_stats(self, info:Info, filter_args:Optional[GeneFilterArgs]=None) -> GeneStats:
-        return await get_genes_stats(FunctionomeQuery._get_genes_index(info.context), filter_args)    
+        return await get_genes_stats(FunctionomeQuery._get_genes_index(info.context), filter_args, info.context.loaders)    
         
 
     @strawberry.field
     async def autocomplete(self, info:Info, autocomplete_type: AutocompleteType,  keyword:str, filter_args:Optional[GeneFilterArgs]=None,) -> List[Gene]:
-        return await get_autocomplete(FunctionomeQuery._get_genes_index(info.context),autocomplete_type, keyword, filter_args)
+        return await get_autocomplete(FunctionomeQuery._get_genes_index(info.context),autocomplete_type, keyword, filter_args, info.context.loaders, get_source_includes(info))
 
     @strawberry.field
     async def slim_terms_autocomplete(self, info:Info,  keyword:str, filter_args:Optional[AnnotationFilterArgs]=None) -> List[Term]:
-        return await get_slim_term_autocomplete_query_multi(FunctionomeQuery._get_genes_index(info.context), keyword, filter_args)
+        return await get_slim_term_autocomplete_query_multi(FunctionomeQuery._get_genes_index(info.context), keyword, filter_args, info.context.loaders)
  
  
\ No newline at end of file
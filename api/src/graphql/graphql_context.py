@@ -1,11 +1,14 @@
 from strawberry.fastapi import BaseContext
 from typing import Optional
 from src.config.settings import ApiVersion, settings
+from src.graphql.loaders import ESLoaders
 
 class GraphQLContext(BaseContext):
     def __init__(self, version: Optional[ApiVersion] = None):
         super().__init__()
         self.version = version or settings.DEFAULT_API_VERSION
+        # A new context per request, so batching and de-duplication never cross requests
+        self.loaders = ESLoaders()
     
     def get_index(self, base_index: str) -> str:
         """Get versioned index name"""
@@ -0,0 +1,51 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
+from elasticsearch import AsyncElasticsearch
+from strawberry.dataloader import DataLoader
+from src.config.es import get_es
+from src.core.exceptions import DocumentNotFoundError, SearchError
+
+
+def get_cache_key(key: Tuple[str, Any]) -> str:
+    return json.dumps(key, sort_keys=True, default=str)
+
+
+class ESLoaders:
+    """
+    Per-request batching of Elasticsearch calls. Document lookups made by sibling resolvers
+    in the same tick of the event loop go out as one mget, and searches, counts and
+    aggregations as one msearch. Identical calls within a request are sent once.
+    """
+
+    def __init__(self, client: Optional[AsyncElasticsearch] = None):
+        self.client = client or get_es()
+        self.document_loader = DataLoader(load_fn=self.load_documents, cache_key_fn=get_cache_key)
+        self.search_loader = DataLoader(load_fn=self.load_searches, cache_key_fn=get_cache_key)
+
+    async def get(self, index: str, id: str, source: Union[bool, List[str]] = True) -> Dict[str, Any]:
+        """The document with id, as es.get returns it, with source as the _source filter"""
+        return await self.document_loader.load((index, id, source))
+
+    async def search(self, index: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """The search response for a request body, e.g. {"query": ..., "size": 0, "aggs": ...}"""
+        return await self.search_loader.load((index, body))
+
+    async def count(self, index: str, query: Dict[str, Any]) -> int:
+        resp = await self.search(index, {"query": query, "size": 0, "track_total_hits": True})
+        return resp['hits']['total']['value']
+
+    async def load_documents(self, keys: List[Tuple[str, str, Any]]) -> List[Any]:
+        resp = await self.client.mget(docs=[{"_index": index, "_id": id, "_source": source}
+                                            for index, id, source in keys])
+
+        return [doc if doc.get('found') else DocumentNotFoundError(index, id)
+                for (index, id, source), doc in zip(keys, resp['docs'])]
+
+    async def load_searches(self, keys: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        searches = list()
+        for index, body in keys:
+            searches.extend([{"index": index}, body])
+        resp = await self.client.msearch(searches=searches)
+
+        return [SearchError(index, result) if 'error' in result else result
+                for (index, body), result in zip(keys, resp['responses'])]
@@ -1,7 +1,7 @@
 import strawberry
 import typing
 from src.models.evidence_model import Evidence
-from src.models.base_model import Frequency
+from src.models.base_model import Frequency, build_model
 from src.models.term_model import Term
 
 @strawberry.type
@@ -26,22 +26,16 @@ class Annotation:
     evidence: typing.List[Evidence] 
     groups: typing.List[str]
     evidence_count: typing.Optional[int]
+    cursor: typing.Optional[str] = None
 
     def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            if key == 'term':
-                setattr(self, key, self.add_term_display_id(value) )
-            elif key == 'slim_terms':
-                setattr(self, key, [self.add_term_display_id(value_k) for value_k in value])
-            elif key == 'evidence':
-                setattr(self, key, [Evidence(**value_k) for value_k in value])
-            else:
-                setattr(self, key,  value)
-
-    def add_term_display_id(self, value):
-        term = Term(**value)
-        term.display_id = term.id if term.id.startswith("GO") else ''
-        return term
+        self.__dict__.update(kwargs)
+        if kwargs.get('term') is not None:
+            self.term = build_model(Term, kwargs['term'])
+        if 'slim_terms' in kwargs:
+            self.slim_terms = [build_model(Term, term) for term in kwargs['slim_terms']]
+        if 'evidence' in kwargs:
+            self.evidence = [Evidence(**evidence) for evidence in kwargs['evidence']]
 
 
 @strawberry.type
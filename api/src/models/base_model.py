@@ -3,6 +3,16 @@ from enum import Enum
 import typing
 import strawberry
 
+
+def build_model(cls, source: dict):
+    """
+    An instance of the strawberry type cls holding source as is, without running the dataclass __init__.
+    Unset fields fall back to their class defaults, so only sources with the required fields should be built.
+    """
+    model = cls.__new__(cls)
+    model.__dict__.update(source)
+    return model
+
 @strawberry.enum
 class AutocompleteType(Enum):
     slim_term = 'slim_term'
@@ -41,4 +51,6 @@ class Frequency:
 @strawberry.input
 class PageArgs:
     page: typing.Optional[int] = 0
-    size: typing.Optional[int] = 50
\ No newline at end of file
+    size: typing.Optional[int] = 50
+    # The cursor of the last result already seen, to page with search_after instead of page
+    cursor: typing.Optional[str] = None
\ No newline at end of file
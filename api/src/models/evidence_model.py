@@ -1,7 +1,7 @@
 import typing
 import strawberry
 
-from src.models.base_model import Reference
+from src.models.base_model import Reference, build_model
 from src.models.gene_model import Gene
 
 @strawberry.type
@@ -10,12 +10,11 @@ class Evidence:
     references:typing.List[Reference]
 
     def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            if key == 'with_gene_id':
-                setattr(self, key, Gene(**value))
-            elif key == 'references':
-                setattr(self, key, [Reference(**value_k) for value_k in value if value_k != None])
-            else:
-                setattr(self, key,  value)
+        self.__dict__.update(kwargs)
+        if kwargs.get('with_gene_id') is not None:
+            self.with_gene_id = Gene(**kwargs['with_gene_id'])
+        if 'references' in kwargs:
+            self.references = [build_model(Reference, reference) for reference in kwargs['references']
+                               if reference is not None]
  
 
@@ -1,7 +1,7 @@
 from typing import List, Optional
 import strawberry
 
-from src.models.base_model import Frequency
+from src.models.base_model import Frequency, build_model
 from src.models.term_model import Term
 
 @strawberry.type
@@ -21,19 +21,14 @@ class Gene:
     terms: List[Term]
     slim_terms: List[Term]
     term_count: Optional[int]
+    cursor: Optional[str] = None
     
     def __init__(self, **kwargs):
-        for key, value in kwargs.items():
-            if key == 'slim_terms' or key == 'terms':
-                setattr(self, key, [self.add_term_display_id(value_k) for value_k in value])
-            else:
-                setattr(self, key,  value)
-                
-                
-    def add_term_display_id(self, value):
-        term = Term(**value)
-        term.display_id = term.id if term.id.startswith("GO") else ''
-        return term
+        self.__dict__.update(kwargs)
+        if 'terms' in kwargs:
+            self.terms = [build_model(Term, term) for term in kwargs['terms']]
+        if 'slim_terms' in kwargs:
+            self.slim_terms = [build_model(Term, term) for term in kwargs['slim_terms']]
         
  
 @strawberry.type
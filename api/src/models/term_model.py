@@ -5,9 +5,15 @@ import strawberry
 class Term:
     id: str
     label: Optional[str] = ""
-    display_id: Optional[str] = ""
     aspect: Optional[str] = ""
     is_goslim: Optional[bool] = False
     count: Optional[int] = 0
     evidence_type:Optional[str] = None
-    
+    # Overrides the displayId derived from id when given
+    display_id: strawberry.Private[Optional[str]] = None
+
+    @strawberry.field(name="displayId")
+    def resolve_display_id(self) -> Optional[str]:
+        if self.display_id is not None:
+            return self.display_id
+        return self.id if self.id.startswith("GO") else ''
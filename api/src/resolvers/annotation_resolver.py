@@ -4,89 +4,106 @@ import json
 from src.models.base_model import PageArgs
 from src.models.gene_model import Gene
 from src.models.annotation_model import Annotation, AnnotationExport, AnnotationFilterArgs, AnnotationMinimal, GeneFilterArgs
-from src.config.es import  es
-from src.utils import is_valid_filter
+from src.graphql.loaders import ESLoaders
+from src.utils import decode_cursor, encode_cursor, get_source_filter, is_valid_filter
+
+# Sorts with a unique last key, so search_after can continue from any hit.
+# Annotations keep their score order, tied on the doc_id the loader stores with each one: unlike _doc,
+# it does not change when segments are merged between pages. Indices loaded before doc_id was stored
+# have it unmapped, which sorts them by score alone instead of failing the search
+annotations_sort = [
+  {
+      "_score": {
+          "order": "desc"
+      }
+  },
+  {
+      "doc_id": {
+          "order": "asc",
+          "unmapped_type": "keyword"
+      }
+  }
+]
+genes_sort = [
+  {
+      "coordinates_chr_num.keyword": {
+          "order": "asc"
+      }
+  },
+  {
+      "gene_symbol.keyword": {
+          "order": "asc"
+      }
+  },
+  {
+      "gene.keyword": {
+          "order": "asc"
+      }
+  }
+]
 
-async def get_annotation(annotation_index:str, id:str,):
+async def get_annotation(annotation_index:str, id:str, loaders:ESLoaders=None, source_includes=None):
 
-    resp = await es.get(
-          index=annotation_index,
-          id=id
-    )
+    loaders = loaders or ESLoaders()
+    resp = await loaders.get(annotation_index, id, get_source_filter(source_includes))
 
-    results = Annotation(id=resp['_id'], **resp['_source'])
+    results = Annotation(id=resp['_id'], **resp.get('_source', {}))
         
     return results    
 
 
-async def get_annotations(annotation_index:str, filter_args:AnnotationFilterArgs, page_args=PageArgs):
+async def get_annotations(annotation_index:str, filter_args:AnnotationFilterArgs, page_args=PageArgs, loaders:ESLoaders=None, source_includes=None):
 
     if page_args is None:
       page_args = PageArgs
 
+    loaders = loaders or ESLoaders()
     query = await get_annotations_query(filter_args)
-    resp = await es.search(
-          index=annotation_index,
-          filter_path ='took,hits.hits._score,**hits.hits._id**, **hits.hits._source**',
-          query=query,
-          from_=page_args.page*page_args.size, 
-          size=page_args.size,
-    )
-
-    results = [Annotation(id=hit['_id'], **hit['_source']) for hit in resp.get('hits', {}).get('hits', [])]
+    search_index, page = get_page(annotation_index, page_args)
+    resp = await loaders.search(search_index, {
+          "_source": get_source_filter(source_includes),
+          "query": query,
+          "sort": annotations_sort,
+          **page
+    })
+
+    results = [Annotation(id=hit['_id'], cursor=encode_cursor(hit), **hit.get('_source', {}))
+               for hit in resp.get('hits', {}).get('hits', [])]
         
     return results    
 
 
-async def get_genes(gene_index:str, filter_args: GeneFilterArgs, page_args=PageArgs):
+async def get_genes(gene_index:str, filter_args: GeneFilterArgs, page_args=PageArgs, loaders:ESLoaders=None, source_includes=None):
 
     if page_args is None:
         page_args = PageArgs
 
-    # Get the gene IDs based on the filter 
+    loaders = loaders or ESLoaders()
     genes_query = await get_genes_query(filter_args)
-    gene_id_resp = await es.search(
-        index=gene_index,
-        query=genes_query,
-        from_=page_args.page * page_args.size,
-        size=page_args.size,
-        source=["_id"],
-        sort=[
-          {
-              "coordinates_chr_num.keyword": {
-                  "order": "asc"
-              }
-          },
-          {
-              "gene_symbol.keyword": {
-                  "order": "asc"
-              }
-          }
-        ]
-    )
-
-    gene_ids = [hit['_id'] for hit in gene_id_resp.get('hits', {}).get('hits', [])]
-
-    if not gene_ids:
-        return []
+    search_index, page = get_page(gene_index, page_args)
+    resp = await loaders.search(search_index, {
+        "_source": get_source_filter(source_includes),
+        "query": genes_query,
+        "sort": genes_sort,
+        **page
+    })
 
-    # Fetch the complete gene data using the IDs
-    complete_data_query = {
-            "ids": {
-                "values": gene_ids
-            }
-      }
+    results = [Gene(id=hit['_id'], cursor=encode_cursor(hit), **hit.get('_source', {}))
+               for hit in resp.get('hits', {}).get('hits', [])]
 
-    gene_resp = await es.search(
-        index=gene_index,
-        query=complete_data_query,
-        size=len(gene_ids)
-    )
+    return results
 
-    results = [Gene(id=hit['_id'], **hit['_source']) for hit in gene_resp.get('hits', {}).get('hits', [])]
 
-    return results
+def get_page(index:str, page_args:PageArgs):
+    """
+    The index to search and the paging part of the request: from/size for page_args.page, or
+    search_after the hit page_args.cursor was made from, on the physical index that hit came from
+    """
+    if page_args.cursor:
+        cursor_index, search_after = decode_cursor(page_args.cursor, index)
+        return cursor_index, {"search_after": search_after, "size": page_args.size}
 
+    return index, {"from": page_args.page * page_args.size, "size": page_args.size}
   
   
 async def get_genes_query(filter_args:GeneFilterArgs):
@@ -130,20 +147,19 @@ async def get_genes_query(filter_args:GeneFilterArgs):
     
     return query 
 
-async def get_annotations_export(annotation_index:str, filter_args:AnnotationFilterArgs, page_args=PageArgs):
+async def get_annotations_export(annotation_index:str, filter_args:AnnotationFilterArgs, page_args=PageArgs, loaders:ESLoaders=None):
 
     if page_args is None:
       page_args = PageArgs
 
+    loaders = loaders or ESLoaders()
     query = await get_annotations_query(filter_args)
-    resp = await es.search(
-          source=['gene', 'gene_symbol', 'term.id', 'term.label'], 
-          index=annotation_index,
-          filter_path ='took,hits.hits._score,**hits.hits._source**',
-          query=query,
-          from_=page_args.page*page_args.size,
-          size=10000,
-    )
+    resp = await loaders.search(annotation_index, {
+          "_source": ['gene', 'gene_symbol', 'term.id', 'term.label'], 
+          "query": query,
+          "from": page_args.page*page_args.size,
+          "size": 10000,
+    })
 
     results = [AnnotationMinimal(**hit['_source']) for hit in resp.get('hits', {}).get('hits', [])]
     data = AnnotationExport(data=json.dumps(results, default=lambda x: x.__dict__))
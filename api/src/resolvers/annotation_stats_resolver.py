@@ -4,23 +4,25 @@ import pprint
 from src.models.base_model import Bucket, Entity, ResultCount
 from src.resolvers.annotation_resolver import get_annotations_query
 from src.models.annotation_model import  AnnotationFilterArgs, AnnotationStats, Frequency
-from src.config.es import  es
+from src.graphql.loaders import ESLoaders
+from src.resolvers.cache import cached_resolver
 
-async def get_annotations_count(annotation_index:str, filter_args:AnnotationFilterArgs):
+@cached_resolver
+async def get_annotations_count(annotation_index:str, filter_args:AnnotationFilterArgs, loaders:ESLoaders=None):
 
+    loaders = loaders or ESLoaders()
     query = await get_annotations_query(filter_args)
-    resp = await es.count(
-          index=annotation_index,
-          query=query,
-    )
+    count = await loaders.count(annotation_index, query)
 
-    results = ResultCount(total=resp['count'])
+    results = ResultCount(total=count)
         
     return results     
 
 
-async def get_annotations_stats(annotation_index:str, filter_args:AnnotationFilterArgs):
+@cached_resolver
+async def get_annotations_stats(annotation_index:str, filter_args:AnnotationFilterArgs, loaders:ESLoaders=None):
     
+    loaders = loaders or ESLoaders()
     query = await get_annotations_query(filter_args)
     aggs = {     
         "aspect_frequency": {
@@ -47,13 +49,11 @@ async def get_annotations_stats(annotation_index:str, filter_args:AnnotationFilt
     }
     
 
-    resp = await es.search(
-          index=annotation_index,
-          filter_path ='took,hits.total.value,aggregations',
-          query=query,
-          aggs=aggs,
-          size=0,
-    )
+    resp = await loaders.search(annotation_index, {
+          "query": query,
+          "aggs": aggs,
+          "size": 0,
+    })
 
     stats = dict()
     for k, freqs in resp['aggregations'].items():   
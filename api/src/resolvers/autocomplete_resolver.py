@@ -9,9 +9,11 @@ from src.resolvers.annotation_stats_resolver import get_response_meta
 from src.resolvers.annotation_resolver import get_annotations_query
 from src.models.annotation_model import AnnotationFilterArgs,  GeneFilterArgs
 from src.config.settings import settings
-from src.config.es import  es
+from src.graphql.loaders import ESLoaders
+from src.utils import get_source_filter
 
-async def get_autocomplete(gene_index:str, autocomplete_type: AutocompleteType, keyword:str, filter_args:GeneFilterArgs):
+async def get_autocomplete(gene_index:str, autocomplete_type: AutocompleteType, keyword:str, filter_args:GeneFilterArgs, loaders:ESLoaders=None, source_includes=None):
+    loaders = loaders or ESLoaders()
     query = {}
     collapse = {}
     if autocomplete_type.value == AutocompleteType.gene.value:
@@ -19,15 +21,14 @@ async def get_autocomplete(gene_index:str, autocomplete_type: AutocompleteType,
     elif autocomplete_type.value == AutocompleteType.slim_term.value:
         query, collapse = await get_slim_term_autocomplete_query(keyword, filter_args)
 
-    resp = await es.search(
-        index = gene_index,
-        filter_path ='took,hits.hits._score,**hits.hits._id**,**hits.hits._source**',
-        query = query,
-        collapse = collapse,
-        size=20,
-    )
+    resp = await loaders.search(gene_index, {
+        "_source": get_source_filter(source_includes),
+        "query": query,
+        "collapse": collapse,
+        "size": 20,
+    })
  
-    results = [Gene(id=hit['_id'], **hit['_source']) for hit in resp.get('hits', {}).get('hits', [])]
+    results = [Gene(id=hit['_id'], **hit.get('_source', {})) for hit in resp.get('hits', {}).get('hits', [])]
         
     return results 
 
@@ -49,8 +50,9 @@ async def get_gene_autocomplete_query(keyword:str, filter_args:GeneFilterArgs):
     return query, collapse
 
 
-async def get_slim_term_autocomplete_query_multi(gene_index:str, keyword:str, filter_args:AnnotationFilterArgs)->typing.List[Term]:
+async def get_slim_term_autocomplete_query_multi(gene_index:str, keyword:str, filter_args:AnnotationFilterArgs, loaders:ESLoaders=None)->typing.List[Term]:
   
+    loaders = loaders or ESLoaders()
     filter_query = await get_annotations_query(filter_args)
     query = {
       "bool":{
@@ -99,12 +101,11 @@ async def get_slim_term_autocomplete_query_multi(gene_index:str, keyword:str, fi
         }
       }     
 
-    resp = await es.search(
-      index=gene_index,
-      query=query,
-      aggs=aggs,
-      size=0,
-    )
+    resp = await loaders.search(gene_index, {
+      "query": query,
+      "aggs": aggs,
+      "size": 0,
+    })
 
     freqs = resp['aggregations']['slim_term_frequency']
     terms = list()
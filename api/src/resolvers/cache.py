@@ -0,0 +1,194 @@
+import dataclasses
+import functools
+import json
+import time
+import typing
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+import strawberry
+from elasticsearch import NotFoundError
+from src.config.settings import settings
+from src.graphql.loaders import ESLoaders
+from src.models.annotation_model import AnnotationStats
+from src.models.base_model import ResultCount
+from src.models.gene_model import GeneStats
+from src.utils import is_valid_filter
+
+# The models cached resolvers return, the only ones RedisCache rebuilds
+cached_models = {model.__name__: model for model in (ResultCount, AnnotationStats, GeneStats)}
+
+
+class LRUCache:
+    """In-process cache of at most max_size entries, each expiring ttl seconds after it is set"""
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires <= self.clock():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self.entries[key] = (value, self.clock() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def clear(self) -> None:
+        self.entries.clear()
+
+
+class RedisCache:
+    """
+    Cache in a Redis-compatible server, shared by every API worker. client is anything with
+    async get, set(ex=) and delete, e.g. redis.asyncio.Redis or a local stand-in.
+    """
+
+    def __init__(self, client: Any, ttl: int, prefix: str = "pango-cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.keys = set()
+
+    async def get(self, key: str) -> Optional[Any]:
+        data = await self.client.get(self.prefix + key)
+        return model_from_json(data) if data is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.client.set(self.prefix + key, model_to_json(value), ex=self.ttl)
+        self.keys.add(self.prefix + key)
+
+    async def clear(self) -> None:
+        # Only the keys this worker set; the rest expire with their ttl
+        if self.keys:
+            await self.client.delete(*self.keys)
+        self.keys.clear()
+
+
+def model_to_json(value: Any) -> str:
+    """A cached model as JSON rather than pickle, so reading from a shared server never runs code"""
+    return json.dumps({"model": type(value).__name__, "value": dataclasses.asdict(value)})
+
+
+def model_from_json(data) -> Any:
+    data = json.loads(data)
+    return build_dataclass(cached_models[data["model"]], data["value"])
+
+
+def build_dataclass(cls, value: dict) -> Any:
+    hints = typing.get_type_hints(cls)
+    return cls(**{name: from_plain(hints[name], item) for name, item in value.items()})
+
+
+def from_plain(hint, value) -> Any:
+    """value rebuilt as the type hint: nested models from dicts, in lists and optionals too"""
+    if value is None:
+        return None
+    origin = typing.get_origin(hint)
+    if origin is typing.Union:
+        return from_plain(next(arg for arg in typing.get_args(hint) if arg is not type(None)), value)
+    if origin is list:
+        return [from_plain(typing.get_args(hint)[0], item) for item in value]
+    if dataclasses.is_dataclass(hint):
+        return build_dataclass(hint, value)
+    return value
+
+
+def create_backend():
+    if settings.PANGO_CACHE_URL:
+        try:
+            from redis import asyncio as redis
+        except ImportError:
+            raise ImportError("PANGO_CACHE_URL is set but the redis package is not installed")
+        return RedisCache(redis.from_url(settings.PANGO_CACHE_URL), settings.PANGO_CACHE_TTL)
+    return LRUCache(settings.PANGO_CACHE_SIZE, settings.PANGO_CACHE_TTL)
+
+
+def normalize_filter_args(filter_args) -> str:
+    """Filter args as a stable string: unset and empty filters dropped, ids sorted and de-duplicated"""
+    filters = dict()
+    if filter_args is not None and filter_args is not strawberry.UNSET:
+        for key, value in vars(filter_args).items():
+            if is_valid_filter(value):
+                filters[key] = sorted({item for item in value if item is not strawberry.UNSET and item is not None})
+    return json.dumps(filters, sort_keys=True)
+
+
+class ResultCache:
+    """
+    Resolver results keyed by the physical index behind the queried alias and the normalized filter args.
+    Swapping an alias to a new release, or pointing an ApiVersion at another index, changes the key, so
+    results for the previous release are never served once the alias lookup (alias_ttl) has expired.
+    """
+
+    def __init__(self, backend: Any, alias_ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.backend = backend
+        self.alias_ttl = alias_ttl
+        self.clock = clock
+        self.aliases: Dict[str, tuple] = dict()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    async def resolve_index(self, index: str, client: Any) -> str:
+        cached = self.aliases.get(index)
+        if cached and cached[1] > self.clock():
+            return cached[0]
+        try:
+            resp = await client.indices.get_alias(name=index)
+            resolved = ','.join(sorted(resp))
+        except NotFoundError:
+            # A concrete index rather than an alias
+            resolved = index
+        self.aliases[index] = (resolved, self.clock() + self.alias_ttl)
+        return resolved
+
+    async def get_or_compute(self, name: str, index: str, filter_args, client: Any,
+                             compute: Callable[[], Awaitable[Any]]) -> Any:
+        resolved_index = await self.resolve_index(index, client)
+        key = f"{name}|{resolved_index}|{normalize_filter_args(filter_args)}"
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits[name] += 1
+            return value
+        self.misses[name] += 1
+        value = await compute()
+        await self.backend.set(key, value)
+        return value
+
+    async def clear(self) -> None:
+        self.aliases.clear()
+        await self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "resolvers": {name: {"hits": self.hits[name], "misses": self.misses[name]}
+                          for name in sorted(set(self.hits) | set(self.misses))}
+        }
+
+
+result_cache = ResultCache(create_backend(), settings.PANGO_ALIAS_TTL)
+
+
+def cached_resolver(resolver):
+    """Serve resolver(index, filter_args, loaders) from result_cache"""
+
+    @functools.wraps(resolver)
+    async def wrapper(index: str, filter_args, loaders: ESLoaders = None):
+        loaders = loaders or ESLoaders()
+        return await result_cache.get_or_compute(resolver.__name__, index, filter_args, loaders.client,
+                                                 lambda: resolver(index, filter_args, loaders))
+
+    return wrapper
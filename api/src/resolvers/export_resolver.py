@@ -0,0 +1,158 @@
+import csv
+import io
+import json
+import zlib
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from elasticsearch import AsyncElasticsearch, NotFoundError
+from fastapi import Query
+from src.config.es import get_es
+from src.config.settings import settings
+from src.core.exceptions import IndexError
+from src.models.annotation_model import AnnotationFilterArgs
+from src.resolvers.annotation_resolver import get_annotations_query
+
+
+class ExportFormat(str, Enum):
+    TSV = "tsv"
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+
+export_source = ['gene', 'gene_symbol', 'gene_name', 'taxon_id', 'term.id', 'term.label', 'term.aspect',
+                 'term_type', 'evidence_type', 'evidence.with_gene_id.gene', 'evidence.references.pmid', 'groups']
+
+export_columns = ['gene', 'gene_symbol', 'gene_name', 'taxon_id', 'term_id', 'term_label', 'aspect',
+                  'term_type', 'evidence_type', 'with_genes', 'references', 'groups']
+
+export_media_types = {
+    ExportFormat.TSV: 'text/tab-separated-values',
+    ExportFormat.CSV: 'text/csv',
+    ExportFormat.NDJSON: 'application/x-ndjson',
+}
+
+
+def get_export_filter_args(term_ids: Optional[List[str]] = Query(None),
+                           term_type_ids: Optional[List[str]] = Query(None),
+                           slim_term_ids: Optional[List[str]] = Query(None),
+                           evidence_type_ids: Optional[List[str]] = Query(None),
+                           gene_ids: Optional[List[str]] = Query(None),
+                           aspect_ids: Optional[List[str]] = Query(None),
+                           with_gene_ids: Optional[List[str]] = Query(None),
+                           reference_ids: Optional[List[str]] = Query(None)) -> AnnotationFilterArgs:
+    """The annotations filter from repeated query parameters, e.g. ?gene_ids=UniProtKB:P38398&aspect_ids=..."""
+    return AnnotationFilterArgs(term_ids=term_ids, term_type_ids=term_type_ids, slim_term_ids=slim_term_ids,
+                                evidence_type_ids=evidence_type_ids, gene_ids=gene_ids, aspect_ids=aspect_ids,
+                                with_gene_ids=with_gene_ids, reference_ids=reference_ids)
+
+
+async def open_export(annotation_index: str, client: Optional[AsyncElasticsearch] = None) -> str:
+    """Open the point in time an export pages through, so a missing index fails before streaming starts"""
+    client = client or get_es()
+    try:
+        resp = await client.open_point_in_time(index=annotation_index, keep_alive=settings.PANGO_EXPORT_KEEP_ALIVE)
+    except NotFoundError:
+        raise IndexError(f"Index '{annotation_index}' not found")
+    return resp['id']
+
+
+async def iter_export_hits(pit_id: str, filter_args: AnnotationFilterArgs,
+                           client: Optional[AsyncElasticsearch] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Every matching annotation, a page of hits at a time, with search_after on the point in time"""
+    client = client or get_es()
+    query = await get_annotations_query(filter_args)
+    search_after = None
+    try:
+        while True:
+            page = {"search_after": search_after} if search_after else {}
+            resp = await client.search(
+                pit={"id": pit_id, "keep_alive": settings.PANGO_EXPORT_KEEP_ALIVE},
+                source=export_source,
+                query=query,
+                sort=[{"_shard_doc": "asc"}],
+                size=settings.PANGO_EXPORT_PAGE_SIZE,
+                track_total_hits=False,
+                **page)
+            # The id can change between searches; the latest one is the one to keep alive and close
+            pit_id = resp.get('pit_id', pit_id)
+            hits = resp['hits']['hits']
+            if not hits:
+                break
+            yield hits
+            search_after = hits[-1]['sort']
+    finally:
+        await client.close_point_in_time(id=pit_id)
+
+
+def get_export_row(source: Dict[str, Any]) -> Dict[str, Any]:
+    term = source.get('term') or {}
+    evidence = source.get('evidence') or []
+    return {
+        'gene': source.get('gene'),
+        'gene_symbol': source.get('gene_symbol'),
+        'gene_name': source.get('gene_name'),
+        'taxon_id': source.get('taxon_id'),
+        'term_id': term.get('id'),
+        'term_label': term.get('label'),
+        'aspect': term.get('aspect'),
+        'term_type': source.get('term_type'),
+        'evidence_type': source.get('evidence_type'),
+        'with_genes': unique(e['with_gene_id']['gene'] for e in evidence if e.get('with_gene_id')),
+        'references': unique(r['pmid'] for e in evidence for r in e.get('references') or [] if r),
+        'groups': source.get('groups') or [],
+    }
+
+
+def unique(values: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+
+def format_delimited(rows: List[Dict[str, Any]], delimiter: str) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out, delimiter=delimiter, lineterminator='\n')
+    for row in rows:
+        writer.writerow(['|'.join(value) if isinstance(value, list) else ('' if value is None else value)
+                         for value in (row[column] for column in export_columns)])
+    return out.getvalue()
+
+
+def format_ndjson(rows: List[Dict[str, Any]]) -> str:
+    return ''.join(json.dumps(row) + '\n' for row in rows)
+
+
+def get_export_header(format: ExportFormat) -> str:
+    if format == ExportFormat.TSV:
+        return '\t'.join(export_columns) + '\n'
+    if format == ExportFormat.CSV:
+        return ','.join(export_columns) + '\n'
+    return ''
+
+
+def format_rows(rows: List[Dict[str, Any]], format: ExportFormat) -> str:
+    if format == ExportFormat.TSV:
+        return format_delimited(rows, '\t')
+    if format == ExportFormat.CSV:
+        return format_delimited(rows, ',')
+    return format_ndjson(rows)
+
+
+async def stream_annotations_export(pit_id: str, filter_args: AnnotationFilterArgs, format: ExportFormat,
+                                    gzip: bool = False,
+                                    client: Optional[AsyncElasticsearch] = None) -> AsyncIterator[bytes]:
+    """
+    The export as chunks of bytes, one per page of hits, so memory does not grow with the
+    number of annotations. With gzip the chunks together are one gzip stream.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if gzip else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode('utf-8')
+        return compressor.compress(data) if compressor else data
+
+    yield encode(get_export_header(format))
+    async for hits in iter_export_hits(pit_id, filter_args, client):
+        chunk = encode(format_rows([get_export_row(hit['_source']) for hit in hits], format))
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.flush()
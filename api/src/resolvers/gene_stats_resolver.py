@@ -5,36 +5,36 @@ from src.models.base_model import Bucket, Entity, ResultCount
 from src.models.gene_model import GeneStats
 from src.models.annotation_model import  Frequency, GeneFilterArgs
 from src.resolvers.annotation_resolver import get_genes_query
-from src.config.es import  es
+from src.graphql.loaders import ESLoaders
+from src.resolvers.cache import cached_resolver
 
-async def get_genes_count(gene_index:str, filter_args:GeneFilterArgs):
+@cached_resolver
+async def get_genes_count(gene_index:str, filter_args:GeneFilterArgs, loaders:ESLoaders=None):
 
+    loaders = loaders or ESLoaders()
     query = await get_genes_query(filter_args)
-    resp = await es.count(
-          index=gene_index,
-          query=query
-    )
+    count = await loaders.count(gene_index, query)
     
-    results = ResultCount(total=resp['count'])
+    results = ResultCount(total=count)
         
     return results  
 
 
-async def get_genes_stats(gene_index:str, filter_args:GeneFilterArgs):
+@cached_resolver
+async def get_genes_stats(gene_index:str, filter_args:GeneFilterArgs, loaders:ESLoaders=None):
     
+    loaders = loaders or ESLoaders()
     query = await get_genes_query(filter_args)
     aggs = {           
         "slim_term_frequency": get_slim_terms_query()        
     }
     
 
-    resp = await es.search(
-          index=gene_index,
-          filter_path ='took,hits.total.value,aggregations',
-          query=query,
-          aggs=aggs,
-          size=0,
-    )
+    resp = await loaders.search(gene_index, {
+          "query": query,
+          "aggs": aggs,
+          "size": 0,
+    })
 
     stats = dict()
     for k, freqs in resp['aggregations'].items():   
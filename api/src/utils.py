@@ -1,6 +1,18 @@
+import base64
+import json
 import re
 import strawberry
 from strawberry.types import Info
+from strawberry.types.nodes import SelectedField
+from src.core.exceptions import CursorError
+
+# Source fields the models need to build a nested object, whatever was selected from it
+nested_required_fields = {
+    'term': ['id'],
+    'terms': ['id'],
+    'slim_terms': ['id'],
+    'references': ['pmid', 'title', 'authors', 'date'],
+}
 
 def convert_camel_case(name):
     pattern = re.compile(r'(?<!^)(?=[A-Z])')
@@ -13,9 +25,65 @@ def get_selected_fields(info:Info):
     return selected_fields
 
 
+def get_source_includes(info:Info):
+    """
+    The _source paths behind the fields selected under the resolver's field, nested selections included,
+    e.g. ["gene", "gene_symbol", "term.id", "term.label"] for { gene geneSymbol term { label } }
+    """
+    return sorted(set(get_source_paths(info.selected_fields[0].selections)))
+
+
+def get_source_paths(selections, prefix=''):
+    for selection in selections:
+        if not isinstance(selection, SelectedField):
+            # Fragments
+            yield from get_source_paths(selection.selections, prefix)
+            continue
+        name = convert_camel_case(selection.name)
+        if name.startswith('__') or (not prefix and name in ('id', 'cursor')):
+            # Introspection, and fields made from the hit rather than its _source
+            continue
+        if name == 'display_id':
+            yield prefix + 'id'
+        elif selection.selections:
+            path = prefix + name
+            for required in nested_required_fields.get(name, []):
+                yield f"{path}.{required}"
+            yield from get_source_paths(selection.selections, path + '.')
+        else:
+            yield prefix + name
+
+
+def get_source_filter(source_includes):
+    """_source for a search body: everything if source_includes is None, nothing if it is empty"""
+    if source_includes is None:
+        return True
+    return source_includes or False
+
+
 def is_valid_filter(field) -> bool:
     if field is strawberry.UNSET or field is None:
         return False
     
     valid_items = [item for item in field if item is not strawberry.UNSET and item is not None]
-    return len(valid_items) > 0
\ No newline at end of file
+    return len(valid_items) > 0
+
+def encode_cursor(hit) -> str:
+    """Opaque cursor for the search hit: its index and sort values, for a search_after request continuing after it"""
+    data = json.dumps([hit['_index'], hit['sort']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor:str, index:str):
+    """
+    The physical index and search_after values of a cursor made on index or an index behind it, e.g.
+    pango-2-genes-20250101120000 for pango-2-genes, so paging stays on one release across an alias swap
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_index, search_after = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise CursorError(cursor, index)
+    if not isinstance(cursor_index, str) or not (cursor_index == index or cursor_index.startswith(index + '-')):
+        raise CursorError(cursor, index)
+    return cursor_index, search_after
@@ -0,0 +1,162 @@
+import json
+import pytest
+import os
+
+# Set up environment variables for testing
+os.environ.setdefault("DEBUG", "False")
+os.environ.setdefault("PANGO_ES_URL", "http://localhost:9200")
+os.environ.setdefault("PANGO_ANNOTATIONS_INDEX", "test_annotations")
+os.environ.setdefault("PANGO_GENES_INDEX", "test_genes")
+os.environ.setdefault("HOST_URL", "localhost")
+os.environ.setdefault("HOST_PORT", "8000")
+
+from fastapi.testclient import TestClient
+from src.app import create_app
+from src.graphql.loaders import ESLoaders
+from src.models.annotation_model import GeneFilterArgs
+from src.models.base_model import Bucket, Entity, Frequency
+from src.models.gene_model import GeneStats
+from src.resolvers import cache
+from src.resolvers.cache import (LRUCache, RedisCache, ResultCache, model_from_json, model_to_json,
+                                 normalize_filter_args)
+from src.resolvers.gene_stats_resolver import get_genes_count
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class AliasedES:
+    """Answers counts with the number of the release the alias points at"""
+
+    def __init__(self, alias, index):
+        self.aliases = {alias: index}
+        self.indices = self
+        self.msearch_calls = 0
+
+    async def get_alias(self, name):
+        return {self.aliases[name]: {"aliases": {name: {}}}}
+
+    async def msearch(self, searches):
+        self.msearch_calls += 1
+        return {"responses": [{"hits": {"total": {"value": int(self.aliases[header["index"]][-1])}}}
+                              for header in searches[::2]]}
+
+
+class FakeRedis:
+    """Local stand-in for a Redis server"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class TestResultCache:
+    """Test the count and stats results cache"""
+
+    @pytest.fixture
+    def clock(self):
+        return Clock()
+
+    @pytest.fixture
+    def result_cache(self, monkeypatch, clock):
+        result_cache = ResultCache(LRUCache(10, ttl=100, clock=clock), alias_ttl=10, clock=clock)
+        monkeypatch.setattr(cache, "result_cache", result_cache)
+        return result_cache
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_and_ttl(self, clock):
+        """Test least recently used entries are evicted and entries expire after ttl"""
+        lru = LRUCache(2, ttl=10, clock=clock)
+        await lru.set("a", 1)
+        await lru.set("b", 2)
+        await lru.get("a")
+        await lru.set("c", 3)
+
+        assert await lru.get("b") is None
+        assert await lru.get("a") == 1
+        clock.now = 10
+        assert await lru.get("c") is None
+
+    def test_normalize_filter_args(self):
+        """Test filter args differing only in order, duplicates or unset fields share a key"""
+        assert normalize_filter_args(GeneFilterArgs(slim_term_ids=["GO:2", "GO:1"])) == \
+            normalize_filter_args(GeneFilterArgs(slim_term_ids=["GO:1", "GO:2", "GO:1"], gene_ids=[]))
+        assert normalize_filter_args(GeneFilterArgs()) == normalize_filter_args(None) == '{}'
+
+    @pytest.mark.asyncio
+    async def test_hits_and_misses(self, result_cache):
+        """Test repeated counts are served from the cache and counted"""
+        es = AliasedES("pango-2-genes", "pango-2-genes-1")
+        for _ in range(3):
+            result = await get_genes_count("pango-2-genes", GeneFilterArgs(gene_ids=["UniProtKB:P12345"]), ESLoaders(es))
+            assert result.total == 1
+
+        assert es.msearch_calls == 1
+        assert result_cache.stats()["resolvers"] == {"get_genes_count": {"hits": 2, "misses": 1}}
+
+    @pytest.mark.asyncio
+    async def test_alias_swap_invalidates(self, result_cache, clock):
+        """Test a new release behind the alias is served once the alias lookup expires"""
+        es = AliasedES("pango-2-genes", "pango-2-genes-1")
+        assert (await get_genes_count("pango-2-genes", None, ESLoaders(es))).total == 1
+
+        es.aliases["pango-2-genes"] = "pango-2-genes-2"
+        assert (await get_genes_count("pango-2-genes", None, ESLoaders(es))).total == 1
+        clock.now = 10
+        assert (await get_genes_count("pango-2-genes", None, ESLoaders(es))).total == 2
+
+    @pytest.mark.asyncio
+    async def test_versions_do_not_share_entries(self, result_cache):
+        """Test indices of different API versions are cached separately"""
+        es = AliasedES("pango-1-genes", "pango-1-genes-1")
+        es.aliases["pango-2-genes"] = "pango-2-genes-2"
+
+        assert (await get_genes_count("pango-1-genes", None, ESLoaders(es))).total == 1
+        assert (await get_genes_count("pango-2-genes", None, ESLoaders(es))).total == 2
+
+    @pytest.mark.asyncio
+    async def test_redis_backend(self, monkeypatch):
+        """Test results round-trip through a Redis-compatible backend"""
+        redis = FakeRedis()
+        monkeypatch.setattr(cache, "result_cache", ResultCache(RedisCache(redis, ttl=100), alias_ttl=10))
+        es = AliasedES("pango-2-genes", "pango-2-genes-3")
+
+        for _ in range(2):
+            assert (await get_genes_count("pango-2-genes", None, ESLoaders(es))).total == 3
+        assert es.msearch_calls == 1
+        assert len(redis.data) == 1
+        assert json.loads(next(iter(redis.data.values()))) == {"model": "ResultCount", "value": {"total": 3}}
+
+        await cache.result_cache.clear()
+        assert redis.data == {}
+
+    def test_stats_round_trip(self):
+        """Test nested stats models are rebuilt from their JSON"""
+        stats = GeneStats(slim_term_frequency=Frequency(buckets=[
+            Bucket(key="immune", doc_count=2, meta=Entity(id="GO:0006955", label="immune response",
+                                                          aspect="biological_process", display_id="GO:0006955")),
+            Bucket(key="other", doc_count=1),
+        ]))
+
+        assert model_from_json(model_to_json(stats)) == stats
+
+    def test_metrics_endpoint(self, result_cache):
+        """Test hit/miss counters are exported on /metrics"""
+        response = TestClient(create_app()).get("/metrics")
+
+        assert response.status_code == 200
+        assert response.json()["cache"]["backend"] == "LRUCache"
@@ -0,0 +1,95 @@
+import json
+import threading
+import pytest
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set up environment variables for testing
+os.environ.setdefault("DEBUG", "False")
+os.environ.setdefault("PANGO_ES_URL", "http://localhost:9200")
+os.environ.setdefault("PANGO_ANNOTATIONS_INDEX", "test_annotations")
+os.environ.setdefault("PANGO_GENES_INDEX", "test_genes")
+os.environ.setdefault("HOST_URL", "localhost")
+os.environ.setdefault("HOST_PORT", "8000")
+
+from fastapi.testclient import TestClient
+from src.app import create_app
+from src.config import es as es_config
+from src.config.es import close_es, get_es, get_operation
+from src.config.settings import settings
+
+
+class SearchHandler(BaseHTTPRequestHandler):
+    """Answers every request with an empty msearch response, as Elasticsearch would"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = 404 if "missing" in self.path else 200
+        body = json.dumps({"responses": []}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestESClient:
+    """Test the shared Elasticsearch client and its metrics"""
+
+    @pytest.fixture
+    def es_server(self, monkeypatch):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), SearchHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        monkeypatch.setattr(settings, "PANGO_ES_URL", f"http://127.0.0.1:{server.server_port}")
+        monkeypatch.setattr(settings, "PANGO_ES_POOL_SIZE", 8)
+        monkeypatch.setattr(es_config, "_es", None)
+        yield server
+        server.shutdown()
+
+    def test_get_operation(self):
+        """Test request targets are grouped by the API they call"""
+        assert get_operation("/_msearch") == "_msearch"
+        assert get_operation("/pango-2-genes/_search?typed_keys=true") == "_search"
+        assert get_operation("/pango-2-genes/_alias/pango-2-genes") == "_alias"
+
+    @pytest.mark.asyncio
+    async def test_requests_are_timed(self, es_server):
+        """Test every request is timed per operation and the pool is back to idle afterwards"""
+        client = get_es()
+        await client.msearch(searches=[{"index": "pango-2-genes"}, {"query": {"match_all": {}}}])
+        await client.msearch(searches=[{"index": "pango-2-genes"}, {"query": {"match_all": {}}}])
+        with pytest.raises(Exception):
+            await client.msearch(index="missing", searches=[{}, {"query": {"match_all": {}}}])
+        await close_es()
+
+        stats = es_config.es_metrics.stats()
+        assert stats["requests"]["_msearch"]["count"] == 3
+        assert stats["requests"]["_msearch"]["errors"] == 1
+        assert stats["requests"]["_msearch"]["max_ms"] >= stats["requests"]["_msearch"]["p50_ms"] > 0
+        assert stats["pool"] == {"size": 8, "in_flight": 0, "peak_in_flight": 1, "utilization": 0}
+
+    @pytest.mark.asyncio
+    async def test_connection_pool(self, es_server):
+        """Test the pool holds PANGO_ES_POOL_SIZE connections, not aiohttp's default total of 100"""
+        client = get_es()
+        await client.msearch(searches=[{"index": "pango-2-genes"}, {"query": {"match_all": {}}}])
+        connector = client.transport.node_pool.get().session.connector
+        await close_es()
+
+        assert connector.limit == 8
+        assert connector.limit_per_host == 8
+
+    def test_lifespan(self, es_server):
+        """Test the app opens one client on startup, closes it on shutdown and reports it on /metrics"""
+        with TestClient(create_app()) as client:
+            assert es_config._es is not None
+            assert get_es() is es_config._es
+            response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.json()["elasticsearch"]["pool"]["size"] == 8
+        assert es_config._es is None
@@ -0,0 +1,122 @@
+import gzip
+import json
+import pytest
+import os
+
+# Set up environment variables for testing
+os.environ.setdefault("DEBUG", "False")
+os.environ.setdefault("PANGO_ES_URL", "http://localhost:9200")
+os.environ.setdefault("PANGO_ANNOTATIONS_INDEX", "test_annotations")
+os.environ.setdefault("PANGO_GENES_INDEX", "test_genes")
+os.environ.setdefault("HOST_URL", "localhost")
+os.environ.setdefault("HOST_PORT", "8000")
+
+from elasticsearch import NotFoundError
+from fastapi.testclient import TestClient
+from src.app import create_app
+from src.config.settings import settings
+from src.resolvers import export_resolver
+from src.resolvers.export_resolver import export_columns
+
+
+class PointInTimeES:
+    """Pages through annotations with a point in time and search_after, recording every search"""
+
+    def __init__(self, index, annotations):
+        self.index = index
+        self.annotations = annotations
+        self.searches = []
+        self.open_pits = set()
+
+    async def open_point_in_time(self, index, keep_alive):
+        if index != self.index:
+            raise NotFoundError("index_not_found_exception", None, {})
+        self.open_pits.add("pit-0")
+        return {"id": "pit-0"}
+
+    async def search(self, pit, size, search_after=None, **body):
+        assert pit["id"] in self.open_pits
+        self.searches.append(dict(body, size=size, search_after=search_after))
+        start = search_after[0] + 1 if search_after else 0
+        hits = [{"_id": str(i), "_source": self.annotations[i], "sort": [i]}
+                for i in range(start, min(start + size, len(self.annotations)))]
+        # Elasticsearch may hand back a new id for the same point in time
+        self.open_pits = {f"pit-{start + 1}"}
+        return {"pit_id": f"pit-{start + 1}", "hits": {"hits": hits}}
+
+    async def close_point_in_time(self, id):
+        self.open_pits.discard(id)
+
+
+def sample_annotation(i, aspect="biological process"):
+    return {
+        "gene": f"UniProtKB:P{i:05d}",
+        "gene_symbol": f"GENE{i}",
+        "gene_name": f"Gene {i}",
+        "taxon_id": "9606",
+        "term": {"id": "GO:0006955", "label": "immune response", "aspect": aspect},
+        "term_type": "known",
+        "evidence_type": "direct",
+        "evidence": [{"with_gene_id": {"gene": "MGI:MGI:1"},
+                      "references": [{"pmid": "PMID:1"}, {"pmid": "PMID:2"}]},
+                     {"with_gene_id": {"gene": "MGI:MGI:1"}, "references": []}],
+        "groups": ["GO_Central"],
+    }
+
+
+class TestAnnotationsExport:
+    """Test the streaming /export/annotations route"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        es = PointInTimeES("pango-1-test_annotations", [sample_annotation(i) for i in range(7)])
+        monkeypatch.setattr(export_resolver, "get_es", lambda: es)
+        monkeypatch.setattr(settings, "PANGO_EXPORT_PAGE_SIZE", 3)
+        return es
+
+    def test_tsv_walks_every_page(self, client):
+        """Test every annotation is exported, a page at a time, and the point in time is closed"""
+        response = TestClient(create_app()).get("/export/annotations")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/tab-separated-values")
+        lines = response.text.splitlines()
+        assert lines[0].split("\t") == export_resolver.export_columns
+        assert len(lines) == 8
+        assert lines[1].split("\t")[:2] == ["UniProtKB:P00000", "GENE0"]
+        # Duplicate with genes are dropped, references joined
+        assert lines[1].split("\t")[9:11] == ["MGI:MGI:1", "PMID:1|PMID:2"]
+        assert [search["search_after"] for search in client.searches] == [None, [2], [5], [6]]
+        assert client.open_pits == set()
+
+    def test_filters_and_ndjson(self, client):
+        """Test repeated query parameters become the annotations filter"""
+        response = TestClient(create_app()).get(
+            "/export/annotations", params={"format": "ndjson", "gene_ids": ["UniProtKB:P00001", "UniProtKB:P00002"]})
+
+        assert response.status_code == 200
+        assert json.loads(response.text.splitlines()[0])["term_id"] == "GO:0006955"
+        assert client.searches[0]["query"]["bool"]["filter"][0] == \
+            {"terms": {"gene.keyword": ["UniProtKB:P00001", "UniProtKB:P00002"]}}
+
+    def test_gzip(self, client):
+        """Test gzip gives one gzip stream of the rows"""
+        response = TestClient(create_app()).get("/export/annotations", params={"format": "csv", "gzip": "true"})
+
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == 'attachment; filename="pango-annotations.csv.gz"'
+        lines = gzip.decompress(response.content).decode("utf-8").splitlines()
+        assert lines[0].split(",") == export_columns
+        assert len(lines) == len(client.annotations) + 1
+
+    def test_gaf_not_offered(self, client):
+        """Test GAF is rejected: the index keeps neither the GO relation nor the annotation date GAF needs"""
+        response = TestClient(create_app()).get("/export/annotations", params={"format": "gaf"})
+
+        assert response.status_code == 422
+
+    def test_missing_index(self, client):
+        """Test a missing index fails before anything is streamed"""
+        response = TestClient(create_app()).get("/export/annotations", headers={"X-API-Version": "pango-2"})
+
+        assert response.status_code == 400
@@ -0,0 +1,143 @@
+import pytest
+import pytest_asyncio
+import os
+
+# Set up environment variables for testing
+os.environ.setdefault("DEBUG", "False")
+os.environ.setdefault("PANGO_ES_URL", "http://localhost:9200")
+os.environ.setdefault("PANGO_ANNOTATIONS_INDEX", "test_annotations")
+os.environ.setdefault("PANGO_GENES_INDEX", "test_genes")
+os.environ.setdefault("HOST_URL", "localhost")
+os.environ.setdefault("HOST_PORT", "8000")
+
+from src.app import schema
+from src.config.settings import ApiVersion
+from src.core.exceptions import DocumentNotFoundError, SearchError
+from src.graphql.graphql_context import GraphQLContext
+from src.graphql.loaders import ESLoaders
+from src.resolvers.cache import result_cache
+
+
+class FakeIndices:
+    """Every index is its own alias target"""
+
+    async def get_alias(self, name):
+        return {name: {"aliases": {}}}
+
+
+class FakeES:
+    """Records mget/msearch calls and answers them with canned documents and search responses"""
+
+    def __init__(self, documents=None, error_indices=()):
+        self.documents = documents or {}
+        self.indices = FakeIndices()
+        self.error_indices = error_indices
+        self.mget_calls = []
+        self.msearch_calls = []
+
+    async def mget(self, docs):
+        self.mget_calls.append(docs)
+        return {"docs": [
+            {"_index": doc["_index"], "_id": doc["_id"], "found": True, "_source": self.documents[doc["_id"]]}
+            if doc["_id"] in self.documents else {"_index": doc["_index"], "_id": doc["_id"], "found": False}
+            for doc in docs
+        ]}
+
+    async def msearch(self, searches):
+        self.msearch_calls.append(searches)
+        responses = []
+        for header, body in zip(searches[::2], searches[1::2]):
+            if header["index"] in self.error_indices:
+                responses.append({"error": {"type": "index_not_found_exception"}, "status": 404})
+                continue
+            response = {"hits": {"total": {"value": 42, "relation": "eq"}, "hits": []}}
+            if "aggs" in body:
+                response["aggregations"] = {"slim_term_frequency": {"distinct_slim_term_frequency": {"buckets": []}}}
+            responses.append(response)
+        return {"responses": responses}
+
+
+def sample_annotation(gene):
+    return {
+        "gene": gene,
+        "gene_symbol": gene,
+        "gene_name": f"{gene} gene",
+        "term_type": "known",
+        "term": {"id": "GO:0006955", "label": "immune response", "aspect": "biological process"},
+        "slim_terms": [],
+        "evidence": [],
+        "groups": [],
+        "evidence_count": 0,
+    }
+
+
+def get_context(client):
+    context = GraphQLContext(version=ApiVersion.V2)
+    context.loaders = ESLoaders(client)
+    return context
+
+
+class TestESLoaders:
+    """Test request-scoped batching of Elasticsearch calls"""
+
+    @pytest_asyncio.fixture(autouse=True)
+    async def clear_cache(self):
+        await result_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_sibling_fields_share_one_msearch(self):
+        """Test counts and stats asked for together go out as one msearch"""
+        client = FakeES()
+        query = """
+        query {
+            annotationsCount { total }
+            genesCount { total }
+            sameGenesCount: genesCount { total }
+            geneStats { slimTermFrequency { buckets { key } } }
+        }
+        """
+
+        result = await schema.execute(query, context_value=get_context(client))
+
+        assert result.errors is None
+        assert result.data["annotationsCount"]["total"] == 42
+        assert result.data["sameGenesCount"]["total"] == 42
+        assert len(client.msearch_calls) == 1
+        # The repeated genesCount is sent once
+        headers = client.msearch_calls[0][::2]
+        assert headers == [{"index": "pango-2-test_annotations"}, {"index": "pango-2-test_genes"},
+                           {"index": "pango-2-test_genes"}]
+
+    @pytest.mark.asyncio
+    async def test_aliased_annotations_share_one_mget(self):
+        """Test annotation lookups by id are coalesced into one mget"""
+        client = FakeES(documents={"a1": sample_annotation("BRCA1"), "a2": sample_annotation("TP53")})
+        query = """
+        query {
+            first: annotation(id: "a1") { id geneSymbol }
+            second: annotation(id: "a2") { id geneSymbol }
+        }
+        """
+
+        result = await schema.execute(query, context_value=get_context(client))
+
+        assert result.errors is None
+        assert result.data["first"] == {"id": "a1", "geneSymbol": "BRCA1"}
+        assert result.data["second"] == {"id": "a2", "geneSymbol": "TP53"}
+        assert client.mget_calls == [[{"_index": "pango-2-test_annotations", "_id": "a1", "_source": ["gene_symbol"]},
+                                      {"_index": "pango-2-test_annotations", "_id": "a2", "_source": ["gene_symbol"]}]]
+
+    @pytest.mark.asyncio
+    async def test_missing_document(self):
+        """Test a missing document raises DocumentNotFoundError"""
+        with pytest.raises(DocumentNotFoundError):
+            await ESLoaders(FakeES()).get("pango-2-test_annotations", "missing")
+
+    @pytest.mark.asyncio
+    async def test_failed_search_only_fails_its_caller(self):
+        """Test an error in one msearch response does not fail the other searches"""
+        loaders = ESLoaders(FakeES(error_indices=("missing-index",)))
+
+        assert await loaders.count("pango-2-test_genes", {"match_all": {}}) == 42
+        with pytest.raises(SearchError):
+            await loaders.count("missing-index", {"match_all": {}})
@@ -0,0 +1,48 @@
+import os
+
+# Set up environment variables for testing
+os.environ.setdefault("DEBUG", "False")
+os.environ.setdefault("PANGO_ES_URL", "http://localhost:9200")
+os.environ.setdefault("PANGO_ANNOTATIONS_INDEX", "test_annotations")
+os.environ.setdefault("PANGO_GENES_INDEX", "test_genes")
+os.environ.setdefault("HOST_URL", "localhost")
+os.environ.setdefault("HOST_PORT", "8000")
+
+from src.benchmark_models import get_hits
+from src.models.annotation_model import Annotation
+from src.models.gene_model import Gene
+from src.models.term_model import Term
+
+
+class TestModels:
+    """Test building response models straight from Elasticsearch sources"""
+
+    def test_annotation_from_source(self):
+        """Test nested terms, evidence, genes and references are built from their dicts"""
+        hit = get_hits(1, 2)[0]
+        annotation = Annotation(id=hit["_id"], **hit["_source"])
+
+        assert annotation.id == "0"
+        assert isinstance(annotation.term, Term)
+        assert annotation.term.resolve_display_id() == annotation.term.id
+        assert [term.id for term in annotation.slim_terms] == [term["id"] for term in hit["_source"]["slim_terms"]]
+        assert isinstance(annotation.evidence[0].with_gene_id, Gene)
+        assert annotation.evidence[0].references[0].pmid == hit["_source"]["evidence"][0]["references"][0]["pmid"]
+        # Fields the source does not have keep their defaults
+        assert annotation.cursor is None
+        assert annotation.term.is_goslim is False
+
+    def test_display_id(self):
+        """Test displayId is the GO id, and empty for other terms"""
+        gene = Gene(gene="UniProtKB:P38398", terms=[{"id": "GO:0006955"}, {"id": "UNKNOWN:0001"}])
+
+        assert [term.resolve_display_id() for term in gene.terms] == ["GO:0006955", ""]
+        assert Term(id="GO:0006955", display_id="0006955").resolve_display_id() == "0006955"
+
+    def test_missing_nested_values(self):
+        """Test a missing term and missing references are tolerated"""
+        annotation = Annotation(gene="UniProtKB:P38398", term=None,
+                                evidence=[{"with_gene_id": None, "references": [None]}])
+
+        assert annotation.term is None
+        assert annotation.evidence[0].references == []
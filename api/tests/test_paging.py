@@ -0,0 +1,102 @@
+import pytest
+import os
+
+# Set up environment variables for testing
+os.environ.setdefault("DEBUG", "False")
+os.environ.setdefault("PANGO_ES_URL", "http://localhost:9200")
+os.environ.setdefault("PANGO_ANNOTATIONS_INDEX", "test_annotations")
+os.environ.setdefault("PANGO_GENES_INDEX", "test_genes")
+os.environ.setdefault("HOST_URL", "localhost")
+os.environ.setdefault("HOST_PORT", "8000")
+
+from src.core.exceptions import CursorError
+from src.graphql.loaders import ESLoaders
+from src.models.base_model import PageArgs
+from src.resolvers.annotation_resolver import annotations_sort, genes_sort, get_annotations, get_genes
+from src.utils import decode_cursor, encode_cursor
+
+
+class SortedES:
+    """Serves equally scored annotations in doc_id order from one physical index, with from/size or search_after"""
+
+    def __init__(self, index, count):
+        self.index = index
+        self.docs = [{"gene": f"UniProtKB:P{i:05d}", "term_type": "known", "slim_terms": [],
+                      "evidence": [], "groups": [], "evidence_count": 0} for i in range(count)]
+        self.searches = []
+
+    async def msearch(self, searches):
+        responses = []
+        for header, body in zip(searches[::2], searches[1::2]):
+            # An alias or the index itself; hits always come from the index
+            self.searches.append((header["index"], body))
+            start = body["search_after"][-1] + 1 if "search_after" in body else body.get("from", 0)
+            hits = [{"_index": self.index, "_id": str(i), "_source": self.docs[i], "sort": [0.0, i]}
+                    for i in range(start, min(start + body["size"], len(self.docs)))]
+            responses.append({"hits": {"hits": hits}})
+        return {"responses": responses}
+
+
+class GenesES:
+    """Serves genes already in chromosome/symbol order"""
+
+    def __init__(self, index, genes):
+        self.index = index
+        self.genes = genes
+        self.searches = []
+
+    async def msearch(self, searches):
+        self.searches.extend(zip(searches[::2], searches[1::2]))
+        hits = [{"_index": self.index, "_id": gene["gene"], "_source": gene,
+                 "sort": [gene["coordinates_chr_num"], gene["gene_symbol"], gene["gene"]]} for gene in self.genes]
+        return {"responses": [{"hits": {"hits": hits}}]}
+
+
+class TestCursorPaging:
+    """Test search_after paging with opaque cursors"""
+
+    def test_cursor_round_trip(self):
+        """Test a cursor decodes to the index and sort values of its hit"""
+        cursor = encode_cursor({"_index": "pango-2-genes-20250101120000", "sort": ["1", "BRCA1", None]})
+
+        assert decode_cursor(cursor, "pango-2-genes") == ("pango-2-genes-20250101120000", ["1", "BRCA1", None])
+
+    @pytest.mark.parametrize("cursor", ["not a cursor", encode_cursor({"_index": "pango-2-annotations", "sort": [1]})])
+    def test_invalid_cursor(self, cursor):
+        """Test garbage cursors and cursors for another index are rejected"""
+        with pytest.raises(CursorError):
+            decode_cursor(cursor, "pango-2-genes")
+
+    @pytest.mark.asyncio
+    async def test_cursor_pages_match_offset_pages(self):
+        """Test walking with cursors returns the same pages as from/size, searching the cursor's index"""
+        es = SortedES("pango-2-annotations-20250101120000", 25)
+
+        offset_pages = [await get_annotations("pango-2-annotations-20250101120000", None,
+                                              PageArgs(page=page, size=10), ESLoaders(es)) for page in range(3)]
+        cursor_pages = [await get_annotations("pango-2-annotations", None, PageArgs(size=10), ESLoaders(es))]
+        while cursor_pages[-1]:
+            cursor_pages.append(await get_annotations("pango-2-annotations", None,
+                                                      PageArgs(size=10, cursor=cursor_pages[-1][-1].cursor),
+                                                      ESLoaders(es)))
+
+        assert [[a.gene for a in page] for page in cursor_pages[:-1]] == \
+            [[a.gene for a in page] for page in offset_pages]
+        assert all(body["sort"] == annotations_sort for index, body in es.searches)
+        # After the first page, cursor pages search_after on the index the cursor came from
+        assert all(index == es.index and "from" not in body for index, body in es.searches[4:])
+
+    @pytest.mark.asyncio
+    async def test_genes_in_one_search(self):
+        """Test genes come back with full sources, in sort order, from a single search"""
+        genes = [{"gene": f"UniProtKB:P{i}", "gene_symbol": symbol, "gene_name": symbol, "coordinates_chr_num": chr_num,
+                  "terms": [], "slim_terms": [], "term_count": 0}
+                 for i, (chr_num, symbol) in enumerate([("1", "TP73"), ("17", "BRCA1"), ("17", "TP53"), ("X", "AR")])]
+        es = GenesES("pango-2-genes-20250101120000", genes)
+
+        results = await get_genes("pango-2-genes", None, PageArgs(size=4), ESLoaders(es))
+
+        assert [gene.gene_symbol for gene in results] == ["TP73", "BRCA1", "TP53", "AR"]
+        assert len(es.searches) == 1
+        assert es.searches[0][1]["sort"] == genes_sort
+        assert es.searches[0][1]["_source"] is True
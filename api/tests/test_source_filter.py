@@ -0,0 +1,149 @@
+import pytest
+import os
+
+# Set up environment variables for testing
+os.environ.setdefault("DEBUG", "False")
+os.environ.setdefault("PANGO_ES_URL", "http://localhost:9200")
+os.environ.setdefault("PANGO_ANNOTATIONS_INDEX", "test_annotations")
+os.environ.setdefault("PANGO_GENES_INDEX", "test_genes")
+os.environ.setdefault("HOST_URL", "localhost")
+os.environ.setdefault("HOST_PORT", "8000")
+
+from src.app import schema
+from src.config.settings import ApiVersion
+from src.graphql.graphql_context import GraphQLContext
+from src.graphql.loaders import ESLoaders
+from src.utils import get_source_filter
+
+
+class SourceFilteringES:
+    """Applies the requested _source filter to one canned document, as Elasticsearch would"""
+
+    def __init__(self, source):
+        self.source = source
+        self.bodies = []
+
+    def filter_source(self, includes, source=None, prefix=''):
+        source = self.source if source is None else source
+        filtered = dict()
+        for key, value in source.items():
+            path = prefix + key
+            if path in includes:
+                filtered[key] = value
+            elif any(include.startswith(path + '.') for include in includes):
+                if isinstance(value, list):
+                    filtered[key] = [self.filter_source(includes, item, path + '.') for item in value]
+                else:
+                    filtered[key] = self.filter_source(includes, value, path + '.')
+        return filtered
+
+    def hit(self, source_filter):
+        hit = {"_index": "pango-2-test_annotations", "_id": "a1", "sort": [0], "found": True}
+        if source_filter is True:
+            hit["_source"] = self.source
+        elif source_filter:
+            hit["_source"] = self.filter_source(source_filter)
+        return hit
+
+    async def mget(self, docs):
+        self.bodies.extend(docs)
+        return {"docs": [self.hit(doc["_source"]) for doc in docs]}
+
+    async def msearch(self, searches):
+        bodies = searches[1::2]
+        self.bodies.extend(bodies)
+        return {"responses": [{"hits": {"hits": [self.hit(body["_source"])]}} for body in bodies]}
+
+
+def sample_annotation():
+    return {
+        "gene": "UniProtKB:P38398",
+        "gene_symbol": "BRCA1",
+        "gene_name": "Breast cancer type 1 susceptibility protein",
+        "term_type": "known",
+        "term": {"id": "GO:0006955", "label": "immune response", "aspect": "biological process"},
+        "slim_terms": [{"id": "GO:0002376", "label": "immune system process", "aspect": "biological process"}],
+        "evidence": [{
+            "with_gene_id": {"gene": "UniProtKB:P04637", "gene_symbol": "TP53"},
+            "references": [{"pmid": "PMID:1", "title": "A title", "authors": ["A. Author"], "date": "2001"}],
+        }],
+        "groups": ["GO_Central"],
+        "evidence_count": 1,
+    }
+
+
+async def execute(client, query):
+    context = GraphQLContext(version=ApiVersion.V2)
+    context.loaders = ESLoaders(client)
+    return await schema.execute(query, context_value=context)
+
+
+class TestSourceFilter:
+    """Test _source is limited to the fields the query selects"""
+
+    @pytest.mark.asyncio
+    async def test_top_level_fields(self):
+        """Test only selected fields are fetched, and id and cursor come from the hit"""
+        client = SourceFilteringES(sample_annotation())
+
+        result = await execute(client, "query { annotations { id cursor geneSymbol } }")
+
+        assert result.errors is None
+        assert result.data["annotations"][0]["geneSymbol"] == "BRCA1"
+        assert client.bodies[0]["_source"] == ["gene_symbol"]
+
+    @pytest.mark.asyncio
+    async def test_nested_fields(self):
+        """Test nested selections become dotted paths, with the fields their models need"""
+        client = SourceFilteringES(sample_annotation())
+        query = """
+        query {
+            annotation(id: "a1") {
+                term { displayId }
+                evidence { withGeneId { geneSymbol } references { pmid } }
+            }
+        }
+        """
+
+        result = await execute(client, query)
+
+        assert result.errors is None
+        assert result.data["annotation"]["term"] == {"displayId": "GO:0006955"}
+        assert result.data["annotation"]["evidence"][0]["references"] == [{"pmid": "PMID:1"}]
+        assert client.bodies[0]["_source"] == [
+            "evidence.references.authors", "evidence.references.date", "evidence.references.pmid",
+            "evidence.references.title", "evidence.with_gene_id.gene_symbol", "term.id"]
+
+    @pytest.mark.asyncio
+    async def test_fragments(self):
+        """Test fields selected through named and inline fragments are fetched"""
+        client = SourceFilteringES(sample_annotation())
+        query = """
+        query {
+            annotations { ...Names ... on Annotation { slimTerms { label } } }
+        }
+        fragment Names on Annotation { geneSymbol geneName }
+        """
+
+        result = await execute(client, query)
+
+        assert result.errors is None
+        assert result.data["annotations"][0]["slimTerms"] == [{"label": "immune system process"}]
+        assert client.bodies[0]["_source"] == ["gene_name", "gene_symbol", "slim_terms.id", "slim_terms.label"]
+
+    @pytest.mark.asyncio
+    async def test_only_hit_fields(self):
+        """Test no _source is fetched when only id and cursor are selected"""
+        client = SourceFilteringES(sample_annotation())
+
+        result = await execute(client, "query { annotations { id cursor } }")
+
+        assert result.errors is None
+        assert result.data["annotations"][0]["id"] == "a1"
+        assert client.bodies[0]["_source"] is False
+
+    def test_source_filter_default(self):
+        """Test resolvers called outside a query fetch the whole document"""
+        assert get_source_filter(None) is True
+        assert get_source_filter([]) is False
+        assert get_source_filter(["gene"]) == ["gene"]
@@ -2,6 +2,7 @@
 
 import argparse
 import json
+from json_writer import write_json
 
 
 parser = argparse.ArgumentParser()
@@ -77,7 +78,4 @@ if __name__ == "__main__":
 
     annotated_panther_slim = annotated_panther_slim + other_terms + unknown_terms
 
-    if args.debug_indent != 0:
-        print(json.dumps(annotated_panther_slim, indent=args.debug_indent))
-    else:
-        print(json.dumps(annotated_panther_slim, separators=(',', ':')))
+    write_json(annotated_panther_slim, debug_indent=args.debug_indent)
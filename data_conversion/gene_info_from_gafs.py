@@ -4,6 +4,7 @@ import argparse
 import json
 import csv
 from typing import List
+from json_writer import write_json
 
 
 parser = argparse.ArgumentParser()
@@ -154,10 +155,7 @@ class GeneInfoCollection:
         return gene_infos
 
     def print_genes_to_json(self, debug_indent: int = 0):
-        if debug_indent != 0:
-            print(json.dumps(self.gene_info_list(), indent=debug_indent))
-        else:
-            print(json.dumps(self.gene_info_list(), separators=(',', ':')))
+        write_json(self.gene_info_list(), debug_indent=debug_indent)
 
 
 if __name__ == "__main__":
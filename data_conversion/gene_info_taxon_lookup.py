@@ -1,6 +1,7 @@
 import argparse
 import json
 import csv
+from json_writer import write_json
 
 
 parser = argparse.ArgumentParser()
@@ -37,7 +38,4 @@ if __name__ == "__main__":
                 }
                 taxon_objs.append(taxon_obj)
 
-    if args.debug_indent != 0:
-        print(json.dumps(taxon_objs, indent=args.debug_indent))
-    else:
-        print(json.dumps(taxon_objs, separators=(',', ':')))
+    write_json(taxon_objs, debug_indent=args.debug_indent)
@@ -2,8 +2,15 @@
 
 import argparse
 import csv
-import json
-from typing import List
+import heapq
+import sys
+import zlib
+from multiprocessing import Pool
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+from json_writer import JsonArrayWriter, stdout_binary, write_json
 
 
 parser = argparse.ArgumentParser()
@@ -23,6 +30,14 @@ parser.add_argument('-p', '--gene_dat', help="If supplied, all PANTHER genes wil
 parser.add_argument('-c', '--genome_coordinates_file', help="If supplied, will be added to gene info. Typically, "
                                                             "a file named Homo_sapiens.chromosomal_location")
 parser.add_argument('-d', '--debug_indent', type=int, default=0)
+parser.add_argument('--stream', action='store_const', const=True, help="Write each gene's annotations as soon as the "
+                                                                       "next gene starts. Requires annot_files sorted by "
+                                                                       "gene (LC_ALL=C sort -t$'\\t' -k1,1 -k2,2)")
+parser.add_argument('-j', '--workers', type=int, default=1, help="Parse annot_files with this many processes, "
+                                                                 "each handling a hash partition of genes. Output is "
+                                                                 "identical to the single-process run")
+parser.add_argument('--ndjson', action='store_const', const=True, help="With --stream, write one annotation per line "
+                                                                       "instead of a JSON array")
 
 
 class OntologyManager:
@@ -38,6 +53,9 @@ class OntologyManager:
     }
 
     def __init__(self, goslim_term_list: str, ontology: str, go_aspects: str):
+        # Kept so worker processes can build their own manager
+        self.source_files = (goslim_term_list, ontology, go_aspects)
+
         self.goslim_terms = set()
         with open(goslim_term_list) as gtl:
             for l in gtl.readlines():
@@ -60,45 +78,95 @@ class OntologyManager:
                 aspect = r[1]
                 self.go_aspects[term] = aspect
 
+        # Terms in topological order (every parent before its children) and each term's position in that order
+        self.sorted_terms = self.topological_sort(self.go_parents)
+        self.term_index = {term: idx for idx, term in enumerate(self.sorted_terms)}
+        # Transitive closure: sorted array of ancestor term indexes per term index
+        self.ancestor_index = self.build_ancestor_index()
+        # Memoized per GO term across all genes
+        self.slim_term_lkp = {}
+        self.generalized_term_lkp = {}
+
+    @staticmethod
+    def topological_sort(go_parents: Dict[str, Set[str]]) -> List[str]:
+        # Kahn's algorithm over parent->child edges. Sorted seeding keeps the order stable across runs.
+        go_children = {}
+        parent_counts = {}
+        for child, parents in go_parents.items():
+            parent_counts[child] = len(parents)
+            for parent in parents:
+                go_children.setdefault(parent, []).append(child)
+                parent_counts.setdefault(parent, 0)
+        ready = deque(sorted(term for term, count in parent_counts.items() if count == 0))
+        sorted_terms = []
+        while ready:
+            term = ready.popleft()
+            sorted_terms.append(term)
+            for child in sorted(go_children.get(term, [])):
+                parent_counts[child] -= 1
+                if parent_counts[child] == 0:
+                    ready.append(child)
+        if len(sorted_terms) != len(parent_counts):
+            raise ValueError("Ontology contains a cycle; cannot build ancestor closure")
+        return sorted_terms
+
+    def build_ancestor_index(self) -> List[array]:
+        ancestor_index = []
+        for term in self.sorted_terms:
+            ancestors = set()
+            for parent in self.go_parents.get(term, ()):
+                parent_idx = self.term_index[parent]
+                ancestors.add(parent_idx)
+                ancestors.update(ancestor_index[parent_idx])
+            ancestor_index.append(array('I', sorted(ancestors)))
+        return ancestor_index
+
     def is_ancestor_of(self, term_a, term_b):
         # Determine whether term_a is_ancestor_of term_b
         # Returns None if False
-        if term_b in self.go_parents:
-            for parent in self.go_parents[term_b]:
-                if parent == term_a or self.is_ancestor_of(term_a, parent):
-                    return True
+        if term_a not in self.term_index or term_b not in self.term_index:
+            return None
+        ancestors = self.ancestor_index[self.term_index[term_b]]
+        term_a_idx = self.term_index[term_a]
+        pos = bisect_left(ancestors, term_a_idx)
+        if pos < len(ancestors) and ancestors[pos] == term_a_idx:
+            return True
 
     def generalize_term(self, goterm: str):
-        inferred_terms = self.infer_slim_terms(goterm)
-        # return inferred_terms
-    
-        nonredundant_generalized_terms = []
-        for t1 in inferred_terms:
-            t1_is_redundant = False
-            for t2 in inferred_terms:
-                if self.is_ancestor_of(t1, t2):
-                    t1_is_redundant = True
-                    break
-            if not t1_is_redundant:
-                nonredundant_generalized_terms.append(t1)
-        return nonredundant_generalized_terms
-
-    def infer_slim_terms(self, goterm: str, new_terms: List = None):
-        # Roll up annotated term to goslim_generic
-        if new_terms is None:
-            new_terms = []
-        if goterm not in self.goslim_terms:
-            if goterm not in self.go_parents:
-                return []
+        if goterm not in self.generalized_term_lkp:
+            inferred_terms = self.infer_slim_terms(goterm)
+            nonredundant_generalized_terms = []
+            for t1 in inferred_terms:
+                t1_is_redundant = False
+                for t2 in inferred_terms:
+                    if self.is_ancestor_of(t1, t2):
+                        t1_is_redundant = True
+                        break
+                if not t1_is_redundant:
+                    nonredundant_generalized_terms.append(t1)
+            self.generalized_term_lkp[goterm] = tuple(nonredundant_generalized_terms)
+        return list(self.generalized_term_lkp[goterm])
+
+    def infer_slim_terms(self, goterm: str):
+        # Roll up annotated term to goslim_generic, stopping at the first slim term on each same-aspect path
+        return sorted(self.slim_term_set(goterm))
+
+    def slim_term_set(self, goterm: str) -> FrozenSet[str]:
+        if goterm in self.slim_term_lkp:
+            return self.slim_term_lkp[goterm]
+        if goterm in self.goslim_terms:
+            slim_terms = frozenset([goterm])
+        elif goterm not in self.go_parents:
+            slim_terms = frozenset()
+        else:
+            new_terms = set()
             for parent_term in self.go_parents[goterm]:
                 if self.go_aspects[parent_term] != self.go_aspects[goterm]:
                     continue
-                for new_term in self.infer_slim_terms(parent_term, new_terms):
-                    if new_term not in new_terms:
-                        new_terms.append(new_term)
-            return new_terms
-        else:
-            return [goterm]
+                new_terms.update(self.slim_term_set(parent_term))
+            slim_terms = frozenset(new_terms)
+        self.slim_term_lkp[goterm] = slim_terms
+        return slim_terms
 
     def other_term(self, goterm: str):
         return self.OTHER_TERMS[self.go_aspects[goterm]]
@@ -107,16 +175,103 @@ class OntologyManager:
         return self.UNKNOWN_TERMS[self.go_aspects[goterm]]
 
 
+class SlotRecord:
+    # Dict-style access over __slots__ so compact records can stand in for the per-annotation dicts.
+    # Unassigned slots behave like missing keys.
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and hasattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__ if hasattr(self, key)}
+
+
+class AnnotationRecord(SlotRecord):
+    __slots__ = ("gene", "gene_symbol", "gene_name", "term", "slim_terms", "qualifier", "evidence", "group",
+                 "evidence_type")
+
+
+class GeneInfoRecord(SlotRecord):
+    __slots__ = ("gene_symbol", "gene_name", "taxon_id", "coordinates_chr_num", "coordinates_start",
+                 "coordinates_end", "coordinates_strand")
+
+
+class EvidenceAccumulator:
+    # De-duplicated evidence for one annotation, stored as (with_gene_id, references, groups) tuples. Direct
+    # evidence (with_gene_id is the annotated gene) is listed first, most recent first, followed by homology
+    # evidence in arrival order; same order as inserting at 0. The evidence dicts are built once, on first
+    # read after an add.
+    __slots__ = ("evidence_keys", "direct_evidence", "homology_evidence", "evidence_list")
+
+    def __init__(self):
+        self.evidence_keys = set()
+        self.direct_evidence = []
+        self.homology_evidence = []
+        self.evidence_list = None
+
+    def add(self, with_gene_id: str, references: Tuple, groups: Tuple, is_direct: bool):
+        # Returns False if equal evidence was already added
+        ev_key = (with_gene_id, references, groups)
+        if ev_key in self.evidence_keys:
+            return False
+        self.evidence_keys.add(ev_key)
+        self.evidence_list = None
+        if is_direct:
+            self.direct_evidence.append(ev_key)
+        else:
+            self.homology_evidence.append(ev_key)
+        return True
+
+    def to_list(self):
+        if self.evidence_list is None:
+            self.evidence_list = [
+                {
+                    "with_gene_id": with_gene_id,
+                    "references": list(references),
+                    "groups": list(groups)
+                }
+                for with_gene_id, references, groups in self.direct_evidence[::-1] + self.homology_evidence
+            ]
+        return self.evidence_list
+
+    def __getitem__(self, index):
+        return self.to_list()[index]
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __len__(self):
+        return len(self.direct_evidence) + len(self.homology_evidence)
+
+
 class IbaExpRefCollection:
     def __init__(self, ontology_manager: OntologyManager, debug_indent: int = 0):
-        self.annotation_lkp = {}  # Goes Gene->Term->Qualifiers
-        self.gene_info_lkp = {}
+        self.annotation_lkp = {}  # Goes Gene->Term->Qualifiers->AnnotationRecord
+        self.gene_info_lkp = {}  # Gene->GeneInfoRecord
+        self.tuple_pool = {}  # Shared instances of repeated slim term, reference and group tuples
         self.ontology_manager = ontology_manager
         self.debug_indent = debug_indent
 
+    def intern_tuple(self, values: Iterable[str]):
+        values = tuple(sys.intern(v) for v in values)
+        return self.tuple_pool.setdefault(values, values)
+
     def update_annot_from_row(self, csv_row: List):
-        gene_id = "{}:{}".format(csv_row[0], csv_row[1])
-        go_term = csv_row[4]
+        gene_id = sys.intern("{}:{}".format(csv_row[0], csv_row[1]))
+        go_term = sys.intern(csv_row[4])
         qualifier = csv_row[3]  # Currently treating as only one
         if "NOT" in qualifier:
             # Completely skip processing these rows
@@ -138,9 +293,9 @@ class IbaExpRefCollection:
             gene_name = csv_row[9]
             gene_taxon = csv_row[12]
             self.add_gene_info_to_lkp(gene_id, gene_symbol, gene_name, gene_taxon)
-            group = csv_row[14]
+            group = sys.intern(csv_row[14])
             new_annot = self.create_annotation_for_gene(gene_id, gene_symbol, gene_name, go_term)
-            new_annot["slim_terms"] = slim_terms
+            new_annot["slim_terms"] = self.intern_tuple(slim_terms)
             new_annot["qualifier"] = qualifier_val
             new_annot["group"] = group
             new_annot["evidence_type"] = "homology"
@@ -152,11 +307,11 @@ class IbaExpRefCollection:
     def add_gene_info_to_lkp(self, gene_id, gene_sym, gene_name, taxon_id):
         if "taxon:" in taxon_id:
             taxon_id = taxon_id.split(":", maxsplit=1)[1]
-        self.gene_info_lkp[gene_id] = {
-            "gene_symbol": gene_sym,
-            "gene_name": gene_name,
-            "taxon_id": taxon_id,
-        }
+        gene_info = GeneInfoRecord()
+        gene_info.gene_symbol = sys.intern(gene_sym)
+        gene_info.gene_name = sys.intern(gene_name)
+        gene_info.taxon_id = sys.intern(taxon_id)
+        self.gene_info_lkp[sys.intern(gene_id)] = gene_info
 
     def parse_exp_gene_and_refs_from_row(self, csv_row: List):
         with_from_raw = csv_row[7]
@@ -179,39 +334,44 @@ class IbaExpRefCollection:
 
     def merge_exp_evidence(self, gene_id: str, go_term: str, qualifier: str, csv_row: List):
         with_gene_id, exp_pmids, exp_groups = self.parse_exp_gene_and_refs_from_row(csv_row)
-        ev_obj = {
-            "with_gene_id": with_gene_id,
-            "references": exp_pmids,
-            "groups": exp_groups
-        }
         evidence = self.annotation_lkp[gene_id][go_term][qualifier]["evidence"]  # Assumes everything exists
         if with_gene_id is None:
             # Likely not an IBA, so just stuff gene_id in with_gene so UI ties it with reference
             with_gene_id = gene_id
-            ev_obj["with_gene_id"] = gene_id
-        if ev_obj not in evidence:
-            if with_gene_id == gene_id:
-                evidence.insert(0, ev_obj)
-                self.annotation_lkp[gene_id][go_term][qualifier]["evidence_type"] = "direct"
-            else:
-                evidence.append(ev_obj)
-        self.annotation_lkp[gene_id][go_term][qualifier]["evidence"] = evidence
+        is_direct = with_gene_id == gene_id
+        if evidence.add(sys.intern(with_gene_id), self.intern_tuple(exp_pmids), self.intern_tuple(exp_groups),
+                        is_direct) and is_direct:
+            self.annotation_lkp[gene_id][go_term][qualifier]["evidence_type"] = "direct"
 
     def annotation_list(self):
         annotations = []
         for gene in self.annotation_lkp:
-            for term in self.annotation_lkp[gene]:
-                for quals, annot in self.annotation_lkp[gene][term].items():
-                    if "NOT" in quals:
-                        # Do not include negative annotations
-                        continue
-                    modified_annot = annot.copy()
-                    # Remove symbol and name from annots to prevent conflict with gene_info
-                    modified_annot.pop("gene_symbol", None)
-                    modified_annot.pop("gene_name", None)
-                    # Also remove qualifier since we no longer really care
-                    modified_annot.pop("qualifier", None)
-                    annotations.append(modified_annot)
+            annotations.extend(self.gene_annotation_list(gene))
+        return annotations
+
+    def gene_annotation_list(self, gene_id):
+        annotations = []
+        for term in self.annotation_lkp.get(gene_id, {}):
+            for quals, annot in self.annotation_lkp[gene_id][term].items():
+                if "NOT" in quals:
+                    # Do not include negative annotations
+                    continue
+                modified_annot = annot.to_dict()
+                modified_annot["slim_terms"] = list(annot["slim_terms"])
+                modified_annot["evidence"] = annot["evidence"].to_list()
+                # Remove symbol and name from annots to prevent conflict with gene_info
+                modified_annot.pop("gene_symbol", None)
+                modified_annot.pop("gene_name", None)
+                # Also remove qualifier since we no longer really care
+                modified_annot.pop("qualifier", None)
+                annotations.append(modified_annot)
+        return annotations
+
+    def pop_gene_annotations(self, gene_id):
+        # Hand back a finished gene's annotations and drop it (and collected gene info) from memory
+        annotations = self.gene_annotation_list(gene_id)
+        self.annotation_lkp.pop(gene_id, None)
+        self.gene_info_lkp.clear()
         return annotations
 
     def gene_info_list(self):
@@ -230,33 +390,31 @@ class IbaExpRefCollection:
             gene_infos.append(gene_info_record)
         return gene_infos
 
-    def json_dumps(self, obj):
-        if self.debug_indent != 0:
-            return json.dumps(obj, indent=self.debug_indent)
-        else:
-            return json.dumps(obj, separators=(',', ':'))
-
     def print_annotations_to_json(self):
-        print(self.json_dumps(self.annotation_list()))
+        write_json(self.annotation_list(), debug_indent=self.debug_indent)
 
     def print_genes_to_json(self):
-        print(self.json_dumps(self.gene_info_list()))
+        write_json(self.gene_info_list(), debug_indent=self.debug_indent)
 
     def create_annotation_for_gene(self, gene_id, gene_symbol, gene_name, term):
-        new_annot = {
-            "gene": gene_id,
-            "gene_symbol": gene_symbol,
-            "gene_name": gene_name,
-            "term": term,
-            "slim_terms": [],
-            "qualifier": None,
-            "evidence": [],  # Will be handled later
-            "group": None,
-        }
+        new_annot = AnnotationRecord()
+        new_annot.gene = sys.intern(gene_id)
+        new_annot.gene_symbol = sys.intern(gene_symbol)
+        new_annot.gene_name = sys.intern(gene_name)
+        new_annot.term = sys.intern(term)
+        new_annot.slim_terms = ()
+        new_annot.qualifier = None
+        new_annot.evidence = EvidenceAccumulator()  # Will be handled later
+        new_annot.group = None
         return new_annot
 
     def fill_in_missing_annotations(self, gene_dat):
         # Iterate through gene_dat, attempt fetching term for each aspect, if blank add UNKNOWN term
+        for gene_id, gene_symbol, gene_name in self.read_human_gene_dat(gene_dat):
+            self.fill_in_missing_annotations_for_gene(gene_id, gene_symbol, gene_name)
+
+    @staticmethod
+    def read_human_gene_dat(gene_dat):
         with open(gene_dat) as gf:
             reader = csv.reader(gf, delimiter="\t")
             for r in reader:
@@ -270,24 +428,27 @@ class IbaExpRefCollection:
                 if gene_symbol == "":
                     # Duplicating symbol filling logic from createGAF.pl
                     gene_symbol = gene_id.split(":", maxsplit=1)[1]
-                if gene_id not in self.annotation_lkp:
-                    self.annotation_lkp[gene_id] = {}
-                has_aspect = {"molecular_function": False, "biological_process": False, "cellular_component": False}
-                for term in self.annotation_lkp[gene_id]:
-                    # get aspect of term
-                    term_aspect = self.ontology_manager.go_aspects[term]
-                    has_aspect[term_aspect] = True
-                    # Sometimes gene symbol not in gene.dat but is in GAF. Ex: UniProtKB:A0A1W2PRP0
-                    # Fetch from existing GAF-sourced annots.
-                    gene_symbol = self.scavenge_annots_for_any_nonblank_gene_symbol(gene_id)
-                for aspect, result in has_aspect.items():
-                    if not result:
-                        unknown_aspect_term = self.ontology_manager.UNKNOWN_TERMS[aspect]
-                        new_annot = self.create_annotation_for_gene(gene_id, gene_symbol, gene_name, unknown_aspect_term)
-                        new_annot["slim_terms"] = [unknown_aspect_term]
-                        new_annot["group"] = "GO_Central"
-                        new_annot["evidence_type"] = "n/a"
-                        self.annotation_lkp[gene_id][unknown_aspect_term] = {"": new_annot}
+                yield gene_id, gene_symbol, gene_name
+
+    def fill_in_missing_annotations_for_gene(self, gene_id, gene_symbol, gene_name):
+        if gene_id not in self.annotation_lkp:
+            self.annotation_lkp[gene_id] = {}
+        has_aspect = {"molecular_function": False, "biological_process": False, "cellular_component": False}
+        for term in self.annotation_lkp[gene_id]:
+            # get aspect of term
+            term_aspect = self.ontology_manager.go_aspects[term]
+            has_aspect[term_aspect] = True
+            # Sometimes gene symbol not in gene.dat but is in GAF. Ex: UniProtKB:A0A1W2PRP0
+            # Fetch from existing GAF-sourced annots.
+            gene_symbol = self.scavenge_annots_for_any_nonblank_gene_symbol(gene_id)
+        for aspect, result in has_aspect.items():
+            if not result:
+                unknown_aspect_term = self.ontology_manager.UNKNOWN_TERMS[aspect]
+                new_annot = self.create_annotation_for_gene(gene_id, gene_symbol, gene_name, unknown_aspect_term)
+                new_annot["slim_terms"] = self.intern_tuple([unknown_aspect_term])
+                new_annot["group"] = "GO_Central"
+                new_annot["evidence_type"] = "n/a"
+                self.annotation_lkp[gene_id][unknown_aspect_term] = {"": new_annot}
 
     def scavenge_annots_for_any_nonblank_gene_symbol(self, gene_id):
         new_gene_symbol = ""
@@ -316,6 +477,54 @@ class IbaExpRefCollection:
                     self.gene_info_lkp[gene_id]["coordinates_strand"] = strand
 
 
+class IbaExpRefShard(IbaExpRefCollection):
+    # Partition of an IbaExpRefCollection holding the genes of one hash bucket. Records the position of
+    # every write so shards can be merged back into exactly the order a serial parse would produce.
+    def __init__(self, ontology_manager: OntologyManager, debug_indent: int = 0):
+        super().__init__(ontology_manager, debug_indent)
+        self.row_seq = None
+        self.row_write_count = 0
+        self.gene_first_seq = {}  # gene -> seq of the row creating its annotation_lkp entry
+        self.gene_info_seq = {}  # gene -> (seq of first write, seq of last write)
+
+    def update_annot_from_row_at(self, row_seq: Tuple[int, int], csv_row: List):
+        self.row_seq = row_seq
+        self.row_write_count = 0
+        gene_id = "{}:{}".format(csv_row[0], csv_row[1])
+        is_new_gene = gene_id not in self.annotation_lkp
+        self.update_annot_from_row(csv_row)
+        if is_new_gene and gene_id in self.annotation_lkp:
+            self.gene_first_seq[gene_id] = row_seq
+
+    def add_gene_info_to_lkp(self, gene_id, gene_sym, gene_name, taxon_id):
+        super().add_gene_info_to_lkp(gene_id, gene_sym, gene_name, taxon_id)
+        write_seq = self.row_seq + (self.row_write_count,)
+        self.row_write_count += 1
+        first_seq = self.gene_info_seq[gene_id][0] if gene_id in self.gene_info_seq else write_seq
+        self.gene_info_seq[gene_id] = (first_seq, write_seq)
+
+    @staticmethod
+    def merge(shards: List["IbaExpRefShard"], ontology_manager: OntologyManager, debug_indent: int = 0):
+        collection = IbaExpRefCollection(ontology_manager, debug_indent)
+        # A gene's annotations only ever live in one shard; order genes by where the serial parse first saw them
+        gene_shards = sorted((seq, gene, shard) for shard in shards for gene, seq in shard.gene_first_seq.items()
+                             if gene in shard.annotation_lkp)
+        for seq, gene, shard in gene_shards:
+            collection.annotation_lkp[gene] = shard.annotation_lkp[gene]
+        # Gene info may be written from any shard (evidence genes); keep first-write order and last-write value
+        first_seqs = {}
+        last_writes = {}
+        for shard in shards:
+            for gene, (first_seq, last_seq) in shard.gene_info_seq.items():
+                if gene not in first_seqs or first_seq < first_seqs[gene]:
+                    first_seqs[gene] = first_seq
+                if gene not in last_writes or last_seq > last_writes[gene][0]:
+                    last_writes[gene] = (last_seq, shard.gene_info_lkp[gene])
+        for gene in sorted(first_seqs, key=first_seqs.get):
+            collection.gene_info_lkp[gene] = last_writes[gene][1]
+        return collection
+
+
 class IbaExpRefManager:
     @staticmethod
     def parse(iba_files, ontology_manager: OntologyManager, debug_indent: int = 0):
@@ -323,28 +532,129 @@ class IbaExpRefManager:
         if not isinstance(iba_files, List):
             iba_files = [iba_files]
         for iba_file in iba_files:
+            for r in IbaExpRefManager.read_gaf_rows(iba_file):
+                new_collection.update_annot_from_row(r)
+        return new_collection
+
+    @staticmethod
+    def parse_parallel(iba_files, ontology_manager: OntologyManager, workers: int, debug_indent: int = 0):
+        # Byte-identical to parse(): genes are hash-partitioned over worker processes and the shards merged
+        if not isinstance(iba_files, List):
+            iba_files = [iba_files]
+        shard_args = [(iba_files, ontology_manager.source_files, shard_idx, workers) for shard_idx in range(workers)]
+        with Pool(processes=workers) as pool:
+            shards = pool.starmap(IbaExpRefManager.parse_shard, shard_args)
+        return IbaExpRefShard.merge(shards, ontology_manager, debug_indent)
+
+    @staticmethod
+    def parse_shard(iba_files: List[str], ontology_files: Tuple[str, str, str], shard_idx: int, shard_count: int):
+        shard = IbaExpRefShard(OntologyManager(*ontology_files))
+        for row_seq, r in IbaExpRefManager.read_shard_rows(iba_files, shard_idx, shard_count):
+            shard.update_annot_from_row_at(row_seq, r)
+        # Memoized ontology lookups stay in the worker
+        shard.ontology_manager = None
+        return shard
+
+    @staticmethod
+    def read_shard_rows(iba_files: List[str], shard_idx: int, shard_count: int):
+        # Only rows of genes in this shard are CSV-parsed; the key split is cheap enough to do in every worker
+        for file_idx, iba_file in enumerate(iba_files):
             with open(iba_file) as af:
-                reader = csv.reader(af, delimiter="\t")
-                for r in reader:
-                    if r[0].startswith("!"):
+                for line_idx, line in enumerate(af):
+                    if line.startswith("!"):
                         continue
-                    new_collection.update_annot_from_row(r)
-        return new_collection
+                    fields = line.split("\t", 2)
+                    gene_id = "{}:{}".format(fields[0], fields[1])
+                    if IbaExpRefManager.gene_shard(gene_id, shard_count) != shard_idx:
+                        continue
+                    yield (file_idx, line_idx), next(csv.reader([line], delimiter="\t"))
+
+    @staticmethod
+    def gene_shard(gene_id: str, shard_count: int):
+        # crc32 rather than hash() so every process agrees regardless of PYTHONHASHSEED
+        return zlib.crc32(gene_id.encode("utf-8")) % shard_count
+
+    @staticmethod
+    def read_gaf_rows(iba_file):
+        with open(iba_file) as af:
+            reader = csv.reader(af, delimiter="\t")
+            for r in reader:
+                if r[0].startswith("!"):
+                    continue
+                yield r
+
+    @staticmethod
+    def gene_sort_key(csv_row: List):
+        return csv_row[0], csv_row[1]
+
+    @staticmethod
+    def stream(iba_files, ontology_manager: OntologyManager, writer: JsonArrayWriter, gene_dat: str = None):
+        # Same output as parse() + fill_in_missing_annotations(), but only one gene is held in memory at a time.
+        # Each file must be sorted by gene; files are merged so a gene may appear in several of them.
+        collection = IbaExpRefCollection(ontology_manager)
+        if not isinstance(iba_files, List):
+            iba_files = [iba_files]
+        gene_dat_lkp = {}
+        if gene_dat:
+            for gene_id, gene_symbol, gene_name in IbaExpRefCollection.read_human_gene_dat(gene_dat):
+                if gene_id not in gene_dat_lkp:
+                    gene_dat_lkp[gene_id] = (gene_symbol, gene_name)
+
+        def flush_gene(gene_id):
+            if gene_id in gene_dat_lkp:
+                collection.fill_in_missing_annotations_for_gene(gene_id, *gene_dat_lkp.pop(gene_id))
+            writer.write(collection.pop_gene_annotations(gene_id))
+
+        rows = heapq.merge(*[IbaExpRefManager.read_gaf_rows(f) for f in iba_files],
+                           key=IbaExpRefManager.gene_sort_key)
+        current_gene_id = None
+        previous_key = None
+        for r in rows:
+            row_key = IbaExpRefManager.gene_sort_key(r)
+            if previous_key is not None and row_key < previous_key:
+                raise ValueError("Annotation files are not sorted by gene: {} found after {}".format(
+                    ":".join(row_key), ":".join(previous_key)))
+            previous_key = row_key
+            gene_id = "{}:{}".format(r[0], r[1])
+            if gene_id != current_gene_id:
+                if current_gene_id is not None:
+                    flush_gene(current_gene_id)
+                current_gene_id = gene_id
+            collection.update_annot_from_row(r)
+        if current_gene_id is not None:
+            flush_gene(current_gene_id)
+        # Genes in gene_dat without any annotation, in gene_dat order
+        for gene_id in list(gene_dat_lkp):
+            flush_gene(gene_id)
 
 
 if __name__ == "__main__":
     args = parser.parse_args()
+    if args.stream and args.gene_info_only:
+        parser.error("--stream only applies to annotation output, not --gene_info_only")
+    if args.ndjson and not args.stream:
+        parser.error("--ndjson requires --stream")
+    if args.stream and args.workers > 1:
+        parser.error("--workers cannot be combined with --stream")
 
     ont_manager = OntologyManager(args.goslim_term_list,
                                   args.ontology,
                                   args.go_aspects)
-    iba_exp_ref_collection = IbaExpRefManager.parse(args.annot_files, ont_manager, args.debug_indent)
-    if args.gene_dat:
-        iba_exp_ref_collection.fill_in_missing_annotations(args.gene_dat)
-    if args.genome_coordinates_file:
-        iba_exp_ref_collection.fill_in_genome_coordinates(args.genome_coordinates_file)
-
-    if args.gene_info_only:
-        iba_exp_ref_collection.print_genes_to_json()
+    if args.stream:
+        with JsonArrayWriter(stdout_binary(), args.debug_indent, args.ndjson) as json_writer:
+            IbaExpRefManager.stream(args.annot_files, ont_manager, json_writer, args.gene_dat)
     else:
-        iba_exp_ref_collection.print_annotations_to_json()
+        if args.workers > 1:
+            iba_exp_ref_collection = IbaExpRefManager.parse_parallel(args.annot_files, ont_manager, args.workers,
+                                                                     args.debug_indent)
+        else:
+            iba_exp_ref_collection = IbaExpRefManager.parse(args.annot_files, ont_manager, args.debug_indent)
+        if args.gene_dat:
+            iba_exp_ref_collection.fill_in_missing_annotations(args.gene_dat)
+        if args.genome_coordinates_file:
+            iba_exp_ref_collection.fill_in_genome_coordinates(args.genome_coordinates_file)
+
+        if args.gene_info_only:
+            iba_exp_ref_collection.print_genes_to_json()
+        else:
+            iba_exp_ref_collection.print_annotations_to_json()
@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from json_writer import BACKEND_LOADERS, JsonArrayWriter, available_backends, load_backend
+
+
+parser = argparse.ArgumentParser(description="Compare throughput and peak RSS of writing data_conversion JSON "
+                                             "outputs with print(json.dumps(...)) and with each json_writer backend")
+parser.add_argument('-i', '--input_json', nargs='*', help="JSON array files to re-serialize, e.g. "
+                                                         "human_iba_annotations.json human_iba_gene_info.json")
+parser.add_argument('-x', '--scale', type=int, default=1, help="Repeat the records this many times, to approximate "
+                                                                "a larger release from sample files")
+parser.add_argument('-r', '--repeats', type=int, default=3, help="Runs per method; the fastest is reported")
+parser.add_argument('--method', help=argparse.SUPPRESS)
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_method(method: str, input_json: str, scale: int):
+    # Runs in its own process so peak RSS is not inflated by earlier methods
+    with open(input_json) as jf:
+        records = json.load(jf) * scale
+    rss_before = peak_rss_kb()
+    start = time.perf_counter()
+    with open(os.devnull, "wb") as out_file:
+        if method == "json.dumps":
+            out_file.write((json.dumps(records, separators=(',', ':')) + "\n").encode())
+        else:
+            with JsonArrayWriter(out_file, backend=load_backend(method)) as writer:
+                writer.write(records)
+    seconds = time.perf_counter() - start
+    return {
+        "records": len(records),
+        "seconds": seconds,
+        "peak_rss_kb": peak_rss_kb(),
+        "rss_growth_kb": peak_rss_kb() - rss_before,
+    }
+
+
+def benchmark(method: str, input_json: str, scale: int, repeats: int):
+    results = []
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, __file__, "--method", method, "-i", input_json, "-x", str(scale)],
+                              capture_output=True, text=True, check=True)
+        results.append(json.loads(proc.stdout))
+    return min(results, key=lambda r: r["seconds"])
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.method:
+        print(json.dumps(run_method(args.method, args.input_json[0], args.scale)))
+        sys.exit()
+
+    methods = ["json.dumps"] + [backend.name for backend in available_backends()]
+    for backend_name in BACKEND_LOADERS:
+        if backend_name not in methods:
+            print("{} is not installed, skipping".format(backend_name), file=sys.stderr)
+
+    print("\t".join(["file", "method", "records", "seconds", "records_per_sec", "peak_rss_mb", "rss_growth_mb"]))
+    for input_json in args.input_json:
+        for method in methods:
+            result = benchmark(method, input_json, args.scale, args.repeats)
+            print("\t".join([
+                os.path.basename(input_json),
+                method if method == "json.dumps" else "stream:" + method,
+                str(result["records"]),
+                "{:.3f}".format(result["seconds"]),
+                "{:.0f}".format(result["records"] / result["seconds"]),
+                "{:.1f}".format(result["peak_rss_kb"] / 1024),
+                "{:.1f}".format(result["rss_growth_kb"] / 1024),
+            ]))
@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+
+import json
+import os
+import sys
+from typing import BinaryIO, Callable, Iterable
+
+
+# Override the backend choice, e.g. DATA_CONVERSION_JSON_BACKEND=json to force the stdlib encoder
+BACKEND_ENV_VAR = "DATA_CONVERSION_JSON_BACKEND"
+DEFAULT_CHUNK_SIZE = 1 << 20
+# Records encoded per backend call when writing a compact array
+DEFAULT_BATCH_SIZE = 1000
+STDLIB_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+
+def stdlib_dumps(obj) -> bytes:
+    return STDLIB_ENCODER.encode(obj).encode()
+
+
+def load_orjson():
+    import orjson
+    return orjson.dumps
+
+
+def load_msgspec():
+    import msgspec
+    return msgspec.json.Encoder().encode
+
+
+def load_stdlib():
+    return stdlib_dumps
+
+
+# In order of preference
+BACKEND_LOADERS = {
+    "orjson": load_orjson,
+    "msgspec": load_msgspec,
+    "json": load_stdlib,
+}
+
+
+class JsonBackend:
+    def __init__(self, name: str, encode: Callable[[object], bytes]):
+        self.name = name
+        self.encode = encode
+
+    def dumps(self, obj) -> bytes:
+        # Compact JSON, byte-identical to json.dumps(obj, separators=(',', ':'))
+        encoded = self.encode(obj)
+        if self.encode is not stdlib_dumps and not encoded.isascii():
+            # json.dumps escapes non-ASCII as \uXXXX. Fall back so output doesn't change with the installed backend.
+            return stdlib_dumps(obj)
+        return encoded
+
+
+def load_backend(name: str = None) -> JsonBackend:
+    # Fastest installed backend, unless one is named here or in BACKEND_ENV_VAR
+    if name is None:
+        name = os.environ.get(BACKEND_ENV_VAR)
+    if name and name not in BACKEND_LOADERS:
+        raise ValueError("Unknown JSON backend '{}', expected one of: {}".format(name, ", ".join(BACKEND_LOADERS)))
+    for backend_name in ([name] if name else BACKEND_LOADERS):
+        try:
+            return JsonBackend(backend_name, BACKEND_LOADERS[backend_name]())
+        except ImportError:
+            if name:
+                raise
+
+
+def available_backends():
+    backends = []
+    for backend_name in BACKEND_LOADERS:
+        try:
+            backends.append(load_backend(backend_name))
+        except ImportError:
+            pass
+    return backends
+
+
+def stdout_binary() -> BinaryIO:
+    # Anything already print()ed must land before bytes written directly to the buffer
+    sys.stdout.flush()
+    return sys.stdout.buffer
+
+
+class JsonArrayWriter:
+    # Writes records as they are produced, in chunks of about chunk_size bytes. The JSON array output matches
+    # json.dumps of the full list (plus the newline print() would add) whichever backend is used.
+    def __init__(self, out_file: BinaryIO, debug_indent: int = 0, ndjson: bool = False, backend: JsonBackend = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.out_file = out_file
+        self.debug_indent = debug_indent
+        self.ndjson = ndjson
+        self.backend = backend if backend is not None else load_backend()
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.item_count = 0
+        self.chunk = []
+        self.chunk_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+
+    def emit(self, data: bytes):
+        self.chunk.append(data)
+        self.chunk_bytes += len(data)
+        if self.chunk_bytes >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.chunk:
+            self.out_file.write(b"".join(self.chunk))
+            self.chunk = []
+            self.chunk_bytes = 0
+
+    def write(self, items: Iterable):
+        if self.ndjson or self.debug_indent != 0:
+            for item in items:
+                self.write_item(item)
+            return
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == self.batch_size:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+
+    def write_item(self, item):
+        if self.ndjson:
+            self.emit(self.backend.dumps(item) + b"\n")
+        else:
+            item_json = json.dumps(item, indent=self.debug_indent)
+            item_json = item_json.replace("\n", "\n" + " " * self.debug_indent)
+            self.emit(b"[\n" if self.item_count == 0 else b",\n")
+            self.emit((" " * self.debug_indent + item_json).encode())
+        self.item_count += 1
+
+    def write_batch(self, batch: list):
+        # A compact list encodes as "[" + ",".join(items) + "]", so the brackets are swapped for our own separator
+        self.emit(b"[" if self.item_count == 0 else b",")
+        self.emit(self.backend.dumps(batch)[1:-1])
+        self.item_count += len(batch)
+
+    def close(self):
+        if not self.ndjson:
+            if self.item_count == 0:
+                self.emit(b"[]\n")
+            elif self.debug_indent != 0:
+                self.emit(b"\n]\n")
+            else:
+                self.emit(b"]\n")
+        self.flush()
+        self.out_file.flush()
+
+
+def write_json(obj, out_file: BinaryIO = None, debug_indent: int = 0, backend: JsonBackend = None):
+    # Drop-in for print(json.dumps(obj, ...)). Lists are streamed in batches instead of built as one string.
+    if out_file is None:
+        out_file = stdout_binary()
+    if isinstance(obj, list):
+        with JsonArrayWriter(out_file, debug_indent, backend=backend) as writer:
+            writer.write(obj)
+        return
+    if debug_indent != 0:
+        out_file.write(json.dumps(obj, indent=debug_indent).encode() + b"\n")
+    else:
+        backend = backend if backend is not None else load_backend()
+        out_file.write(backend.dumps(obj) + b"\n")
+    out_file.flush()
@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+
+import argparse
+import json
+import sys
+from iba_exp_refs_to_json import IbaExpRefCollection, IbaExpRefManager, OntologyManager
+
+
+parser = argparse.ArgumentParser(description="Report bytes per annotation held by IbaExpRefCollection, comparing "
+                                             "the compact record layout with the former nested dict layout")
+parser.add_argument('-f', '--annot_files', help="IBA GAF file(s), as passed to iba_exp_refs_to_json.py", nargs='*')
+parser.add_argument('-o', '--ontology', help="TSV of GO term parent(col1)-child(col2) relationships (is_a, part_of only)")
+parser.add_argument('-a', '--go_aspects', help="TSV of GO term->aspect lookup")
+parser.add_argument('-s', '--goslim_term_list', help="File list of the Generic GO slim terms")
+
+
+def deep_sizeof(root):
+    # Total sys.getsizeof of everything reachable from root, counting shared objects (e.g. interned strings) once
+    seen = set()
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, "__slots__"):
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+    return total
+
+
+def legacy_layout(collection: IbaExpRefCollection):
+    # Nested dicts/lists as held before the record classes. Round-tripped through JSON so every string value is
+    # its own object, as it was when each GAF row was read by csv.reader.
+    annotation_lkp = {}
+    for gene, terms in collection.annotation_lkp.items():
+        annotation_lkp[gene] = {}
+        for term, quals in terms.items():
+            annotation_lkp[gene][term] = {}
+            for qual, annot in quals.items():
+                legacy_annot = annot.to_dict()
+                legacy_annot["slim_terms"] = list(annot["slim_terms"])
+                legacy_annot["evidence"] = annot["evidence"].to_list()
+                annotation_lkp[gene][term][qual] = legacy_annot
+    gene_info_lkp = {gene: gene_info.to_dict() for gene, gene_info in collection.gene_info_lkp.items()}
+    return json.loads(json.dumps(annotation_lkp)), json.loads(json.dumps(gene_info_lkp))
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    ont_manager = OntologyManager(args.goslim_term_list,
+                                  args.ontology,
+                                  args.go_aspects)
+    iba_exp_ref_collection = IbaExpRefManager.parse(args.annot_files, ont_manager)
+    annotation_count = sum(len(quals) for terms in iba_exp_ref_collection.annotation_lkp.values()
+                           for quals in terms.values())
+    gene_count = len(iba_exp_ref_collection.gene_info_lkp)
+
+    legacy_annotation_lkp, legacy_gene_info_lkp = legacy_layout(iba_exp_ref_collection)
+    layouts = [
+        ("legacy", legacy_annotation_lkp, legacy_gene_info_lkp),
+        ("compact", iba_exp_ref_collection.annotation_lkp, iba_exp_ref_collection.gene_info_lkp),
+    ]
+    print("annotations\t{}\tgenes\t{}".format(annotation_count, gene_count))
+    print("layout\tannotation_bytes\tbytes_per_annotation\tgene_info_bytes\tbytes_per_gene")
+    for layout, annotation_lkp, gene_info_lkp in layouts:
+        annotation_bytes = deep_sizeof(annotation_lkp)
+        gene_info_bytes = deep_sizeof(gene_info_lkp)
+        print("{}\t{}\t{:.1f}\t{}\t{:.1f}".format(layout, annotation_bytes, annotation_bytes / max(annotation_count, 1),
+                                                  gene_info_bytes, gene_info_bytes / max(gene_count, 1)))
@@ -1,4 +1,8 @@
-from iba_exp_refs_to_json import IbaExpRefManager, IbaExpRefCollection, OntologyManager
+import io
+import json
+import pytest
+from iba_exp_refs_to_json import EvidenceAccumulator, IbaExpRefManager, IbaExpRefCollection, OntologyManager
+from json_writer import JsonArrayWriter, load_backend
 from gene_info_from_gafs import GeneInfoCollection
 
 goslim_term_file = "resources/test/goslim_generic.tsv"
@@ -110,6 +114,24 @@ def test_term_ancestry():
     assert ont_manager.is_ancestor_of('GO:0003824', 'GO:0140097') is True
 
 
+def test_ancestor_closure_order():
+    # Every parent precedes its children in the topological order backing the ancestor closure
+    for child, parents in ont_manager.go_parents.items():
+        for parent in parents:
+            assert ont_manager.term_index[parent] < ont_manager.term_index[child]
+    assert ont_manager.is_ancestor_of('GO:0003824', 'NOT_A_TERM') is None
+
+
+def test_generalize_term_memoized():
+    slim_terms = ont_manager.generalize_term('GO:0017116')
+    assert 'GO:0140097' in slim_terms
+    assert 'GO:0003824' not in slim_terms
+    # Cached results are handed out as copies so annotations cannot corrupt the lookup
+    slim_terms.append('GO:0000000')
+    assert 'GO:0000000' not in ont_manager.generalize_term('GO:0017116')
+    assert 'GO:0017116' in ont_manager.generalized_term_lkp
+
+
 def test_gene_symbols_names():
     iba_gaf = "resources/test/gene_association.paint_human.gaf"
     exp_gaf = "resources/annot_human_genes_not_in_families_selected.gaf"
@@ -142,3 +164,105 @@ def test_evidence_type_assignment():
     # Filled in UNKNOWN annotations should be 'n/a'
     annot = iba_collection.annotation_lkp["UniProtKB:X6R8D5"]["UNKNOWN:0001"][""]
     assert annot["evidence_type"] == "n/a"
+
+
+def sort_gaf_by_gene(gaf_file, sorted_file):
+    with open(gaf_file) as gf:
+        lines = gf.readlines()
+    header = [l for l in lines if l.startswith("!")]
+    rows = sorted((l for l in lines if not l.startswith("!")), key=lambda l: l.split("\t")[:2])
+    with open(sorted_file, "w") as sf:
+        sf.writelines(header + rows)
+
+
+def test_streaming_matches_parse(tmp_path):
+    gaf_files = []
+    for gaf_file in ["resources/test/gene_association.paint_human.gaf",
+                     "resources/annot_human_genes_not_in_families_selected.gaf"]:
+        sorted_file = str(tmp_path / gaf_file.replace("/", "_"))
+        sort_gaf_by_gene(gaf_file, sorted_file)
+        gaf_files.append(sorted_file)
+    test_gene_dat = "resources/test/gene.dat"
+    iba_collection = IbaExpRefManager.parse(gaf_files, ont_manager)
+    iba_collection.fill_in_missing_annotations(test_gene_dat)
+    # Streaming emits genes in sorted order rather than first-seen order
+    by_gene_term = lambda a: (a["gene"], a["term"])
+    expected = sorted(iba_collection.annotation_list(), key=by_gene_term)
+
+    out = io.BytesIO()
+    with JsonArrayWriter(out) as writer:
+        IbaExpRefManager.stream(gaf_files, ont_manager, writer, test_gene_dat)
+    streamed = json.loads(out.getvalue())
+    assert out.getvalue().decode() == json.dumps(streamed, separators=(",", ":")) + "\n"
+    assert sorted(streamed, key=by_gene_term) == expected
+
+    out = io.BytesIO()
+    with JsonArrayWriter(out, ndjson=True) as writer:
+        IbaExpRefManager.stream(gaf_files, ont_manager, writer, test_gene_dat)
+    assert [json.loads(l) for l in out.getvalue().splitlines()] == streamed
+
+
+def test_streaming_requires_sorted_input():
+    iba_gaf = "resources/test/gene_association.paint_human.gaf"
+    with pytest.raises(ValueError):
+        IbaExpRefManager.stream(iba_gaf, ont_manager, JsonArrayWriter(io.BytesIO()))
+
+
+def test_parallel_parse_matches_serial():
+    gaf_files = [
+        "resources/annot_human_genes_not_in_families_selected.gaf",
+        "resources/test/gene_association.paint_human.gaf"
+    ]
+    serial_collection = IbaExpRefManager.parse(gaf_files, ont_manager)
+    parallel_collection = IbaExpRefManager.parse_parallel(gaf_files, ont_manager, 3)
+    assert json.dumps(parallel_collection.annotation_list()) == json.dumps(serial_collection.annotation_list())
+    assert json.dumps(parallel_collection.gene_info_list()) == json.dumps(serial_collection.gene_info_list())
+
+
+def test_evidence_deduplication_order():
+    iba_row = ['UniProtKB', 'Q07001', 'CHRND', 'is_active_in', 'GO:0005887', 'PMID:21873635', 'IBA',
+               'PANTHER:PTN000434994|RGD:2704', 'C', 'Acetylcholine receptor subunit delta',
+               'UniProtKB:Q07001|PTN002498466', 'protein', 'taxon:9606', '20211216', 'GO_Central', '', '',
+               'PMID:25339867|PMID:23175852', 'Glra1', 'Glycine receptor subunit alpha-1', 'taxon:10116', 'RGD']
+    exp_row_1 = iba_row[:7] + [''] + iba_row[8:14] + ['UniProt'] + iba_row[15:]
+    exp_row_1[5] = 'PMID:1'
+    exp_row_2 = list(exp_row_1)
+    exp_row_2[5] = 'PMID:2'
+    collection = IbaExpRefCollection(ont_manager)
+    for row in [iba_row, exp_row_1, iba_row, exp_row_2, exp_row_1]:
+        collection.update_annot_from_row(row)
+    annots = collection.annotation_list()
+    evidence = annots[0]["evidence"]
+    # Duplicates dropped; direct evidence first, newest first, then homology evidence
+    assert [ev["references"] for ev in evidence] == [['PMID:2'], ['PMID:1'], ['PMID:23175852', 'PMID:25339867']]
+    assert annots[0]["evidence_type"] == "direct"
+
+
+def test_evidence_accumulator_reads():
+    evidence = EvidenceAccumulator()
+    evidence.add("UniProtKB:P1", ("PMID:1",), ("UniProt",), False)
+    evidence.add("UniProtKB:Q1", ("PMID:2",), ("UniProt",), True)
+    # Reads share one built list until the next add
+    assert evidence.to_list() is evidence.to_list()
+    assert [ev["with_gene_id"] for ev in evidence] == ["UniProtKB:Q1", "UniProtKB:P1"]
+    evidence.add("UniProtKB:Q1", ("PMID:3",), ("UniProt",), True)
+    assert len(evidence) == 3
+    assert evidence[0]["references"] == ["PMID:3"]
+
+
+def test_json_backends_match_stdlib():
+    iba_collection = IbaExpRefManager.parse("resources/test/gene_association.paint_human.gaf", ont_manager)
+    annotations = iba_collection.annotation_list()
+    annotations.append({"gene_name": "Non-ASCII é– name", "count": 3, "flag": None})
+    expected = (json.dumps(annotations, separators=(',', ':')) + "\n").encode()
+    for backend_name in ["orjson", "msgspec", "json"]:
+        try:
+            backend = load_backend(backend_name)
+        except ImportError:
+            continue
+        for batch_size in [1, 7, 1000]:
+            out = io.BytesIO()
+            with JsonArrayWriter(out, backend=backend, chunk_size=256, batch_size=batch_size) as writer:
+                writer.write(annotations[:50])
+                writer.write(annotations[50:])
+            assert out.getvalue() == expected
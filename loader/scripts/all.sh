@@ -11,7 +11,7 @@ OUTPUT_DIR=""
 usage() {
     echo "Usage: $0 -i <input_folder_path> -a <clean_articles_path> -o <output_dir> [-s]
     -s: Silent mode (delete output directory without prompting)"
-    echo "Example: $0 -i ./downloads/input -a ./downloads/clean-articles.json -o ./downloads/output"
+    echo "Example: $0 -i ./downloads/input -a ./downloads/clean-articles.ndjson -o ./downloads/output"
     exit 1
 }
 
@@ -47,7 +47,11 @@ fi
 if [[ ! -f "$CLEAN_ARTICLES" ]]; then
     echo "Warning: Clean articles file not found: $CLEAN_ARTICLES"
     echo "Creating empty clean articles file..."
-    echo "[]" > "$CLEAN_ARTICLES"
+    if [[ "$CLEAN_ARTICLES" == *.ndjson || "$CLEAN_ARTICLES" == *.jsonl ]]; then
+        : > "$CLEAN_ARTICLES"
+    else
+        echo "[]" > "$CLEAN_ARTICLES"
+    fi
     echo "Created empty clean articles file at: $CLEAN_ARTICLES"
 fi
 
@@ -88,7 +92,7 @@ process_dataset() {
     local taxon_fp="$folder/taxon_lkp.json"
     
     # Output files in the output subdirectory
-    local clean_annotations_fp="$output_subdir/human_iba_annotations_clean.json"
+    local clean_annotations_fp="$output_subdir/human_iba_annotations_clean.ndjson.gz"
     local genes_annotations_fp="$output_subdir/human_iba_genes_clean.json"
     
     echo "Using input files from $folder:"
@@ -121,8 +125,7 @@ process_dataset() {
     echo "Getting articles..."
     python3 -m src.get_articles \
         -a "$annotations_fp" \
-        -o "$CLEAN_ARTICLES" \
-        -e "$CLEAN_ARTICLES"
+        -o "$CLEAN_ARTICLES"
     
     echo "Cleaning annotations..."
     python3 -m src.clean_annotations \
@@ -176,6 +179,6 @@ fi
 echo "All folders processed successfully!"
 
 
-# -- bash scripts/all.sh  -i ./downloads/input -a ./downloads/clean-articles.json -o downloads/output
+# -- bash scripts/all.sh  -i ./downloads/input -a ./downloads/clean-articles.ndjson -o downloads/output
 
-# -- bash scripts/all.sh  -i test_data/input/ -a downloads/clean-articles.json  -o test_data/output
\ No newline at end of file
+# -- bash scripts/all.sh  -i test_data/input/ -a downloads/clean-articles.ndjson  -o test_data/output
\ No newline at end of file
@@ -43,7 +43,10 @@ process_dataset() {
     echo "Processing dataset in folder: $prefix"
     
     # Input files for ES indexing
-    local clean_annotations_fp="$folder/human_iba_annotations_clean.json"
+    local clean_annotations_fp="$folder/human_iba_annotations_clean.ndjson.gz"
+    if [[ ! -f "$clean_annotations_fp" ]]; then
+        clean_annotations_fp="$folder/human_iba_annotations_clean.json"
+    fi
     local genes_annotations_fp="$folder/human_iba_genes_clean.json"
     
     # Verify required input files exist
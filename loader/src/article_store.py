@@ -0,0 +1,147 @@
+import json
+import os
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from src.utils import is_ndjson, iter_json_records
+
+
+class ArticleStore:
+    """
+    Articles keyed by PMID in an append-only NDJSON log, with an offset index next to it ({path}.idx,
+    one "pmid<TAB>offset<TAB>length" line per record). Adding articles appends to both files, so an
+    incremental run costs O(new articles) rather than rewriting everything. A PMID added again is
+    appended and supersedes its earlier record; compact() rewrites the log without superseded records.
+    """
+
+    def __init__(self, path: str):
+        if not is_ndjson(path) or path.endswith('.gz'):
+            raise ValueError(f"Article store {path} must be an uncompressed .ndjson or .jsonl file")
+        self.path = path
+        self.index_path = path + '.idx'
+        self.offsets: Dict[str, Tuple[int, int]] = dict()
+        self.log = None
+        self.index = None
+        self.load_index()
+
+    def load_index(self) -> None:
+        indexed_to = 0
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                for line in f:
+                    pmid, offset, length = line.rstrip('\n').split('\t')
+                    self.offsets[pmid] = (int(offset), int(length))
+                    indexed_to = max(indexed_to, int(offset) + int(length))
+        log_size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if indexed_to > log_size:
+            # The log was replaced or truncated behind the index
+            self.offsets.clear()
+            indexed_to = 0
+            open(self.index_path, 'w').close()
+        if indexed_to < log_size:
+            # Records appended without their index lines, e.g. an interrupted run, or a log written elsewhere
+            self.index_log(indexed_to)
+
+    def index_log(self, start: int) -> None:
+        partial = None
+        with open(self.path, 'rb') as log, open(self.index_path, 'a', encoding='utf-8') as index:
+            log.seek(start)
+            offset = start
+            for line in log:
+                if not line.endswith(b'\n'):
+                    # A partial last record from an interrupted write
+                    partial = offset
+                    break
+                if line.strip():
+                    pmid = json.loads(line)['pmid']
+                    self.offsets[pmid] = (offset, len(line))
+                    index.write(f"{pmid}\t{offset}\t{len(line)}\n")
+                offset += len(line)
+        if partial is not None:
+            with open(self.path, 'r+b') as log:
+                log.truncate(partial)
+
+    def __contains__(self, pmid: str) -> bool:
+        return pmid in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def get(self, pmid: str) -> Optional[dict]:
+        if pmid not in self.offsets:
+            return None
+        offset, length = self.offsets[pmid]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def add(self, articles: Iterable[dict], replace: bool = False) -> int:
+        """Append articles whose PMID is not in the store yet, or every article with replace. Returns the number added"""
+        if self.log is None:
+            self.log = open(self.path, 'ab')
+            self.index = open(self.index_path, 'a', encoding='utf-8')
+        added = 0
+        for article in articles:
+            if not replace and article['pmid'] in self.offsets:
+                continue
+            line = (json.dumps(article, ensure_ascii=False) + '\n').encode('utf-8')
+            offset = self.log.tell()
+            self.log.write(line)
+            self.offsets[article['pmid']] = (offset, len(line))
+            self.index.write(f"{article['pmid']}\t{offset}\t{len(line)}\n")
+            added += 1
+        # The log first, so an index line never points past the end of the log
+        self.log.flush()
+        self.index.flush()
+        return added
+
+    def __iter__(self) -> Iterator[dict]:
+        """The current record of every PMID, in log order"""
+        current = {offset for offset, _ in self.offsets.values()}
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                if offset in current:
+                    yield json.loads(line)
+                offset += len(line)
+
+    def close(self) -> None:
+        if self.log is not None:
+            self.log.close()
+            self.index.close()
+            self.log = None
+            self.index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def compact(path: str) -> Tuple[int, int]:
+    """
+    Rewrite the store's log with only the current record of each PMID, and a fresh index.
+    Returns the (before, after) log sizes in bytes.
+    """
+    before = os.path.getsize(path) if os.path.exists(path) else 0
+    root, ext = os.path.splitext(path)
+    temp_path = root + '.compact' + ext
+    for stale in (temp_path, temp_path + '.idx'):
+        if os.path.exists(stale):
+            os.remove(stale)
+    with ArticleStore(path) as store, ArticleStore(temp_path) as compacted:
+        compacted.add(store)
+    # The log first: until the index follows, the old index points past the end of the smaller log,
+    # which makes the next open rebuild it
+    os.replace(temp_path, path)
+    os.replace(temp_path + '.idx', path + '.idx')
+    return before, os.path.getsize(path)
+
+
+def read_articles(path: str) -> Iterator[dict]:
+    """Articles from a store, or from a JSON array or NDJSON file of articles"""
+    if is_ndjson(path) and os.path.exists(path + '.idx'):
+        yield from ArticleStore(path)
+    else:
+        yield from iter_json_records(path)
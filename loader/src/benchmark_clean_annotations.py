@@ -0,0 +1,161 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+from os import path as ospath
+import numpy as np
+import pandas as pd
+from src.clean_annotations import (count_evidence, get_annos, get_articles_map, get_evidence, get_genes_map,
+                                   get_groups, get_taxon_map, get_terms_map, spread_terms, term_type, unknown_terms)
+from src.config.base import file_path
+from src.utils import get_pd_row
+
+gene_columns = ['gene_symbol', 'gene_name', 'taxon_id', 'taxon_label', 'taxon_abbr', 'panther_family', 'long_id',
+                'coordinates_chr_num', 'coordinates_start', 'coordinates_end']
+
+taxons = [
+    {"taxon_id": "9606", "taxon_label": "Homo sapiens", "taxon_abbr": "Hsa"},
+    {"taxon_id": "10090", "taxon_label": "Mus musculus", "taxon_abbr": "Mmu"},
+    {"taxon_id": "10116", "taxon_label": "Rattus norvegicus", "taxon_abbr": "Rno"},
+]
+
+groups = ['UniProt', 'MGI', 'RGD', 'GO_Central', 'SGD', 'FlyBase', 'WB']
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Time get_annos against the per-row df.loc implementation it '
+                                                 'replaced, on synthetically scaled annotations')
+    parser.add_argument('-a', dest='annos_fp', default='./data/sample_human_iba_annotations.json',
+                        type=file_path, help='Annotations Json to scale up')
+    parser.add_argument('-t', dest='terms_fp', default='./data/filtered_terms.json',
+                        type=file_path, help='Terms to draw GO terms from, as in data/filtered_terms.json')
+    parser.add_argument('-x', dest='scale', type=int, default=100,
+                        help='Copies of each annotation, each on a new gene')
+    parser.add_argument('-e', dest='evidence', type=int, default=3,
+                        help='Max evidence items per known-term annotation')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-legacy', dest='skip_legacy', action='store_true',
+                        help='Only time get_annos, e.g. for scales too large for the per-row implementation')
+
+    return parser.parse_args()
+
+
+def get_annos_by_row(annos_fp, terms_df, genes_df, articles_df):
+    # get_annos as it was before get_pd_row_lookup: one df.loc per term, slim term, reference and with-gene
+    annos_df = pd.read_json(annos_fp)
+    annos_df = annos_df.merge(genes_df[gene_columns], how='left', left_on="gene", right_index=True)
+    annos_df['aspect'] = annos_df['term'].apply(lambda x: get_pd_row(terms_df, x)['aspect'])
+    annos_df['term'] = annos_df['term'].apply(lambda x: get_pd_row(terms_df, x))
+    annos_df['term_type'] = annos_df['term'].apply(lambda x: term_type(x))
+    annos_df['slim_terms'] = annos_df['slim_terms'].apply(lambda x: spread_terms(terms_df, x))
+    annos_df['evidence'] = annos_df.apply(lambda x: get_evidence(articles_df, genes_df, x), axis=1)
+    annos_df['evidence_type'] = annos_df['evidence_type'].replace(np.nan, 'n/a')
+    annos_df['groups'] = annos_df['evidence'].apply(lambda x: get_groups(x))
+    annos_df['evidence_count'] = annos_df['evidence'].apply(lambda x: count_evidence(x))
+
+    return annos_df
+
+
+def synthesize(annos, terms, scale, max_evidence, seed):
+    rng = random.Random(seed)
+    terms_out = {term['id']: {
+        "ID": term['id'],
+        "LABEL": term['label'],
+        "hasOBONamespace": term['aspect'].replace(' ', '_'),
+        "is_goslim": term['is_goslim'] in (True, 'true')
+    } for term in terms}
+    for i, unknown_term in enumerate(unknown_terms):
+        aspect = ['molecular_function', 'biological_process', 'cellular_component'][i]
+        terms_out[unknown_term] = {"ID": unknown_term, "LABEL": "Unknown " + aspect.replace('_', ' '),
+                                   "hasOBONamespace": aspect, "is_goslim": False}
+    terms_out = list(terms_out.values())
+    go_terms = [t['ID'] for t in terms_out if t['ID'].startswith('GO:')]
+    slim_terms = [t['ID'] for t in terms_out if t['is_goslim'] and t['ID'].startswith('GO:')] or go_terms
+
+    with_gene_pool = ['MGI:SYN{}'.format(i) for i in range(max(10, scale * 5))]
+    pmid_pool = ['PMID:{}'.format(10000000 + i) for i in range(max(10, scale * 20))]
+    genes = {}
+    annos_out = []
+    for copy in range(scale):
+        for anno in annos:
+            gene = '{}-{}'.format(anno['gene'], copy)
+            start = rng.randint(1, 200000000)
+            genes[gene] = {"gene": gene, "gene_symbol": anno['gene_symbol'], "gene_name": anno['gene_name'],
+                           "taxon_id": "9606", "panther_family": "PTHR{:05d}".format(rng.randrange(100000)),
+                           "long_id": "HUMAN|UniProtKB={}".format(gene),
+                           "coordinates_chr_num": str(rng.randint(1, 22)), "coordinates_start": str(start),
+                           "coordinates_end": str(start + rng.randint(1000, 100000)), "coordinates_strand": "1"}
+            new_anno = dict(anno, gene=gene)
+            # Give every other annotation a GO term with evidence, the rest keep their UNKNOWN term
+            if rng.random() < 0.5:
+                new_anno['term'] = rng.choice(go_terms)
+                new_anno['slim_terms'] = rng.sample(slim_terms, rng.randint(1, 2))
+                new_anno['evidence_type'] = rng.choice(['direct', 'homology'])
+                new_anno['evidence'] = [{
+                    "with_gene_id": rng.choice(with_gene_pool),
+                    "references": rng.sample(pmid_pool, rng.randint(1, 3)),
+                    "groups": [rng.choice(groups)]
+                } for _ in range(rng.randint(1, max_evidence))]
+            annos_out.append(new_anno)
+    for with_gene in with_gene_pool:
+        genes[with_gene] = {"gene": with_gene, "gene_symbol": with_gene.split(':')[1], "gene_name": "Synthetic",
+                            "taxon_id": "10090", "long_id": "MOUSE|MGI={}".format(with_gene)}
+    # A few references are left out to exercise the missing-article path
+    articles = [{"pmid": pmid, "title": "Synthetic article " + pmid, "date": "2001 Jan",
+                 "authors": ["Author A", "Author B"]} for pmid in pmid_pool if rng.random() < 0.95]
+    return annos_out, terms_out, list(genes.values()), articles, taxons
+
+
+def normalized_records(annos_df):
+    records = json.loads(annos_df.to_json(orient="records", default_handler=None))
+    for record in records:
+        # get_groups returns set order
+        record['groups'] = sorted(record['groups'])
+    return records
+
+
+def main():
+    args = parse_arguments()
+    with open(args.annos_fp) as f:
+        annos = json.load(f)
+    with open(args.terms_fp) as f:
+        terms = json.load(f)
+    datasets = synthesize(annos, terms, args.scale, args.evidence, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fps = []
+        for name, data in zip(['annos', 'terms', 'genes', 'articles', 'taxon'], datasets):
+            fp = ospath.join(tmp_dir, name + '.json')
+            with open(fp, 'w') as f:
+                json.dump(data, f)
+            fps.append(fp)
+        annos_fp, terms_fp, genes_fp, articles_fp, taxon_fp = fps
+
+        terms_df = get_terms_map(terms_fp)
+        articles_df = get_articles_map(articles_fp)
+        genes_df = get_genes_map(genes_fp, get_taxon_map(taxon_fp))
+        anno_count = len(datasets[0])
+        evidence_count = sum(len(anno['evidence']) for anno in datasets[0])
+        print(f"{anno_count} annotations, {evidence_count} evidence items, {len(genes_df)} genes, "
+              f"{len(articles_df)} articles")
+
+        results = {}
+        methods = [('get_annos', get_annos)]
+        if not args.skip_legacy:
+            methods.append(('get_annos_by_row', get_annos_by_row))
+        for name, method in methods:
+            start_time = time.perf_counter()
+            annos_df = method(annos_fp, terms_df, genes_df, articles_df)
+            seconds = time.perf_counter() - start_time
+            results[name] = normalized_records(annos_df)
+            print(f"{name}: {seconds:.2f}s, {anno_count / seconds:.0f} annotations/sec")
+
+        if not args.skip_legacy:
+            if results['get_annos'] != results['get_annos_by_row']:
+                raise ValueError("get_annos records differ from get_annos_by_row")
+            print("Records identical")
+
+
+if __name__ == "__main__":
+    main()
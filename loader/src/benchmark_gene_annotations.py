@@ -0,0 +1,88 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+from os import path as ospath
+import pandas as pd
+from src.config.base import file_path
+from src.generate_gene_annotations import get_genes_df, group_terms
+from src.utils import is_ndjson
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Time get_genes_df against the groupby().apply(group_terms) '
+                                                 'implementation it replaced, on synthetically scaled annotations')
+    parser.add_argument('-a', dest='annos_fp', default='./test_data/output/pango-test/human_iba_annotations_clean.json',
+                        type=file_path, help='Clean annotations Json to scale up')
+    parser.add_argument('-x', dest='scale', type=int, default=500,
+                        help='Copies of each gene, each with its annotations spread over new terms')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-legacy', dest='skip_legacy', action='store_true',
+                        help='Only time get_genes_df, e.g. for scales too large for the groupby implementation')
+
+    return parser.parse_args()
+
+
+def get_genes_df_by_group(annos_df):
+    # get_annos as it was before get_genes_df: a pandas group and a group_terms call per gene
+    genes_df = annos_df.groupby('gene').apply(group_terms).reset_index()
+    genes_df = genes_df.sort_values(by='term_count', ascending=False).reset_index(drop=True)
+
+    return genes_df
+
+
+def synthesize(annos, scale, seed):
+    rng = random.Random(seed)
+    terms = {anno['term']['id']: anno['term'] for anno in annos if isinstance(anno.get('term'), dict)}
+    slim_terms = {slim['id']: slim for anno in annos for slim in anno.get('slim_terms') or []}
+    term_pool = [dict(term, id='{}-{}'.format(term['id'], i)) for term in terms.values() for i in range(50)]
+    slim_pool = list(slim_terms.values())
+    annos_out = []
+    for copy in range(scale):
+        for anno in annos:
+            gene = '{}-{}'.format(anno['gene'], copy)
+            # Distinct terms per gene, as get_annos rejects a gene annotated twice with one term
+            for term in rng.sample(term_pool, rng.randint(1, 8)):
+                annos_out.append(dict(anno, gene=gene, term=term,
+                                      slim_terms=rng.sample(slim_pool, min(len(slim_pool), rng.randint(0, 3))),
+                                      evidence_type=rng.choice(['direct', 'homology'])))
+    # get_annos keeps the first gene columns of each gene, from the first of its annotations
+    rng.shuffle(annos_out)
+    return annos_out
+
+
+def main():
+    args = parse_arguments()
+    with open(args.annos_fp) as f:
+        annos = synthesize(json.load(f), args.scale, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        annos_fp = ospath.join(tmp_dir, 'annos.json')
+        with open(annos_fp, 'w') as f:
+            json.dump(annos, f)
+        print(f"{len(annos)} annotations")
+
+        start_time = time.perf_counter()
+        annos_df = pd.read_json(annos_fp, lines=is_ndjson(annos_fp))
+        annos_df = annos_df.drop(['evidence'], axis=1)
+        print(f"read_json: {time.perf_counter() - start_time:.2f}s")
+
+        results = {}
+        methods = [('get_genes_df', get_genes_df)]
+        if not args.skip_legacy:
+            methods.append(('get_genes_df_by_group', get_genes_df_by_group))
+        for name, method in methods:
+            start_time = time.perf_counter()
+            genes_df = method(annos_df)
+            seconds = time.perf_counter() - start_time
+            results[name] = genes_df.to_json(orient="records", default_handler=None)
+            print(f"{name}: {seconds:.2f}s, {len(genes_df)} genes, {len(genes_df) / seconds:.0f} genes/sec")
+
+        if not args.skip_legacy:
+            if results['get_genes_df'] != results['get_genes_df_by_group']:
+                raise ValueError("get_genes_df records differ from get_genes_df_by_group")
+            print("Records identical")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import json
+import random
+import tempfile
+import time
+import tracemalloc
+from os import path as ospath
+import pandas as pd
+from src.config.base import file_path
+from src.utils import iter_unique_refs
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Time iter_unique_refs against the pd.read_json implementation '
+                                                 'it replaced, on synthetically scaled annotations')
+    parser.add_argument('-a', dest='annos_fp', default='./test_data/input/pango-test/human_iba_annotations.json',
+                        type=file_path, help='Raw annotations Json with evidence references to scale up')
+    parser.add_argument('-x', dest='scale', type=int, default=10000,
+                        help='Copies of each annotation, each with new references')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-memory', dest='skip_memory', action='store_true',
+                        help='Only time each method, without the slower tracemalloc pass')
+
+    return parser.parse_args()
+
+
+def get_unique_refs_pandas(annotations_fp):
+    # get_unique_refs as it was before iter_unique_refs: the whole file in a DataFrame
+    refs = set()
+    annotations_df = pd.read_json(annotations_fp)
+
+    for evidences in list(annotations_df['evidence']):
+        for evidence in evidences:
+            for ref in evidence['references']:
+                refs.add(ref)
+
+    return list(refs)
+
+
+def synthesize(annos, scale, seed):
+    rng = random.Random(seed)
+    pmid_pool = ['PMID:{}'.format(10000000 + i) for i in range(max(10, scale * 20))]
+    annos_out = []
+    for copy in range(scale):
+        for anno in annos:
+            annos_out.append(dict(anno, gene='{}-{}'.format(anno['gene'], copy), evidence=[
+                dict(evidence, references=rng.sample(pmid_pool, len(evidence.get('references', []))))
+                for evidence in anno['evidence']]))
+    return annos_out
+
+
+def main():
+    args = parse_arguments()
+    with open(args.annos_fp) as f:
+        annos = synthesize(json.load(f), args.scale, args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_fp = ospath.join(tmp_dir, 'annos.json')
+        ndjson_fp = ospath.join(tmp_dir, 'annos.ndjson')
+        with open(json_fp, 'w') as f:
+            json.dump(annos, f)
+        with open(ndjson_fp, 'w') as f:
+            for anno in annos:
+                f.write(json.dumps(anno) + '\n')
+        print(f"{len(annos)} annotations, {ospath.getsize(json_fp) / 2 ** 20:.1f} MB")
+        del annos
+
+        methods = [
+            ('pd.read_json', lambda: get_unique_refs_pandas(json_fp)),
+            ('iter_unique_refs json', lambda: list(iter_unique_refs(json_fp))),
+            ('iter_unique_refs ndjson', lambda: list(iter_unique_refs(ndjson_fp))),
+        ]
+        results = {}
+        for name, method in methods:
+            start_time = time.perf_counter()
+            refs = method()
+            seconds = time.perf_counter() - start_time
+            results[name] = set(refs)
+            line = f"{name}: {seconds:.2f}s, {len(refs)} references"
+            if not args.skip_memory:
+                tracemalloc.start()
+                method()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                line += f", peak {peak / 2 ** 20:.1f} MB"
+            print(line)
+
+        if any(refs != results['pd.read_json'] for refs in results.values()):
+            raise ValueError("iter_unique_refs references differ from pd.read_json")
+        print("References identical")
+
+
+if __name__ == "__main__":
+    main()
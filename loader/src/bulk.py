@@ -0,0 +1,153 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+from elasticsearch import Elasticsearch, helpers
+from src.utils import chunked
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THREAD_COUNT = 4
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_MAX_CHUNK_BYTES = 10 * 1024 * 1024
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_INITIAL_BACKOFF = 2
+DEFAULT_MAX_BACKOFF = 60
+
+
+class BulkStats:
+    """Documents indexed, failures and throughput for one index"""
+
+    def __init__(self, index_name: str):
+        self.index_name = index_name
+        self.success = 0
+        self.errors: List[Any] = []
+        self.start_time = time.time()
+        self.duration = 0.0
+
+    def add(self, success: int, errors: List[Any]) -> None:
+        self.success += success
+        self.errors.extend(errors)
+
+    def finish(self) -> None:
+        self.duration = time.time() - self.start_time
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.success / self.duration if self.duration else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.index_name}: {self.success} docs in {self.duration:.1f}s "
+                f"({self.docs_per_sec:.0f} docs/sec), {len(self.errors)} errors")
+
+
+def ship_chunk(
+    client: Elasticsearch,
+    chunk: List[dict],
+    index_name: str,
+    max_chunk_bytes: int,
+    max_retries: int,
+    initial_backoff: float,
+    max_backoff: float
+) -> Tuple[int, List[Any]]:
+    """
+    Index one chunk of documents, retrying documents rejected with 429
+    with exponential backoff (initial_backoff * 2 ** attempt, capped at max_backoff).
+
+    Returns:
+        Tuple of (number of successful operations, list of errors)
+    """
+    success = 0
+    errors = []
+    for ok, info in helpers.streaming_bulk(
+        client,
+        chunk,
+        index=index_name,
+        chunk_size=len(chunk),
+        max_chunk_bytes=max_chunk_bytes,
+        max_retries=max_retries,
+        initial_backoff=initial_backoff,
+        max_backoff=max_backoff,
+        raise_on_error=False
+    ):
+        if ok:
+            success += 1
+        else:
+            errors.append(info)
+    return success, errors
+
+
+def parallel_bulk_load(
+    client: Elasticsearch,
+    actions: Iterable[dict],
+    index_name: str,
+    thread_count: int = DEFAULT_THREAD_COUNT,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_chunk_bytes: int = DEFAULT_MAX_CHUNK_BYTES,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+    max_backoff: float = DEFAULT_MAX_BACKOFF,
+    queue_size: int = None,
+    on_progress: Optional[Callable[[int], None]] = None
+) -> BulkStats:
+    """
+    Bulk index actions with thread_count concurrent bulk requests.
+
+    Like helpers.parallel_bulk, but each chunk goes through helpers.streaming_bulk
+    so 429 (too many requests) rejections are retried with backoff instead of
+    being reported as failures. At most queue_size chunks (default 2 per thread)
+    are read ahead of the cluster, so a slow cluster slows reading rather than
+    growing memory.
+
+    Args:
+        client: Elasticsearch client
+        actions: Documents or bulk actions to index
+        index_name: Name of the Elasticsearch index
+        thread_count: Concurrent bulk requests
+        chunk_size: Documents per bulk request
+        max_chunk_bytes: Maximum bulk request size in bytes; larger chunks are split
+        max_retries: Retries for documents rejected with 429
+        initial_backoff: Seconds to wait before the first retry, doubled on each retry
+        max_backoff: Maximum seconds to wait between retries
+        queue_size: Chunks read ahead of the bulk requests in flight
+        on_progress: Called as chunks complete with the number of leading actions acknowledged,
+            i.e. every action before that offset has been indexed, whatever order the chunks finished in.
+            It stops advancing at the first chunk with errors, so a resume ships that chunk again
+
+    Returns:
+        BulkStats with the success count, errors and docs/sec
+    """
+    queue_size = queue_size or thread_count * 2
+    stats = BulkStats(index_name)
+
+    # Chunk sizes by position, for the chunks done ahead of an earlier one still in flight;
+    # None for a chunk with errors, which holds the acknowledged offset before it from then on
+    done_chunks = {}
+    progress = {'next_chunk': 0, 'acknowledged': 0}
+
+    def collect(futures):
+        for future in futures:
+            success, errors = future.result()
+            stats.add(success, errors)
+            position, size = pending.pop(future)
+            done_chunks[position] = None if errors else size
+        while done_chunks.get(progress['next_chunk']) is not None:
+            progress['acknowledged'] += done_chunks.pop(progress['next_chunk'])
+            progress['next_chunk'] += 1
+        if on_progress:
+            on_progress(progress['acknowledged'])
+
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        pending = {}
+        for position, chunk in enumerate(chunked(actions, chunk_size)):
+            if len(pending) >= queue_size:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+            future = executor.submit(
+                ship_chunk, client, chunk, index_name, max_chunk_bytes, max_retries, initial_backoff, max_backoff
+            )
+            pending[future] = (position, len(chunk))
+        collect(wait(pending).done)
+
+    stats.finish()
+    logger.info(str(stats))
+    return stats
@@ -0,0 +1,70 @@
+import json
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_FILE = 'index_es.checkpoint.json'
+
+
+class LoadCheckpoint:
+    """
+    Progress of an index_es run, saved to a JSON file each time a bulk chunk is acknowledged:
+    for each input file, the index it is loading into and how many of its records are in.
+
+    {"inputs": {"/abs/path/annotations.ndjson.gz": {"index": "pango-2-annotations-20250101120000",
+                                                    "offset": 150000, "done": false,
+                                                    "size": 123456789, "mtime": 1735732800.0}}}
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_FILE, inputs: Optional[dict] = None):
+        self.path = path
+        self.inputs = inputs or {}
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_CHECKPOINT_FILE) -> 'LoadCheckpoint':
+        if not os.path.isfile(path):
+            raise ValueError(f"No checkpoint {path} to resume from")
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return cls(path, data['inputs'])
+
+    def entry(self, j_file: str) -> Optional[dict]:
+        """The checkpoint for j_file, or None if it was not started. Raises if j_file changed since."""
+        entry = self.inputs.get(os.path.abspath(j_file))
+        if entry and (entry['size'], entry['mtime']) != file_stamp(j_file):
+            raise ValueError(f"{j_file} changed since it was checkpointed, cannot resume")
+        return entry
+
+    def start(self, j_file: str, index_name: str) -> None:
+        size, mtime = file_stamp(j_file)
+        self.inputs[os.path.abspath(j_file)] = {
+            'index': index_name, 'offset': 0, 'done': False, 'size': size, 'mtime': mtime
+        }
+        self.save()
+
+    def update(self, j_file: str, offset: int) -> None:
+        self.inputs[os.path.abspath(j_file)]['offset'] = offset
+        self.save()
+
+    def finish(self, j_file: str) -> None:
+        self.inputs[os.path.abspath(j_file)]['done'] = True
+        self.save()
+
+    def save(self) -> None:
+        # Write then rename, so a crash mid-write leaves the previous checkpoint intact
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'inputs': self.inputs}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def remove(self) -> None:
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+            logger.info(f"Removed checkpoint {self.path}")
+
+
+def file_stamp(j_file: str):
+    stat = os.stat(j_file)
+    return stat.st_size, stat.st_mtime
@@ -5,7 +5,8 @@ import time
 import numpy as np
 import pandas as pd
 from src.config.base import file_path
-from src.utils import get_pd_row, get_pd_row_key, write_to_json
+from src.utils import (chunked, get_pd_row, get_pd_row_key, get_pd_row_lookup, is_ndjson, iter_json_records,
+                       write_df_chunks_to_ndjson, write_to_json)
 
 unknown_terms =['UNKNOWN:0001', 'UNKNOWN:0002', 'UNKNOWN:0003']
 
@@ -15,6 +16,11 @@ def main():
     articles_df = get_articles_map(parser.articles_fp)
     taxon_df = get_taxon_map(parser.taxon_fp)
     genes_df = get_genes_map(parser.genes_fp, taxon_df)
+    if is_ndjson(parser.clean_annos_fp):
+        annos_chunks = get_annos_chunks(parser.annos_fp, terms_df, genes_df, articles_df, parser.chunk_size)
+        write_df_chunks_to_ndjson(annos_chunks, ospath.join('.', parser.clean_annos_fp))
+        return
+
     annos_df = get_annos(parser.annos_fp, terms_df, genes_df, articles_df)
     anno_json = annos_df.to_json(orient="records", default_handler=None)
     json_str = json.loads(anno_json)
@@ -35,7 +41,10 @@ def parse_arguments():
     parser.add_argument('-g', dest='genes_fp', required=True,
                         type=file_path, help='Genes Json')
     parser.add_argument('-o', dest='clean_annos_fp', required=True,
-                         help='Output of Clean anno')
+                         help='Output of Clean anno. A .ndjson or .jsonl path (optionally .gz) is written '
+                              'chunk by chunk, one record per line')
+    parser.add_argument('-c', dest='chunk_size', default=10000, type=int,
+                        help='Annotations per chunk when writing NDJSON')
 
     return parser.parse_args()
 
@@ -69,6 +78,19 @@ def get_evidence(df, genes_df, row):
     return result
 
 
+def lookup_terms(terms_lkp, terms):
+    return [terms_lkp[term] for term in terms]
+
+
+def lookup_evidence(articles_lkp, genes_lkp, evidences):
+    # Same records as get_evidence, from get_pd_row_lookup dicts
+    return [{
+        'with_gene_id': genes_lkp[evidence['with_gene_id']],
+        'groups': evidence['groups'],
+        'references': [articles_lkp.get(reference) for reference in evidence['references']]
+    } for evidence in evidences]
+
+
 def term_type(term):
     return  'unknown' if term['id'] in unknown_terms  else 'known'     
 
@@ -83,7 +105,9 @@ def get_terms_map(terms_fp):
 
 #Article
 def get_articles_map(articles_fp):
-    articles_df = pd.read_json(articles_fp)
+    articles_df = pd.read_json(articles_fp, lines=is_ndjson(articles_fp))
+    # An article store may hold superseded records of a PMID ahead of its current one
+    articles_df = articles_df.drop_duplicates('pmid', keep='last')
     articles_df = articles_df.set_index('pmid', drop=False)
     return articles_df
 
@@ -116,7 +140,22 @@ def get_groups(evidences):
 
 
 def get_annos(annos_fp, terms_df, genes_df, articles_df):
-    annos_df = pd.read_json(annos_fp)
+    annos_df = pd.read_json(annos_fp, lines=is_ndjson(annos_fp))
+    return enrich_annos(annos_df, genes_df, *get_lookups(terms_df, genes_df, articles_df))
+
+
+def get_annos_chunks(annos_fp, terms_df, genes_df, articles_df, chunk_size):
+    # Same records as get_annos, chunk_size at a time, without loading the whole annotations file
+    lookups = get_lookups(terms_df, genes_df, articles_df)
+    for records in chunked(iter_json_records(annos_fp), chunk_size):
+        yield enrich_annos(pd.DataFrame(records), genes_df, *lookups)
+
+
+def get_lookups(terms_df, genes_df, articles_df):
+    return get_pd_row_lookup(terms_df), get_pd_row_lookup(genes_df), get_pd_row_lookup(articles_df)
+
+
+def enrich_annos(annos_df, genes_df, terms_lkp, genes_lkp, articles_lkp):
     annos_df = annos_df.merge(genes_df[
         ['gene_symbol',
         'gene_name',
@@ -128,14 +167,15 @@ def get_annos(annos_fp, terms_df, genes_df, articles_df):
         'coordinates_chr_num',
         'coordinates_start',
         'coordinates_end']], how='left', left_on="gene", right_index=True)
-    annos_df['aspect'] = annos_df['term'].apply(lambda x: get_pd_row(terms_df, x)['aspect'])
-    annos_df['term'] = annos_df['term'].apply(lambda x: get_pd_row(terms_df, x))
-    annos_df['term_type'] = annos_df['term'].apply(lambda x: term_type(x))
-    annos_df['slim_terms'] = annos_df['slim_terms'].apply(lambda x: spread_terms(terms_df, x))
-    annos_df['evidence'] = annos_df.apply(lambda x: get_evidence(articles_df, genes_df, x),axis=1)
+    terms = [terms_lkp[term] for term in annos_df['term']]
+    annos_df['aspect'] = [term['aspect'] for term in terms]
+    annos_df['term'] = terms
+    annos_df['term_type'] = [term_type(term) for term in terms]
+    annos_df['slim_terms'] = [lookup_terms(terms_lkp, slim_terms) for slim_terms in annos_df['slim_terms']]
+    annos_df['evidence'] = [lookup_evidence(articles_lkp, genes_lkp, evidences) for evidences in annos_df['evidence']]
     annos_df['evidence_type'] = annos_df['evidence_type'].replace(np.nan, 'n/a')
-    annos_df['groups'] = annos_df['evidence'].apply(lambda x: get_groups(x))
-    annos_df['evidence_count'] = annos_df['evidence'].apply(lambda x: count_evidence(x))
+    annos_df['groups'] = [get_groups(evidences) for evidences in annos_df['evidence']]
+    annos_df['evidence_count'] = [count_evidence(evidences) for evidences in annos_df['evidence']]
 
     return annos_df
 
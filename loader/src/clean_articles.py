@@ -2,13 +2,13 @@ import os
 import time
 import typing
 import requests
-from os import path as ospath
 import json
 import argparse
 import pandas as pd
 from sys import path
+from concurrent.futures import ProcessPoolExecutor
 from src.config.base import dir_path, file_path
-from src.utils import load_json
+from src.utils import is_ndjson, load_json, open_file
 
 
 def main():
@@ -16,7 +16,7 @@ def main():
     in_dir =  parser.in_dir
     out_file =  parser.out_fp
 
-    parse_articles(in_dir, out_file)
+    parse_articles(in_dir, out_file, parser.workers)
 
 
 def parse_arguments():
@@ -26,7 +26,10 @@ def parse_arguments():
                         type=dir_path, help='pmids and labels file')
 
     parser.add_argument('-o', dest='out_fp', required=True,
-                         help='Metadata')
+                         help='Clean articles, .ndjson or .jsonl (optionally .gz) for one article per line, else a JSON array')
+
+    parser.add_argument('-w', dest='workers', type=int, default=None,
+                        help='Worker processes parsing files (default: CPU count)')
 
     return parser.parse_args()
 
@@ -41,28 +44,55 @@ def parse_article(res):
    
     return article
 
-def parse_articles(in_dir, out_fp):
-    start_time = time.time()
-    articles = list()
+def find_article_files(in_dir):
+    # Sorted, so the first of several records of a PMID is the same on every run
+    fps = list()
     for root, dirs, files in os.walk(in_dir, topdown=True):
         for name in files:
             if name.endswith('.json'):
-                fp = os.path.join(root, name)
-                article_file = load_json(fp)
-                res = article_file['result']
-                print(fp)
-                article = [parse_article(res[uid]) for uid in res['uids']]
-                articles.extend(article)
-              
-    print (len(articles))
-    write_to_json(articles, ospath.join(out_fp))          
-         
-    print( f" processed. Total time taken {time.time() - start_time}s")
-
-
-def write_to_json(json_data, output_file):
-    with open(output_file, 'w', encoding='utf-8') as outfile:
-        json.dump(json_data, outfile,  ensure_ascii=False, indent=2)
+                fps.append(os.path.join(root, name))
+    return sorted(fps)
+
+def parse_article_file(fp):
+    article_file = load_json(fp)
+    res = article_file['result']
+    return [parse_article(res[uid]) for uid in res['uids']]
+
+def parse_articles(in_dir, out_fp, workers=None, progress_every=1000):
+    """
+    Parse every eUtils esummary dump (*.json) under in_dir in a pool of worker processes, and write
+    each article once, keeping the first record of a PMID found in sorted path order. Articles are
+    written as they arrive: one per line for an .ndjson or .jsonl out_fp (optionally .gz), otherwise
+    as a JSON array.
+    """
+    start_time = time.time()
+    fps = find_article_files(in_dir)
+    seen = set()
+    duplicates = 0
+    with open_file(out_fp, 'w') as outfile, ProcessPoolExecutor(max_workers=workers) as executor:
+        ndjson = is_ndjson(out_fp)
+        if not ndjson:
+            outfile.write('[')
+        chunksize = max(1, min(64, len(fps) // ((workers or os.cpu_count() or 1) * 4)))
+        for i, articles in enumerate(executor.map(parse_article_file, fps, chunksize=chunksize), 1):
+            for article in articles:
+                if article['pmid'] in seen:
+                    duplicates += 1
+                    continue
+                line = json.dumps(article, ensure_ascii=False)
+                if ndjson:
+                    outfile.write(line + '\n')
+                else:
+                    outfile.write(('\n' if not seen else ',\n') + line)
+                seen.add(article['pmid'])
+            if i % progress_every == 0:
+                print(f"{i}/{len(fps)} files, {len(seen)} articles, {i / (time.time() - start_time):.0f} files/sec")
+        if not ndjson:
+            outfile.write('\n]\n' if seen else ']\n')
+
+    seconds = time.time() - start_time
+    print(f"{len(seen)} articles ({duplicates} duplicates skipped) from {len(fps)} files")
+    print(f" processed. Total time taken {seconds:.2f}s, {len(fps) / seconds if seconds else 0:.0f} files/sec")
 
 
 if __name__ == "__main__":
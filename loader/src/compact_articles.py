@@ -0,0 +1,22 @@
+import argparse
+import time
+from src.article_store import ArticleStore, compact
+from src.config.base import file_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rewrite an article store without superseded records')
+    parser.add_argument('-s', dest='store_fp', required=True, type=file_path,
+                        help='Article store (.ndjson or .jsonl) written by get_articles')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    before, after = compact(args.store_fp)
+    with ArticleStore(args.store_fp) as store:
+        count = len(store)
+    print(f"Compacted {args.store_fp}: {count} articles, {before} -> {after} bytes "
+          f"in {time.time() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,26 @@
 import json
+import logging
+import re
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from src.config.base import TableAggType
 from src.config.settings import settings
 from src.config.es import es
 
+logger = logging.getLogger(__name__)
+
+# Dynamic index settings for the duration of a bulk load: no refreshes, no replicas to copy
+# every document to, and translog fsync in the background rather than on every bulk request
+LOAD_SETTINGS = {
+    'refresh_interval': '-1',
+    'number_of_replicas': 0,
+    'translog': {'durability': 'async'}
+}
+DEFAULT_MAX_NUM_SEGMENTS = 1
+# Previous physical indices kept per alias for rollback
+DEFAULT_KEEP_INDICES = 2
+
 
 def get_index_base_name(tsv_type: TableAggType):
     index_map = {
@@ -14,22 +31,136 @@ def get_index_base_name(tsv_type: TableAggType):
     return index_map.get(tsv_type)
 
 
-def create_index(tsv_type: TableAggType, prefix=None):
-    
+def get_index_alias(tsv_type: TableAggType, prefix=None):
+    """The name the API queries, e.g. pango-2-annotations"""
     base_name = get_index_base_name(tsv_type)
-    es_index = f"{prefix}-{base_name}" if prefix else base_name
+    return f"{prefix}-{base_name}" if prefix else base_name
+
 
-    es.options(ignore_status=[400, 404]).indices.delete(index=es_index)
-    es.options(ignore_status=[400, 404]).indices.create(index=es_index, settings=add_settings())
+def create_index(tsv_type: TableAggType, prefix=None, client=es):
+    """
+    Create a new timestamped physical index for the alias, e.g. pango-2-annotations-20250101120000.
+    Nothing reads from it until swap_aliases points the alias at it.
+    """
+    es_index = f"{get_index_alias(tsv_type, prefix)}-{time.strftime('%Y%m%d%H%M%S', time.gmtime())}"
+
+    client.indices.create(index=es_index, settings=add_settings())
      
     if(tsv_type == TableAggType.ANNOTATIONS.value):
-        es.indices.put_mapping(index=es_index, body=annotations_mapping())         
+        client.indices.put_mapping(index=es_index, body=annotations_mapping())         
     elif(tsv_type == TableAggType.GENES.value):
-        es.indices.put_mapping(index=es_index, body=genes_mapping()) 
+        client.indices.put_mapping(index=es_index, body=genes_mapping()) 
 
     return es_index
 
 
+def get_physical_indices(alias, client=es):
+    """Timestamped indices created for alias, oldest first"""
+    pattern = re.compile(rf"^{re.escape(alias)}-\d{{14}}$")
+    indices = client.indices.get(index=f"{alias}-*")
+    return sorted(es_index for es_index in indices if pattern.match(es_index))
+
+
+def get_alias_indices(alias, client=es):
+    """Indices alias currently points at"""
+    if not client.indices.exists_alias(name=alias):
+        return []
+    return sorted(client.indices.get_alias(name=alias))
+
+
+def warm_index(es_index, client=es):
+    """Run a first search against a loaded index before it is served. Returns its document count."""
+    with log_step(es_index, 'warming'):
+        client.search(index=es_index, size=10)
+        doc_count = client.count(index=es_index)['count']
+    logger.info(f"{es_index}: {doc_count} documents")
+    return doc_count
+
+
+def swap_aliases(new_indices, keep=DEFAULT_KEEP_INDICES, client=es):
+    """
+    Atomically point each alias in new_indices ({alias: es_index}) at its new index in one _aliases call,
+    so readers switch from the old indices to the new ones together. A concrete index still holding an
+    alias name, from before indices were aliased, is removed in the same call. Afterwards, all but the
+    newest keep previous indices per alias are deleted; keep=None deletes nothing.
+    """
+    actions = []
+    for alias, es_index in new_indices.items():
+        if client.indices.exists(index=alias) and not client.indices.exists_alias(name=alias):
+            actions.append({'remove_index': {'index': alias}})
+        for old_index in get_alias_indices(alias, client):
+            if old_index != es_index:
+                actions.append({'remove': {'index': old_index, 'alias': alias}})
+        actions.append({'add': {'index': es_index, 'alias': alias}})
+
+    with log_step(', '.join(new_indices), 'swapping aliases'):
+        client.indices.update_aliases(actions=actions)
+    for alias, es_index in new_indices.items():
+        logger.info(f"{alias} -> {es_index}")
+
+    if keep is not None:
+        for alias in new_indices:
+            prune_indices(alias, keep, client)
+
+
+def prune_indices(alias, keep=DEFAULT_KEEP_INDICES, client=es):
+    """Delete all but the newest keep physical indices alias is not pointing at"""
+    serving = set(get_alias_indices(alias, client))
+    old_indices = [es_index for es_index in get_physical_indices(alias, client) if es_index not in serving]
+    for es_index in old_indices[:max(len(old_indices) - keep, 0)]:
+        client.indices.delete(index=es_index)
+        logger.info(f"{alias}: deleted old index {es_index}")
+
+
+def rollback_aliases(aliases, client=es):
+    """Point each alias back at the physical index built before the one it serves now"""
+    previous_indices = {}
+    for alias in aliases:
+        serving = get_alias_indices(alias, client)
+        earlier = [es_index for es_index in get_physical_indices(alias, client)
+                   if serving and es_index < serving[0]]
+        if not earlier:
+            raise ValueError(f"No earlier index to roll {alias} back to")
+        previous_indices[alias] = earlier[-1]
+    swap_aliases(previous_indices, keep=None, client=client)
+    return previous_indices
+
+
+@contextmanager
+def log_step(es_index, step):
+    start_time = time.time()
+    yield
+    logger.info(f"{es_index}: {step} took {time.time() - start_time:.2f} seconds")
+
+
+def apply_load_settings(es_index, client=es):
+    with log_step(es_index, 'applying load settings'):
+        client.indices.put_settings(index=es_index, settings=LOAD_SETTINGS)
+
+
+def serving_settings():
+    # The dynamic settings LOAD_SETTINGS overrides, as configured in settings.json or the Elasticsearch defaults
+    data = add_settings()
+    return {
+        'refresh_interval': data.get('refresh_interval', '1s'),
+        'number_of_replicas': data.get('number_of_replicas', 1),
+        'translog': {'durability': data.get('translog', {}).get('durability', 'request')}
+    }
+
+
+def restore_serving_settings(es_index, max_num_segments=DEFAULT_MAX_NUM_SEGMENTS, client=es):
+    """
+    Undo apply_load_settings once the bulk load is done: restore the serving settings,
+    force-merge down to max_num_segments and refresh so the documents are searchable.
+    """
+    with log_step(es_index, 'restoring serving settings'):
+        client.indices.put_settings(index=es_index, settings=serving_settings())
+    with log_step(es_index, f'force-merging to {max_num_segments} segments'):
+        client.options(request_timeout=3600).indices.forcemerge(index=es_index, max_num_segments=max_num_segments)
+    with log_step(es_index, 'refreshing'):
+        client.indices.refresh(index=es_index)
+
+
 def add_settings():
     with open(Path('.') / 'data/es_settings/settings.json', 'r') as f:
         data = json.load(f)
@@ -4,6 +4,8 @@ import pandas as pd
 from pathlib import Path
 import argparse
 from typing import Dict, List, Set
+from src.article_store import read_articles
+from src.utils import is_ndjson, iter_evidence_refs
 
 def file_path(path):
     if Path(path).is_file():
@@ -22,6 +24,9 @@ def parse_arguments():
     return parser.parse_args()
 
 def load_json_file(filepath: str) -> List[Dict]:
+    if is_ndjson(filepath):
+        # e.g. the article store get_articles appends to
+        return list(read_articles(filepath))
     with open(filepath, 'r', encoding='utf-8') as f:
         return json.load(f)
 
@@ -49,8 +54,8 @@ def collect_referenced_entities(annotations: List[Dict]) -> Dict[str, Set]:
             for evidence in anno['evidence']:
                 if 'with_gene_id' in evidence:
                     references['with_genes'].add(evidence['with_gene_id'])
-                if 'references' in evidence:
-                    references['articles'].update(evidence['references'])
+    
+    references['articles'].update(iter_evidence_refs(annotations))
                     
     return references
 
@@ -3,7 +3,7 @@ import json
 from os import path as ospath
 import pandas as pd
 from src.config.base import file_path
-from src.utils import write_to_json
+from src.utils import is_ndjson, write_to_json
 
 COLUMNS_TO_EXTRACT = [
     'gene_symbol',
@@ -37,16 +37,20 @@ def parse_arguments():
     return parser.parse_args()
 
 
+def strip_term(term, evidence_type):
+    term = term.copy()
+    term.pop('is_goslim', None)
+    term['evidence_type'] = evidence_type
+    return term
+
 def uniquify_term(series, evidence_series):
     unique_terms = {}
     term_counts = {}
 
-    for idx, item in enumerate(series):
+    for item, evidence_type in zip(series, evidence_series):
         if isinstance(item, dict):
             term_id = item['id']
-            term = item.copy()  
-            term.pop('is_goslim', None)
-            term['evidence_type'] = evidence_series.iloc[idx] 
+            term = strip_term(item, evidence_type)
             
             if term_id in term_counts:
                 raise ValueError(f"Duplicate term found: {term}")
@@ -59,12 +63,10 @@ def uniquify_term(series, evidence_series):
 
 def uniquify_slim_terms(series, evidence_series):
     unique_terms = {}
-    for idx, item_list in enumerate(series):
+    for item_list, evidence_type in zip(series, evidence_series):
         if isinstance(item_list, list):
             for item in item_list:
-                term = item.copy()  
-                term.pop('is_goslim', None) 
-                term['evidence_type'] = evidence_series.iloc[idx] 
+                term = strip_term(item, evidence_type)
                 unique_terms[term['id']] = term
     return list(unique_terms.values())
 
@@ -81,11 +83,45 @@ def group_terms(group):
 
 
 
-def get_annos(annos_fp):   
-
-    annos_df = pd.read_json(annos_fp)
+def get_annos(annos_fp):
+    annos_df = pd.read_json(annos_fp, lines=is_ndjson(annos_fp))
     annos_df = annos_df.drop(['evidence'], axis=1)
-    genes_df = annos_df.groupby('gene').apply(group_terms).reset_index()
+
+    return get_genes_df(annos_df)
+
+
+def get_genes_df(annos_df):
+    """
+    One document per gene, in a single pass over the annotations: the first annotation's gene columns,
+    its unique terms and slim terms tagged with their evidence type, most annotated genes first.
+    Builds the same frame as groupby('gene').apply(group_terms) without a pandas group per gene.
+    """
+    genes = dict()
+    rows = zip(annos_df['gene'], annos_df['term'], annos_df['slim_terms'], annos_df['evidence_type'],
+               zip(*(annos_df[col] for col in COLUMNS_TO_EXTRACT)))
+    for gene, term, slim_terms, evidence_type, values in rows:
+        if pd.isna(gene):
+            # groupby drops rows without a gene
+            continue
+        if gene not in genes:
+            genes[gene] = (values, dict(), dict())
+        _, unique_terms, unique_slim_terms = genes[gene]
+        if isinstance(term, dict):
+            if term['id'] in unique_terms:
+                raise ValueError(f"Duplicate term found: {strip_term(term, evidence_type)}")
+            unique_terms[term['id']] = strip_term(term, evidence_type)
+        if isinstance(slim_terms, list):
+            for slim_term in slim_terms:
+                # A later annotation's evidence type wins, in the place of the first
+                unique_slim_terms[slim_term['id']] = strip_term(slim_term, evidence_type)
+
+    records = list()
+    for gene in sorted(genes):
+        values, unique_terms, unique_slim_terms = genes[gene]
+        records.append((gene, *values, list(unique_terms.values()), list(unique_slim_terms.values()),
+                        len(unique_terms)))
+    genes_df = pd.DataFrame.from_records(
+        records, columns=['gene', *COLUMNS_TO_EXTRACT, 'terms', 'slim_terms', 'term_count'])
     genes_df = genes_df.sort_values(by='term_count', ascending=False).reset_index(drop=True)
 
     return genes_df
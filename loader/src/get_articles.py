@@ -1,122 +1,123 @@
 import os
 from pathlib import Path
 import time
-import requests
+import logging
 from os import path as ospath
 import json
 import argparse
-import pandas as pd
 from sys import path
 from src.config.base import file_path
-from src.utils import load_json
+from src.pubmed import DEFAULT_BATCH_SIZE, DEFAULT_THREAD_COUNT, EUTILS_URL, fetch_articles
+from src.article_store import ArticleStore, read_articles
+from src.utils import is_ndjson, iter_unique_refs, load_json
 
-pubmed_api = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi?db=pubmed&retmode=json&id='
+logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s', level=logging.INFO)
+
+logger = logging.getLogger(__name__)
 
 def main():
     parser = parse_arguments()
     annotations_fp = parser.annotations_fp
-    out_fp = parser.out_fp
-    existing_articles_fp = parser.existing_articles or out_fp  # Use output file as default for existing articles
+    out_fp, json_fp = get_store_paths(parser.out_fp)
+    # A JSON array written by an earlier run is imported into the store
+    existing_articles_fp = parser.existing_articles or json_fp
+
+    failed_fp = parser.failed_fp or out_fp + '.failed.json'
 
-    get_pubmed_metadata(annotations_fp, out_fp, existing_articles_fp)
+    get_pubmed_metadata(annotations_fp, out_fp, existing_articles_fp, failed_fp, json_fp,
+                        eutils_url=parser.eutils_url, api_key=parser.api_key,
+                        batch_size=parser.batch_size, thread_count=parser.thread_count)
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Loads pmids',
                                    epilog='It works!')
     parser.add_argument('-a', dest='annotations_fp', required=True,
                        type=file_path, help='Annotations Json (dirty one)')
-    parser.add_argument('-o', dest='out_fp', required=True,
-                       help='Metadata output file')
+    parser.add_argument('-o', dest='out_fp', required=True, type=article_store_path,
+                       help='Article store (.ndjson or .jsonl), only PMIDs missing from it are fetched and appended. '
+                            'A .json path is deprecated: the store is kept next to it and the JSON array rewritten')
     parser.add_argument('-e', dest='existing_articles', required=False,
-                       help='Existing articles JSON file (defaults to output file if not specified)')
+                       help='Existing articles JSON or NDJSON file to import into the store first')
+    parser.add_argument('-f', dest='failed_fp', required=False,
+                       help='Failed PMIDs manifest (defaults to the output file with .failed.json)')
+    parser.add_argument('--api-key', dest='api_key', default=os.environ.get('NCBI_API_KEY'),
+                       help='NCBI API key, raising the rate limit from 3 to 10 requests/sec (default: $NCBI_API_KEY)')
+    parser.add_argument('--eutils-url', dest='eutils_url', default=EUTILS_URL,
+                       help='eUtils base URL')
+    parser.add_argument('-b', dest='batch_size', type=int, default=DEFAULT_BATCH_SIZE,
+                       help='PMIDs per esummary request')
+    parser.add_argument('-t', dest='thread_count', type=int, default=DEFAULT_THREAD_COUNT,
+                       help='Concurrent esummary requests')
     return parser.parse_args()
 
-def get_unique_refs(annotations_fp):
-    refs = set()
-    annotations_df = pd.read_json(annotations_fp)    
-    
-    for evidences in list(annotations_df['evidence']):
-        for evidence in evidences:
-            for ref in evidence['references']:
-                refs.add(ref)
-            
-    return list(refs)
+def article_store_path(value):
+    if value.endswith('.json'):
+        return value
+    if not is_ndjson(value) or value.endswith('.gz'):
+        raise argparse.ArgumentTypeError(
+            f"{value} is not an article store, use an .ndjson or .jsonl path (import a JSON array with -e)")
+    return value
 
-def parse_article(res):      
-    article = dict()
-    article['pmid'] = 'PMID:'+res['uid']
-    article['title'] = res.get('title', "")
-    article['date'] = res.get('pubdate', None)
-    if res['authors'] is not None and isinstance(res['authors'], list):
-        article['authors'] = [author['name'] for author in res['authors']]
-   
-    return article
+def get_store_paths(out_fp):
+    """
+    The article store for -o, and the JSON array to keep writing when -o is a deprecated .json path,
+    e.g. (articles.ndjson, articles.json) for articles.json
+    """
+    if not out_fp.endswith('.json'):
+        return out_fp, None
+    store_fp = out_fp[:-len('.json')] + '.ndjson'
+    logger.warning(f"-o {out_fp} is deprecated, articles are kept in the store {store_fp} and {out_fp} is "
+                   f"rewritten from it on every run; pass -o {store_fp} instead")
+    return store_fp, out_fp
 
-def load_existing_articles(file_path):
-    try:
-        if file_path and ospath.exists(file_path):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except json.JSONDecodeError:
-        print(f"Warning: Could not parse existing articles file {file_path}. Starting fresh.")
-    except Exception as e:
-        print(f"Warning: Error reading existing articles file {file_path}: {str(e)}. Starting fresh.")
-    return []
+def get_unique_refs(annotations_fp):
+    return list(iter_unique_refs(annotations_fp))
 
-def get_pubmed_metadata(annotations_fp, out_fp, existing_articles_fp):
+def get_pubmed_metadata(annotations_fp, out_fp, existing_articles_fp=None, failed_fp=None, json_fp=None,
+                        **fetch_options):
     start_time = time.time()
     
-    # Load existing articles
-    existing_articles = load_existing_articles(existing_articles_fp)
-    existing_pmids = {article['pmid'] for article in existing_articles}
-    
-    # Get all PMIDs from annotations
-    all_pmids = [x.replace('PMID:', '') for x in get_unique_refs(annotations_fp)]
-    print(f"Found {len(all_pmids)} total PMIDs in annotations")
-    
-    # Filter out PMIDs that already exist
-    new_pmids = [pmid for pmid in all_pmids if f'PMID:{pmid}' not in existing_pmids]    
-    print(f"Total PMIDs: {len(all_pmids)} (New: {len(new_pmids)}, Existing: {len(existing_pmids)})")
-    
-    end = len(new_pmids)
-    step = 100
-    
-    pubmed_json = list(existing_articles)  # Start with existing articles
+    out_dir = os.path.dirname(out_fp)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
     
-    # Only fetch new PMIDs
-    if new_pmids:
-        for i in range(0, end, step):
-            x = i
-            batch = new_pmids[x:x+step]
-            time.sleep(2)
-            try:
-                response = requests.get(pubmed_api + ",".join(batch))
-                response.raise_for_status()  # Raise an exception for bad status codes
-                res = response.json()['result']
-                new_articles = [parse_article(res[uid]) for uid in res['uids']]
-                pubmed_json.extend(new_articles)
-                print(f"Processed {min(x+step, end)}/{end} new articles")
-            except Exception as e:
-                print(f"Error processing batch {x}-{x+step}: {str(e)}")
-                print(f"Skipping batch and continuing...")
-                continue
+    with ArticleStore(out_fp) as store:
+        existing_count = len(store)
+        # Import articles from another file, e.g. a JSON array written before the store
+        if existing_articles_fp and existing_articles_fp != out_fp and ospath.exists(existing_articles_fp):
+            imported = store.add(read_articles(existing_articles_fp))
+            print(f"Imported {imported} articles from {existing_articles_fp}")
+            existing_count += imported
+        
+        # Get all PMIDs from annotations
+        all_pmids = [x.replace('PMID:', '') for x in get_unique_refs(annotations_fp)]
+        print(f"Found {len(all_pmids)} total PMIDs in annotations")
+        
+        # Filter out PMIDs that already exist
+        new_pmids = [pmid for pmid in all_pmids if f'PMID:{pmid}' not in store]
+        print(f"Total PMIDs: {len(all_pmids)} (New: {len(new_pmids)}, Existing: {existing_count})")
+        
+        # Only fetch new PMIDs, appending each batch to the store as it arrives
+        failed = dict()
+        fetched = 0
+        if new_pmids:
+            stats = fetch_articles(new_pmids, store.add, **fetch_options)
+            failed = stats.failed
+            fetched = stats.fetched
+        total = len(store)
     
-    # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(out_fp), exist_ok=True)
+    if json_fp:
+        # For readers of the JSON array -o used to write
+        write_to_json(list(read_articles(out_fp)), json_fp)
     
-    # Write to temporary file first to avoid corruption
-    temp_file = out_fp + '.tmp'
-    try:
-        write_to_json(pubmed_json, temp_file)
-        os.replace(temp_file, out_fp)  # Atomic replacement
-    except Exception as e:
-        print(f"Error writing output file: {str(e)}")
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
-        raise
+    if failed_fp:
+        # Failed PMIDs are not in the output, so the next run tries them again
+        write_to_json([{'pmid': pmid, 'error': error} for pmid, error in sorted(failed.items())], failed_fp)
+        if failed:
+            print(f"{len(failed)} PMIDs failed, listed in {failed_fp}")
     
     print(f"Processing complete. Total time taken {time.time() - start_time:.2f}s")
-    print(f"Total articles: {len(pubmed_json)} (New: {len(new_pmids)}, Existing: {len(existing_articles)})")
+    print(f"Total articles: {total} (New: {fetched}, Failed: {len(failed)}, Existing: {existing_count})")
 
 def write_to_json(json_data, output_file):
     with open(output_file, 'w', encoding='utf-8') as outfile:
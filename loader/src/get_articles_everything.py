@@ -5,10 +5,9 @@ import requests
 from os import path as ospath
 import json
 import argparse
-import pandas as pd
 from sys import path
 from src.config.base import file_path
-from src.utils import load_json
+from src.utils import iter_unique_refs, load_json
 
 pubmed_api= 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi?db=pubmed&retmode=json&id='
 
@@ -42,15 +41,7 @@ def parse_arguments():
 
 
 def get_unique_refs(annotations_fp):
-    refs = set()
-    annotations_df = pd.read_json(annotations_fp)    
-        
-    for evidences in list(annotations_df['evidence']):
-        for evidence in evidences:
-            for ref in evidence['references']:
-                refs.add(ref)
-            
-    return list(refs)
+    return list(iter_unique_refs(annotations_fp))
 
 
 def get_pubmed_metadata(annotations_fp: path, out_dir):
@@ -1,13 +1,17 @@
 import load_env
+import hashlib
 import time
 import logging
-from elasticsearch import helpers
-import ijson
 import argparse
+from src.bulk import (DEFAULT_CHUNK_SIZE, DEFAULT_INITIAL_BACKOFF, DEFAULT_MAX_CHUNK_BYTES, DEFAULT_MAX_RETRIES,
+                      DEFAULT_THREAD_COUNT, parallel_bulk_load)
+from src.checkpoint import DEFAULT_CHECKPOINT_FILE, LoadCheckpoint
 from src.config.es import es
 from src.config.base import TableAggType, file_path
-from src.create_index import create_index
-from typing import Generator, Tuple, Any
+from src.create_index import (DEFAULT_KEEP_INDICES, DEFAULT_MAX_NUM_SEGMENTS, apply_load_settings, create_index,
+                              get_index_alias, restore_serving_settings, rollback_aliases, swap_aliases, warm_index)
+from src.utils import iter_json_records
+from typing import Generator, Iterable, Optional, Tuple, Any
 
 # Configure logging
 logging.basicConfig(
@@ -25,16 +29,14 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument(
         '-a', 
         dest='annotations_file',
-        required=True,
         type=file_path,
-        help='Path to annotations JSON file'
+        help='Path to annotations JSON or NDJSON (.ndjson/.jsonl, optionally .gz) file'
     )
     parser.add_argument(
         '-g',
         dest='genes_file',
-        required=True,
         type=file_path,
-        help='Path to genes JSON file'
+        help='Path to genes JSON or NDJSON (.ndjson/.jsonl, optionally .gz) file'
     )
     parser.add_argument(
         '-p',
@@ -43,15 +45,95 @@ def parse_arguments() -> argparse.Namespace:
         type=str,
         help='Prefix for index names (optional)'
     )
+    parser.add_argument(
+        '-w',
+        dest='thread_count',
+        default=DEFAULT_THREAD_COUNT,
+        type=int,
+        help=f'Concurrent bulk requests (default {DEFAULT_THREAD_COUNT})'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        dest='chunk_size',
+        default=DEFAULT_CHUNK_SIZE,
+        type=int,
+        help=f'Documents per bulk request (default {DEFAULT_CHUNK_SIZE})'
+    )
+    parser.add_argument(
+        '--max-chunk-bytes',
+        dest='max_chunk_bytes',
+        default=DEFAULT_MAX_CHUNK_BYTES,
+        type=int,
+        help=f'Maximum bulk request size in bytes (default {DEFAULT_MAX_CHUNK_BYTES})'
+    )
+    parser.add_argument(
+        '--max-retries',
+        dest='max_retries',
+        default=DEFAULT_MAX_RETRIES,
+        type=int,
+        help=f'Retries with exponential backoff for documents rejected with 429 (default {DEFAULT_MAX_RETRIES})'
+    )
+    parser.add_argument(
+        '--initial-backoff',
+        dest='initial_backoff',
+        default=DEFAULT_INITIAL_BACKOFF,
+        type=float,
+        help=f'Seconds before the first 429 retry, doubled on each retry (default {DEFAULT_INITIAL_BACKOFF})'
+    )
+    parser.add_argument(
+        '--max-segments',
+        dest='max_num_segments',
+        default=DEFAULT_MAX_NUM_SEGMENTS,
+        type=int,
+        help=f'Segments to force-merge each index down to after loading (default {DEFAULT_MAX_NUM_SEGMENTS})'
+    )
+    parser.add_argument(
+        '--no-load-settings',
+        dest='load_settings',
+        action='store_false',
+        help='Load with the serving settings instead of refresh off, no replicas and async translog'
+    )
+    parser.add_argument(
+        '--keep-indices',
+        dest='keep_indices',
+        default=DEFAULT_KEEP_INDICES,
+        type=int,
+        help=f'Previous indices to keep per alias for rollback after the swap (default {DEFAULT_KEEP_INDICES})'
+    )
+    parser.add_argument(
+        '--rollback',
+        action='store_true',
+        help='Point the aliases back at the previous indices instead of loading; -a and -g are not needed'
+    )
+    parser.add_argument(
+        '--allow-errors',
+        dest='allow_errors',
+        action='store_true',
+        help='Swap the aliases even if some records failed to load, instead of stopping before the swap'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continue an interrupted load from its checkpoint, only shipping records not yet acknowledged'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        dest='checkpoint_file',
+        default=DEFAULT_CHECKPOINT_FILE,
+        type=str,
+        help=f'Checkpoint file of the records acknowledged per input (default {DEFAULT_CHECKPOINT_FILE})'
+    )
     
     return parser.parse_args()
 
-def load_json(j_file: str) -> Generator[dict, None, None]:
+def load_json(j_file: str, skip: int = 0) -> Generator[dict, None, None]:
     """
-    Load and yield items from a JSON file using streaming parser.
+    Load and yield items from a JSON array or NDJSON file (optionally gzipped)
+    one at a time, so memory stays flat regardless of file size.
     
     Args:
         j_file: Path to JSON file
+        skip: Number of leading items to skip, e.g. already indexed ones
         
     Yields:
         Dictionary containing each JSON item
@@ -59,10 +141,7 @@ def load_json(j_file: str) -> Generator[dict, None, None]:
     start_time = time.time()
     
     try:
-        with open(j_file, 'r', encoding="utf8") as open_file:
-            parser = ijson.parse(open_file)
-            for value in ijson.items(parser, 'item'):
-                yield value
+        yield from iter_json_records(j_file, skip)
                 
     except Exception as e:
         logger.error(f"Error loading JSON file {j_file}: {str(e)}")
@@ -72,54 +151,157 @@ def load_json(j_file: str) -> Generator[dict, None, None]:
         duration = time.time() - start_time
         logger.info(f"JSON loading took {duration:.2f} seconds")
 
-def bulk_load(j_file: str, index_name: str) -> Tuple[int, list]:
+def get_doc_id(tsv_type: str, doc: dict) -> str:
+    """
+    Document ID derived from the record itself, so shipping a record again overwrites it instead of
+    adding a duplicate: the gene for genes, a hash of gene, term and qualifier for annotations.
+    """
+    if tsv_type == TableAggType.GENES.value:
+        return doc['gene']
+    key = '\t'.join([doc['gene'], doc['term']['id'], doc.get('qualifier') or ''])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def with_doc_ids(docs: Iterable[dict], tsv_type: str) -> Generator[dict, None, None]:
+    for doc in docs:
+        doc_id = get_doc_id(tsv_type, doc)
+        if tsv_type == TableAggType.ANNOTATIONS.value:
+            # Also kept in the source, as the unique sort key the API pages annotations with
+            doc = dict(doc, doc_id=doc_id)
+        yield {'_id': doc_id, '_source': doc}
+
+
+def bulk_load(j_file: str, index_name: str, tsv_type: str, checkpoint: Optional[LoadCheckpoint] = None,
+              skip: int = 0, **bulk_options) -> Tuple[int, list]:
     """
-    Bulk load data into Elasticsearch index.
+    Bulk load data into Elasticsearch index with parallel bulk requests.
     
     Args:
         j_file: Path to JSON file
         index_name: Name of the Elasticsearch index
+        tsv_type: annotations or genes, for the document IDs
+        checkpoint: Records the offset of the acknowledged records in j_file as chunks complete
+        skip: Number of leading records already indexed
+        bulk_options: thread_count, chunk_size, max_chunk_bytes, max_retries,
+            initial_backoff passed on to parallel_bulk_load
         
     Returns:
         Tuple of (number of successful operations, list of errors)
     """
+    on_progress = None
+    if checkpoint:
+        def on_progress(acknowledged):
+            checkpoint.update(j_file, skip + acknowledged)
+
     try:
-        success, errors = helpers.bulk(
-            es,
-            load_json(j_file),
-            index=index_name,
-            chunk_size=100,
-            request_timeout=200
+        stats = parallel_bulk_load(
+            es.options(request_timeout=200),
+            with_doc_ids(load_json(j_file, skip), tsv_type),
+            index_name,
+            on_progress=on_progress,
+            **bulk_options
         )
-        logger.info(f"Successfully loaded {success} documents into {index_name}")
-        return success, errors
+        logger.info(f"Successfully loaded {stats.success} documents into {index_name}")
+        if stats.errors:
+            logger.error(f"Bulk loading errors for {index_name}: {str(stats.errors[:10])}")
+        return stats.success, stats.errors
     
-    except helpers.BulkIndexError as e:
-        logger.error(f"Bulk loading error for {index_name}: {str(e.errors)}")
-        return 0, e.errors
     except Exception as e:
         logger.error(f"Unexpected error during bulk loading: {str(e)}")
         raise
 
 
+def load_index(j_file: str, tsv_type: str, args: argparse.Namespace, bulk_options: dict,
+               checkpoint: LoadCheckpoint) -> Tuple[str, int, list]:
+    """
+    Bulk load j_file into a new index, under the load settings unless disabled, then make it ready to serve.
+    If checkpoint has the file, continue loading the index it was going into after the acknowledged records.
+    The file is only marked done in the checkpoint if every record was indexed, so --resume retries the rest.
+
+    Returns:
+        Tuple of (index name, number of successful operations, list of errors)
+    """
+    start_time = time.time()
+    entry = checkpoint.entry(j_file)
+    if entry is None:
+        index_name = create_index(tsv_type, args.index_prefix)
+        checkpoint.start(j_file, index_name)
+        skip = 0
+    else:
+        index_name, skip = entry['index'], entry['offset']
+        if not es.indices.exists(index=index_name):
+            raise ValueError(f"Checkpointed index {index_name} no longer exists, cannot resume")
+        state = 'already loaded' if entry['done'] else f"resuming after {skip} records"
+        logger.info(f"{index_name}: {state} from {j_file}")
+        print(f"{index_name}: {state}")
+
+    success, errors = 0, []
+    if entry is None or not entry['done']:
+        if args.load_settings:
+            apply_load_settings(index_name)
+        success, errors = bulk_load(j_file, index_name, tsv_type, checkpoint, skip, **bulk_options)
+        if errors:
+            logger.error(f"{index_name}: {len(errors)} errors loading {j_file}, left resumable in the checkpoint")
+        else:
+            checkpoint.finish(j_file)
+    if args.load_settings:
+        restore_serving_settings(index_name, args.max_num_segments)
+    logger.info(f"{index_name}: load took {time.time() - start_time:.2f} seconds in total")
+    return index_name, success, errors
+
+
 def main() -> None:
     
     try:
         args = parse_arguments()
         
-        # Create and load annotations index
-        annotations_index = create_index(TableAggType.ANNOTATIONS.value, args.index_prefix)
-    
-        success, errors = bulk_load(args.annotations_file, annotations_index)
-        if errors:
-            logger.warning(f"Annotations loading had {len(errors)} errors")
-        
-        # Create and load genes index
-        genes_index = create_index(TableAggType.GENES.value, args.index_prefix)
+        bulk_options = {
+            'thread_count': args.thread_count,
+            'chunk_size': args.chunk_size,
+            'max_chunk_bytes': args.max_chunk_bytes,
+            'max_retries': args.max_retries,
+            'initial_backoff': args.initial_backoff,
+        }
+
+        aliases = [get_index_alias(tsv_type, args.index_prefix)
+                   for tsv_type in (TableAggType.ANNOTATIONS.value, TableAggType.GENES.value)]
+        if args.rollback:
+            for alias, es_index in rollback_aliases(aliases).items():
+                print(f"{alias} -> {es_index}")
+            return
+        if not (args.annotations_file and args.genes_file):
+            raise ValueError("-a and -g are required unless rolling back")
+
+        # Build new annotations and genes indices next to the ones being served
+        checkpoint = LoadCheckpoint.load(args.checkpoint_file) if args.resume else LoadCheckpoint(args.checkpoint_file)
+
+        annotations_index, success, errors = load_index(
+            args.annotations_file, TableAggType.ANNOTATIONS.value, args, bulk_options, checkpoint
+        )
+        annotations_errors = errors
         
-        success, errors = bulk_load(args.genes_file, genes_index)
-        if errors:
-            logger.warning(f"Genes loading had {len(errors)} errors")
+        genes_index, success, errors = load_index(
+            args.genes_file, TableAggType.GENES.value, args, bulk_options, checkpoint
+        )
+        load_errors = f"{len(annotations_errors)} annotations and {len(errors)} genes errors"
+        if (annotations_errors or errors) and not args.allow_errors:
+            # Serving a partial release is worse than serving the previous one
+            raise ValueError(f"Loading had {load_errors}, not swapping aliases; "
+                             f"rerun with --resume to retry them, or --allow-errors to swap anyway")
+
+        new_indices = dict(zip(aliases, [annotations_index, genes_index]))
+        for es_index in new_indices.values():
+            if not warm_index(es_index):
+                raise ValueError(f"{es_index} is empty, not swapping aliases")
+
+        # Switch both aliases in one atomic request, keeping previous indices for rollback
+        swap_aliases(new_indices, args.keep_indices)
+        for alias, es_index in new_indices.items():
+            print(f"{alias} -> {es_index}")
+        if annotations_errors or errors:
+            logger.warning(f"Swapped aliases with {load_errors}, keeping checkpoint {checkpoint.path}")
+        else:
+            checkpoint.remove()
             
     except Exception as e:
         logger.error(f"Fatal error in main execution: {str(e)}")
@@ -0,0 +1,216 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import requests
+from src.utils import chunked
+
+logger = logging.getLogger(__name__)
+
+EUTILS_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/'
+# NCBI's documented limits: 3 requests/sec per IP, 10 with an API key
+DEFAULT_RATE = 3
+API_KEY_RATE = 10
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_THREAD_COUNT = 4
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_INITIAL_BACKOFF = 1
+DEFAULT_MAX_BACKOFF = 30
+DEFAULT_TIMEOUT = 60
+
+
+class TokenBucket:
+    """
+    Thread-safe rate limiter: rate tokens a second, at most capacity banked. acquire() blocks
+    until a token is free, so callers across threads never exceed rate requests a second
+    beyond the initial capacity.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            self.sleep(wait_time)
+
+
+class FetchStats:
+    """Articles fetched, PMIDs that failed and throughput for one run"""
+
+    def __init__(self):
+        self.fetched = 0
+        self.requests = 0
+        self.failed: Dict[str, str] = dict()
+        self.start_time = time.time()
+        self.duration = 0.0
+
+    def finish(self) -> None:
+        self.duration = time.time() - self.start_time
+
+    @property
+    def articles_per_sec(self) -> float:
+        return self.fetched / self.duration if self.duration else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.fetched} articles in {self.duration:.1f}s ({self.articles_per_sec:.0f} articles/sec, "
+                f"{self.requests} requests), {len(self.failed)} failed")
+
+
+class RetryableError(Exception):
+    pass
+
+
+def parse_article(res):
+    article = dict()
+    article['pmid'] = 'PMID:' + res['uid']
+    article['title'] = res.get('title', "")
+    article['date'] = res.get('pubdate', None)
+    if res.get('authors') is not None and isinstance(res['authors'], list):
+        article['authors'] = [author['name'] for author in res['authors']]
+
+    return article
+
+
+def post_esummary(session: requests.Session, eutils_url: str, pmids: List[str], api_key: Optional[str],
+                  timeout: float) -> dict:
+    # POST, so a batch of a few hundred ids is not limited by the URL length
+    data = {'db': 'pubmed', 'retmode': 'json', 'id': ','.join(pmids)}
+    if api_key:
+        data['api_key'] = api_key
+    response = session.post(eutils_url.rstrip('/') + '/esummary.fcgi', data=data, timeout=timeout)
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RetryableError(f"HTTP {response.status_code}")
+    response.raise_for_status()
+    body = response.json()
+    if 'result' not in body:
+        # e.g. {"error": "API rate limit exceeded"} with a 200
+        raise RetryableError(body.get('error', 'no result in response'))
+    return body['result']
+
+
+def fetch_batch(
+    pmids: List[str],
+    get_session: Callable[[], requests.Session],
+    bucket: TokenBucket,
+    eutils_url: str,
+    api_key: Optional[str],
+    max_retries: int,
+    initial_backoff: float,
+    max_backoff: float,
+    timeout: float
+) -> Tuple[List[dict], Dict[str, str], int]:
+    """
+    esummary for one batch of numeric PMIDs, retrying failed requests with full jitter
+    (a random wait up to initial_backoff * 2 ** attempt, capped at max_backoff).
+
+    Returns:
+        Tuple of (articles, errors by PMID for the PMIDs without an article, requests made)
+    """
+    attempt = 0
+    while True:
+        bucket.acquire()
+        try:
+            result = post_esummary(get_session(), eutils_url, pmids, api_key, timeout)
+            break
+        except (RetryableError, requests.ConnectionError, requests.Timeout, ValueError) as e:
+            if attempt >= max_retries:
+                return [], {'PMID:' + pmid: str(e) for pmid in pmids}, attempt + 1
+            time.sleep(random.uniform(0, min(max_backoff, initial_backoff * 2 ** attempt)))
+            attempt += 1
+        except requests.RequestException as e:
+            return [], {'PMID:' + pmid: str(e) for pmid in pmids}, attempt + 1
+
+    articles = list()
+    errors = dict()
+    for pmid in pmids:
+        res = result.get(pmid)
+        if res is None or 'error' in res:
+            errors['PMID:' + pmid] = res['error'] if res else 'not in response'
+        else:
+            articles.append(parse_article(res))
+    return articles, errors, attempt + 1
+
+
+def fetch_articles(
+    pmids: Iterable[str],
+    on_articles: Callable[[List[dict]], None],
+    eutils_url: str = EUTILS_URL,
+    api_key: Optional[str] = None,
+    rate: Optional[float] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    thread_count: int = DEFAULT_THREAD_COUNT,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+    max_backoff: float = DEFAULT_MAX_BACKOFF,
+    timeout: float = DEFAULT_TIMEOUT
+) -> FetchStats:
+    """
+    Fetch PubMed summaries for numeric PMIDs with thread_count concurrent esummary requests,
+    started no faster than rate a second (3, or 10 with an API key, by default).
+
+    Args:
+        pmids: Numeric PMIDs, without the PMID: prefix
+        on_articles: Called from this thread with the articles of each batch as it completes
+        eutils_url: eUtils base URL, e.g. a local mock server for tests
+        api_key: NCBI API key
+        rate: Requests a second
+        batch_size: PMIDs per esummary request
+        thread_count: Concurrent requests
+        max_retries: Retries for a batch after connection errors, timeouts, 429 and 5xx responses
+        initial_backoff: Upper bound in seconds of the random wait before the first retry, doubled on each retry
+        max_backoff: Maximum upper bound in seconds of the wait between retries
+        timeout: Seconds to wait for a response
+
+    Returns:
+        FetchStats with the articles fetched and the error for each PMID that failed
+    """
+    bucket = TokenBucket(rate or (API_KEY_RATE if api_key else DEFAULT_RATE))
+    stats = FetchStats()
+    local = threading.local()
+
+    def get_session() -> requests.Session:
+        # One session, and its kept-alive connection, per worker thread
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    def collect(futures):
+        for future in futures:
+            pending.remove(future)
+            articles, errors, request_count = future.result()
+            stats.fetched += len(articles)
+            stats.failed.update(errors)
+            stats.requests += request_count
+            if articles:
+                on_articles(articles)
+        logger.info(f"Fetched {stats.fetched} articles, {len(stats.failed)} failed")
+
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        pending = set()
+        for batch in chunked(pmids, batch_size):
+            if len(pending) >= thread_count * 2:
+                collect(wait(pending, return_when=FIRST_COMPLETED).done)
+            pending.add(executor.submit(fetch_batch, batch, get_session, bucket, eutils_url, api_key,
+                                        max_retries, initial_backoff, max_backoff, timeout))
+        collect(wait(pending).done)
+
+    stats.finish()
+    logger.info(str(stats))
+    return stats
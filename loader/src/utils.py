@@ -1,5 +1,9 @@
 import gzip
 import json
+from itertools import islice
+import ijson
+import pandas as pd
+from pandas.api.types import is_scalar
     
 
 def write_to_json(json_data, output_file, indent=None, cls=None, zip=False):
@@ -11,6 +15,79 @@ def write_to_json(json_data, output_file, indent=None, cls=None, zip=False):
             json.dump(json_data, outfile, cls=cls, ensure_ascii=False, indent=indent)
 
 
+def is_ndjson(filepath):
+    # One JSON record per line: *.ndjson or *.jsonl, optionally gzipped
+    if filepath.endswith('.gz'):
+        filepath = filepath[:-len('.gz')]
+    return filepath.endswith(('.ndjson', '.jsonl'))
+
+
+def open_file(filepath, mode='r'):
+    # Transparently (de)compresses *.gz
+    if filepath.endswith('.gz'):
+        return gzip.open(filepath, mode if 'b' in mode else mode + 't', encoding=None if 'b' in mode else 'utf-8')
+    return open(filepath, mode, encoding=None if 'b' in mode else 'utf-8')
+
+
+def iter_json_records(filepath, skip=0):
+    """
+    Yield records one at a time from a JSON array or NDJSON file, gzipped or not,
+    after the first skip records. Skipped NDJSON lines are not parsed.
+    """
+    if is_ndjson(filepath):
+        with open_file(filepath) as f:
+            for line in islice((line for line in f if line.strip()), skip, None):
+                yield json.loads(line)
+    else:
+        with open_file(filepath, 'rb') as f:
+            yield from islice(ijson.items(f, 'item', use_float=True), skip, None)
+
+
+def iter_evidence_refs(annotations):
+    """Yield the references of every evidence of the annotations, repeats included"""
+    for anno in annotations:
+        for evidence in anno.get('evidence') or ():
+            yield from evidence.get('references') or ()
+
+
+def iter_unique_refs(filepath):
+    """
+    Yield the unique evidence references of a raw annotations file (JSON array or NDJSON, gzipped
+    or not) in first-seen order. The file is streamed, so memory is bounded by the unique references.
+    """
+    seen = set()
+    with open_file(filepath, 'rb') as f:
+        if is_ndjson(filepath):
+            refs = iter_evidence_refs(json.loads(line) for line in f if line.strip())
+        else:
+            # Only the reference strings are built, not the annotations around them
+            refs = ijson.items(f, 'item.evidence.item.references.item')
+        for ref in refs:
+            if ref not in seen:
+                seen.add(ref)
+                yield ref
+
+
+def chunked(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_df_chunks_to_ndjson(df_chunks, output_file):
+    """Write each DataFrame's rows as NDJSON records as the chunks arrive. Returns the number of records written"""
+    record_count = 0
+    with open_file(output_file, 'w') as outfile:
+        for df in df_chunks:
+            lines = df.to_json(orient="records", lines=True, default_handler=None)
+            outfile.write(lines if lines.endswith('\n') else lines + '\n')
+            record_count += len(df)
+    return record_count
+
+
 def load_json(filepath):
     with open(filepath, encoding='utf-8') as f:
         return json.load(f)
@@ -25,3 +102,11 @@ def get_pd_row_key(df, k):
     except KeyError:
         return None
 
+
+def drop_na(row):
+    return {k: v for k, v in row.items() if not (is_scalar(v) and pd.isna(v))}
+
+
+def get_pd_row_lookup(df):
+    # {k: get_pd_row(df, k)} for every row, built in one pass instead of one df.loc per lookup
+    return {k: drop_na(row) for k, row in zip(df.index, df.to_dict('records'))}
@@ -0,0 +1,242 @@
+"""
+Minimal stand-in for the Elasticsearch endpoints index_es talks to during bulk loading.
+
+Accepts `_bulk` requests, keeps the indexed documents, index settings and aliases in memory and can
+reject items or whole requests with 429 to exercise retry/backoff. Usable from tests as a
+context manager, or standalone for local runs:
+
+    python -m tests.fake_bulk_server --port 9201
+    PANGO_ES_URL=http://localhost:9201 python3 -m src.index_es ...
+"""
+
+import argparse
+import fnmatch
+import json
+import threading
+import uuid
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeBulkHandler(BaseHTTPRequestHandler):
+    server: 'FakeBulkServer'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        # Required by the elasticsearch-py product check
+        self.send_header('X-Elastic-Product', 'Elasticsearch')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length).decode('utf-8')
+
+    def send_head(self, status):
+        self.send_response(status)
+        self.send_header('X-Elastic-Product', 'Elasticsearch')
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def send_not_found(self, name):
+        self.send_json(404, {'error': {'type': 'index_not_found_exception', 'reason': f'no such index [{name}]'},
+                             'status': 404})
+
+    def do_HEAD(self):
+        path = self.path.split('?')[0].strip('/')
+        if path.startswith('_alias/'):
+            found = bool(self.server.aliases.get(path[len('_alias/'):]))
+        else:
+            found = not path or bool(self.server.resolve(path))
+        self.send_head(200 if found else 404)
+
+    def do_GET(self):
+        path = self.path.split('?')[0].strip('/')
+        if path.startswith('_alias/'):
+            alias = path[len('_alias/'):]
+            indices = sorted(self.server.aliases.get(alias, ()))
+            if not indices:
+                self.send_json(404, {'error': f'alias [{alias}] missing', 'status': 404})
+                return
+            self.send_json(200, {index_name: {'aliases': {alias: {}}} for index_name in indices})
+            return
+        if path.endswith('_count') or path.endswith('_search'):
+            self.do_read(path)
+            return
+        if path:
+            self.send_json(200, {index_name: {'aliases': {}, 'mappings': {}, 'settings': {}}
+                                 for index_name in self.server.resolve(path)})
+            return
+        self.send_json(200, {
+            'name': 'fake-bulk',
+            'cluster_name': 'fake',
+            'version': {'number': '8.5.0', 'build_flavor': 'default'},
+            'tagline': 'You Know, for Search'
+        })
+
+    def do_read(self, path):
+        target, endpoint = path.rsplit('/', 1)
+        indices = self.server.resolve(target)
+        if not indices:
+            self.send_not_found(target)
+            return
+        count = sum(len(self.server.documents[index_name]) for index_name in indices)
+        if endpoint == '_count':
+            self.send_json(200, {'count': count, '_shards': {'total': 1, 'successful': 1, 'failed': 0}})
+        else:
+            self.send_json(200, {'took': 1, 'timed_out': False, 'hits': {
+                'total': {'value': count, 'relation': 'eq'}, 'max_score': None, 'hits': []
+            }})
+
+    def do_PUT(self):
+        path = self.path.split('?')[0].strip('/')
+        body = self.read_body()
+        if path.endswith('_bulk'):
+            # elasticsearch-py sends index-scoped bulk requests as PUT
+            self.do_bulk(path, body)
+            return
+        index_name = path.split('/')[0]
+        self.server.requests.append(('PUT', path))
+        self.server.documents.setdefault(index_name, {})
+        if path.endswith('_settings'):
+            self.server.settings.setdefault(index_name, []).append(json.loads(body))
+        self.send_json(200, {'acknowledged': True, 'index': index_name})
+
+    def do_DELETE(self):
+        index_name = self.path.strip('/').split('?')[0]
+        self.server.documents.pop(index_name, None)
+        for indices in self.server.aliases.values():
+            indices.discard(index_name)
+        self.send_json(200, {'acknowledged': True})
+
+    def do_POST(self):
+        path = self.path.split('?')[0].strip('/')
+        body = self.read_body()
+        if path.endswith('_bulk'):
+            self.do_bulk(path, body)
+            return
+        if path.endswith('_count') or path.endswith('_search'):
+            self.do_read(path)
+            return
+        self.server.requests.append(('POST', path))
+        if path == '_aliases':
+            self.server.update_aliases(json.loads(body)['actions'])
+        self.send_json(200, {'acknowledged': True, '_shards': {'total': 1, 'successful': 1, 'failed': 0}})
+
+    def do_bulk(self, path, body):
+        default_index = path[:-len('_bulk')].strip('/') or None
+        self.send_json(*self.server.handle_bulk(default_index, body))
+
+
+class FakeBulkServer(ThreadingHTTPServer):
+    """
+    Args:
+        reject_items: Number of bulk items to reject with a 429 item status before accepting any
+        reject_requests: Number of whole bulk requests to reject with a 429 response
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, reject_items=0, reject_requests=0):
+        super().__init__(('127.0.0.1', port), FakeBulkHandler)
+        self.reject_items = reject_items
+        self.reject_requests = reject_requests
+        self.documents = defaultdict(dict)
+        # Index settings bodies in the order they were PUT, and non-bulk PUT/POST requests, e.g. _forcemerge
+        self.settings = {}
+        self.requests = []
+        # Alias name -> set of index names
+        self.aliases = defaultdict(set)
+        self.bulk_requests = 0
+        self.rejected_items = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def url(self):
+        return f'http://{self.server_address[0]}:{self.server_address[1]}'
+
+    def resolve(self, name):
+        """Index names matching an index name, alias or wildcard pattern"""
+        if name in self.aliases and self.aliases[name]:
+            return sorted(self.aliases[name])
+        return sorted(index_name for index_name in self.documents if fnmatch.fnmatchcase(index_name, name))
+
+    def update_aliases(self, actions):
+        with self.lock:
+            for action in actions:
+                op_type, params = next(iter(action.items()))
+                if op_type == 'add':
+                    self.aliases[params['alias']].add(params['index'])
+                elif op_type == 'remove':
+                    self.aliases[params['alias']].discard(params['index'])
+                elif op_type == 'remove_index':
+                    self.documents.pop(params['index'], None)
+
+    def handle_bulk(self, default_index, body):
+        lines = [line for line in body.split('\n') if line.strip()]
+        with self.lock:
+            self.bulk_requests += 1
+            if self.reject_requests > 0:
+                self.reject_requests -= 1
+                return 429, {'error': {'type': 'es_rejected_execution_exception'}, 'status': 429}
+
+            items = []
+            i = 0
+            while i < len(lines):
+                action = json.loads(lines[i])
+                op_type, meta = next(iter(action.items()))
+                index_name = meta.get('_index', default_index)
+                doc_id = meta.get('_id') or uuid.uuid4().hex
+                source = None
+                if op_type != 'delete':
+                    source = json.loads(lines[i + 1])
+                    i += 1
+                i += 1
+
+                if self.reject_items > 0:
+                    self.reject_items -= 1
+                    self.rejected_items += 1
+                    items.append({op_type: {
+                        '_index': index_name, '_id': doc_id, 'status': 429,
+                        'error': {'type': 'es_rejected_execution_exception', 'reason': 'queue full'}
+                    }})
+                    continue
+
+                if op_type == 'delete':
+                    self.documents[index_name].pop(doc_id, None)
+                    status = 200
+                else:
+                    status = 200 if doc_id in self.documents[index_name] else 201
+                    self.documents[index_name][doc_id] = source
+                items.append({op_type: {'_index': index_name, '_id': doc_id, 'status': status, 'result': 'created'}})
+
+        errors = any(item_info['status'] >= 300 for item in items for item_info in item.values())
+        return 200, {'took': 1, 'errors': errors, 'items': items}
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake Elasticsearch bulk endpoint')
+    parser.add_argument('--port', type=int, default=9201)
+    parser.add_argument('--reject-items', dest='reject_items', type=int, default=0)
+    parser.add_argument('--reject-requests', dest='reject_requests', type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeBulkServer(args.port, args.reject_items, args.reject_requests)
+    print(f'Fake bulk endpoint listening on {server.url}')
+    server.serve_forever()
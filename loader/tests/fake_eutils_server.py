@@ -0,0 +1,104 @@
+"""
+Minimal stand-in for the NCBI eUtils esummary endpoint get_articles talks to.
+
+Answers GET and POST esummary requests for pubmed from an in-memory set of articles, records when each
+request arrived, and can answer the first requests with 429 to exercise retries. Usable from tests as a
+context manager, or standalone for local runs:
+
+    python -m tests.fake_eutils_server --port 9202 --articles 5000
+    python3 -m src.get_articles -a ... -o ... --eutils-url http://localhost:9202/
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeEutilsHandler(BaseHTTPRequestHandler):
+    server: 'FakeEutilsServer'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.esummary(url.path, parse_qs(url.query))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.esummary(urlparse(self.path).path, parse_qs(self.rfile.read(length).decode('utf-8')))
+
+    def esummary(self, path, params):
+        if not path.endswith('/esummary.fcgi'):
+            self.send_json(404, {'error': 'not found'})
+            return
+        status, body = self.server.handle_esummary(self.command, params)
+        self.send_json(status, body)
+
+
+class FakeEutilsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, articles=None, reject_requests: int = 0):
+        super().__init__(('127.0.0.1', port), FakeEutilsHandler)
+        # Summaries by numeric PMID, as esummary returns them
+        self.articles = articles or {}
+        self.reject_requests = reject_requests
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/'
+
+    def handle_esummary(self, method, params):
+        pmids = [pmid for pmid in params.get('id', [''])[0].split(',') if pmid]
+        with self.lock:
+            self.requests.append({'method': method, 'time': time.monotonic(), 'pmids': pmids,
+                                  'api_key': params.get('api_key', [None])[0]})
+            if self.reject_requests > 0:
+                self.reject_requests -= 1
+                return 429, {'error': 'API rate limit exceeded', 'count': '4'}
+
+        result = {'uids': [pmid for pmid in pmids if pmid in self.articles]}
+        for pmid in pmids:
+            result[pmid] = self.articles.get(pmid, {'uid': pmid, 'error': 'cannot get document summary'})
+        return 200, {'header': {'type': 'esummary', 'version': '0.3'}, 'result': result}
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        self.server_close()
+
+
+def sample_summary(pmid: str) -> dict:
+    return {'uid': pmid, 'pubdate': '2001 Jan', 'title': f'Article {pmid}',
+            'authors': [{'name': 'Author A', 'authtype': 'Author'}, {'name': 'Author B', 'authtype': 'Author'}]}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake NCBI eUtils esummary endpoint')
+    parser.add_argument('--port', type=int, default=9202)
+    parser.add_argument('--articles', type=int, default=1000, help='Serve PMIDs 1 to ARTICLES')
+    parser.add_argument('--reject-requests', dest='reject_requests', type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeEutilsServer(args.port, {str(pmid): sample_summary(str(pmid)) for pmid in range(1, args.articles + 1)},
+                              args.reject_requests)
+    print(f'Fake eUtils endpoint listening on {server.url}')
+    server.serve_forever()
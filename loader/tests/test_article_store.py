@@ -0,0 +1,136 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.article_store import ArticleStore, compact, read_articles
+from src.clean_annotations import get_articles_map
+
+
+def article(pmid, title=None):
+    return {'pmid': f'PMID:{pmid}', 'title': title or f'Article {pmid}', 'date': '2001 Jan', 'authors': ['Author A']}
+
+
+class TestArticleStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'articles.ndjson')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_rejects_json_path(self):
+        """Test only uncompressed NDJSON paths can hold a store"""
+        with self.assertRaises(ValueError):
+            ArticleStore(os.path.join(self.temp_dir.name, 'articles.json'))
+        with self.assertRaises(ValueError):
+            ArticleStore(self.path + '.gz')
+
+    def test_add_and_reopen(self):
+        """Test added articles persist, and articles already in the store are skipped"""
+        with ArticleStore(self.path) as store:
+            self.assertEqual(store.add([article(1), article(2)]), 2)
+            self.assertEqual(store.add([article(2, 'Changed'), article(3)]), 1)
+
+        with ArticleStore(self.path) as store:
+            self.assertEqual(len(store), 3)
+            self.assertIn('PMID:3', store)
+            self.assertNotIn('PMID:4', store)
+            self.assertEqual(store.get('PMID:2'), article(2))
+            self.assertIsNone(store.get('PMID:4'))
+            self.assertEqual([a['pmid'] for a in store], ['PMID:1', 'PMID:2', 'PMID:3'])
+
+    def test_appends_without_rewriting(self):
+        """Test adding articles leaves the bytes already in the log untouched"""
+        with ArticleStore(self.path) as store:
+            store.add([article(1)])
+        with open(self.path, 'rb') as f:
+            written = f.read()
+
+        with ArticleStore(self.path) as store:
+            store.add([article(2)])
+        with open(self.path, 'rb') as f:
+            self.assertTrue(f.read().startswith(written))
+
+    def test_rebuilds_missing_index(self):
+        """Test a log without an index, e.g. written elsewhere, is indexed on open"""
+        with open(self.path, 'w') as f:
+            for pmid in (1, 2):
+                f.write(json.dumps(article(pmid)) + '\n')
+
+        with ArticleStore(self.path) as store:
+            self.assertEqual(len(store), 2)
+            self.assertEqual(store.get('PMID:2'), article(2))
+        self.assertTrue(os.path.exists(self.path + '.idx'))
+
+    def test_rebuilds_stale_index(self):
+        """Test an index pointing past the end of a replaced log is rebuilt"""
+        with ArticleStore(self.path) as store:
+            store.add([article(1), article(2), article(3)])
+        with open(self.path, 'w') as f:
+            f.write(json.dumps(article(4)) + '\n')
+
+        with ArticleStore(self.path) as store:
+            self.assertEqual(len(store), 1)
+            self.assertEqual(store.get('PMID:4'), article(4))
+
+    def test_truncates_partial_record(self):
+        """Test a record cut short by an interrupted write is dropped, and later appends still parse"""
+        with ArticleStore(self.path) as store:
+            store.add([article(1)])
+        with open(self.path, 'a') as f:
+            f.write('{"pmid": "PMID:2", "tit')
+
+        with ArticleStore(self.path) as store:
+            self.assertEqual(len(store), 1)
+            store.add([article(2)])
+
+        with ArticleStore(self.path) as store:
+            self.assertEqual(store.get('PMID:2'), article(2))
+        with open(self.path) as f:
+            self.assertEqual([json.loads(line)['pmid'] for line in f], ['PMID:1', 'PMID:2'])
+
+    def test_replace_and_compact(self):
+        """Test replaced articles supersede earlier records until compaction drops them"""
+        with ArticleStore(self.path) as store:
+            store.add([article(1), article(2)])
+            store.add([article(1, 'Changed')], replace=True)
+            self.assertEqual(store.get('PMID:1')['title'], 'Changed')
+
+        before, after = compact(self.path)
+
+        self.assertLess(after, before)
+        with ArticleStore(self.path) as store:
+            self.assertEqual(len(store), 2)
+            self.assertEqual([a['title'] for a in store], ['Article 2', 'Changed'])
+            self.assertEqual(store.get('PMID:1')['title'], 'Changed')
+
+    def test_read_articles(self):
+        """Test articles are read from a store and from a JSON array alike"""
+        with ArticleStore(self.path) as store:
+            store.add([article(1), article(2)])
+            store.add([article(1, 'Changed')], replace=True)
+        json_fp = os.path.join(self.temp_dir.name, 'articles.json')
+        with open(json_fp, 'w') as f:
+            json.dump([article(3)], f)
+
+        self.assertEqual([a['title'] for a in read_articles(self.path)], ['Article 2', 'Changed'])
+        self.assertEqual(list(read_articles(json_fp)), [article(3)])
+
+    def test_get_articles_map(self):
+        """Test clean_annotations reads the current record of each PMID from a store"""
+        with ArticleStore(self.path) as store:
+            store.add([article(1), article(2)])
+            store.add([article(1, 'Changed')], replace=True)
+
+        articles_df = get_articles_map(self.path)
+
+        self.assertEqual(sorted(articles_df.index), ['PMID:1', 'PMID:2'])
+        self.assertEqual(articles_df.loc['PMID:1', 'title'], 'Changed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import os
+import sys
+from elasticsearch import Elasticsearch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.bulk import BulkStats, parallel_bulk_load
+from tests.fake_bulk_server import FakeBulkServer
+
+
+class TestParallelBulkLoad(unittest.TestCase):
+
+    def setUp(self):
+        """Set up test documents"""
+        self.docs = [{'gene': f'UniProtKB:P{i:05d}', 'term': 'GO:0006955'} for i in range(500)]
+
+    def load(self, server, **kwargs):
+        client = Elasticsearch(server.url)
+        return parallel_bulk_load(client, iter(self.docs), 'test-annotations', **kwargs)
+
+    def test_parallel_bulk_load(self):
+        """Test all documents are indexed across threads and chunks"""
+        with FakeBulkServer() as server:
+            stats = self.load(server, thread_count=4, chunk_size=50)
+
+            self.assertEqual(stats.success, 500)
+            self.assertEqual(stats.errors, [])
+            self.assertEqual(server.bulk_requests, 10)
+            self.assertEqual(sorted(d['gene'] for d in server.documents['test-annotations'].values()),
+                             [d['gene'] for d in self.docs])
+
+    def test_max_chunk_bytes_splits_requests(self):
+        """Test max_chunk_bytes splits a chunk into smaller bulk requests"""
+        with FakeBulkServer() as server:
+            stats = self.load(server, thread_count=2, chunk_size=100, max_chunk_bytes=2000)
+
+            self.assertEqual(stats.success, 500)
+            self.assertGreater(server.bulk_requests, 5)
+
+    def test_retries_rejected_items(self):
+        """Test documents rejected with 429 are retried with backoff"""
+        with FakeBulkServer(reject_items=30) as server:
+            stats = self.load(server, thread_count=2, chunk_size=100, max_retries=3, initial_backoff=0.01)
+
+            self.assertEqual(stats.success, 500)
+            self.assertEqual(server.rejected_items, 30)
+            self.assertEqual(len(server.documents['test-annotations']), 500)
+
+    def test_retries_rejected_requests(self):
+        """Test whole bulk requests rejected with 429 are retried"""
+        with FakeBulkServer(reject_requests=2) as server:
+            stats = self.load(server, thread_count=1, chunk_size=100, max_retries=3, initial_backoff=0.01)
+
+            self.assertEqual(stats.success, 500)
+            self.assertEqual(server.bulk_requests, 7)
+
+    def test_rejections_reported_without_retries(self):
+        """Test 429 rejections become errors once retries are exhausted"""
+        with FakeBulkServer(reject_items=30) as server:
+            stats = self.load(server, thread_count=2, chunk_size=100, max_retries=0)
+
+            self.assertEqual(stats.success, 470)
+            self.assertEqual(len(stats.errors), 30)
+            self.assertEqual(stats.errors[0]['index']['status'], 429)
+
+    def test_progress_is_contiguous(self):
+        """Test on_progress only counts documents with every earlier chunk acknowledged"""
+        progress = []
+        with FakeBulkServer() as server:
+            stats = self.load(server, thread_count=4, chunk_size=30, on_progress=progress.append)
+
+            self.assertEqual(stats.success, 500)
+            self.assertEqual(progress, sorted(progress))
+            self.assertTrue(all(offset % 30 == 0 for offset in progress[:-1]))
+            self.assertEqual(progress[-1], 500)
+
+    def test_progress_stops_at_failed_chunk(self):
+        """Test on_progress does not move past a chunk with errors, so a resume ships it again"""
+        progress = []
+        with FakeBulkServer(reject_items=5) as server:
+            stats = self.load(server, thread_count=1, chunk_size=50, max_retries=0, on_progress=progress.append)
+
+            self.assertEqual(stats.success, 495)
+            self.assertEqual(len(stats.errors), 5)
+            self.assertEqual(set(progress), {0})
+
+    def test_bulk_stats(self):
+        """Test BulkStats docs/sec reporting"""
+        stats = BulkStats('test-annotations')
+        stats.add(100, [])
+        stats.add(50, [{'index': {'status': 400}}])
+        stats.duration = 2.0
+
+        self.assertEqual(stats.success, 150)
+        self.assertEqual(len(stats.errors), 1)
+        self.assertEqual(stats.docs_per_sec, 75.0)
+        self.assertIn('75 docs/sec', str(stats))
+
+
+if __name__ == '__main__':
+    unittest.main()
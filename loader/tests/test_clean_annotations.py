@@ -10,9 +10,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.clean_annotations import (
     main, parse_arguments, spread_terms, get_aspect, get_evidence, 
     term_type, get_terms_map, get_articles_map, get_taxon_map, 
-    get_genes_map, count_evidence, get_groups, get_annos, unknown_terms
+    get_genes_map, count_evidence, get_groups, get_annos, unknown_terms,
+    lookup_evidence, lookup_terms, get_annos_chunks
 )
-from src.utils import get_pd_row, get_pd_row_key
+from src.utils import get_pd_row, get_pd_row_key, get_pd_row_lookup
 
 
 class TestCleanAnnotations(unittest.TestCase):
@@ -249,6 +250,81 @@ class TestCleanAnnotations(unittest.TestCase):
         result = get_aspect(terms_df, 'GO:9999')
         self.assertEqual(result, 'noGO:9999')
 
+    def test_lookup_evidence_matches_get_evidence(self):
+        """Test lookup_evidence and lookup_terms give the same records as the per-row functions"""
+        terms_df = pd.DataFrame(self.sample_terms_data).rename(
+            columns={'ID': 'id', 'LABEL': 'label', 'hasOBONamespace': 'aspect'}).set_index('id', drop=False)
+        articles_df = pd.DataFrame(self.sample_articles_data).set_index('pmid', drop=False)
+        genes_df = pd.DataFrame(self.sample_genes_data).set_index('gene', drop=False)
+        row = {'evidence': self.sample_annotations_data[0]['evidence'] + [
+            {"with_gene_id": "UniProtKB:Q8TD07", "references": ["PMID:0000000"], "groups": ["MGI"]}
+        ]}
+
+        result = lookup_evidence(get_pd_row_lookup(articles_df), get_pd_row_lookup(genes_df), row['evidence'])
+        self.assertEqual(result, get_evidence(articles_df, genes_df, row))
+        # Unknown reference PMIDs map to None
+        self.assertIsNone(result[1]['references'][0])
+
+        terms = ['GO:0002376', 'GO:0006955']
+        self.assertEqual(lookup_terms(get_pd_row_lookup(terms_df), terms), spread_terms(terms_df, terms))
+
+    def test_get_annos(self):
+        """Test get_annos enriches terms, genes and references"""
+        temp_files = {}
+        for name, data in [('terms', self.sample_terms_data), ('articles', self.sample_articles_data),
+                           ('taxon', self.sample_taxon_data), ('genes', self.sample_genes_data),
+                           ('annos', self.sample_annotations_data)]:
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+                json.dump(data, f)
+                temp_files[name] = f.name
+
+        try:
+            terms_df = get_terms_map(temp_files['terms'])
+            articles_df = get_articles_map(temp_files['articles'])
+            genes_df = get_genes_map(temp_files['genes'], get_taxon_map(temp_files['taxon']))
+            genes_df = genes_df.assign(coordinates_chr_num=None, coordinates_start=None, coordinates_end=None)
+            result_df = get_annos(temp_files['annos'], terms_df, genes_df, articles_df)
+            record = json.loads(result_df.to_json(orient="records"))[0]
+
+            self.assertEqual(record['term']['label'], 'immune response')
+            self.assertEqual(record['aspect'], 'biological process')
+            self.assertEqual(record['term_type'], 'known')
+            self.assertEqual([t['id'] for t in record['slim_terms']], ['GO:0002376'])
+            self.assertEqual(record['evidence'][0]['with_gene_id']['taxon_label'], 'Homo sapiens')
+            self.assertEqual(record['evidence'][0]['references'][0]['title'], 'Two human ULBP/RAET1 molecules')
+            self.assertEqual(record['groups'], ['UniProt'])
+            self.assertEqual(record['evidence_count'], 1)
+            self.assertEqual(record['taxon_abbr'], 'Hsa')
+
+        finally:
+            for temp_file in temp_files.values():
+                os.unlink(temp_file)
+
+    def test_get_annos_chunks_matches_get_annos(self):
+        """Test chunked NDJSON enrichment gives the same records as get_annos"""
+        test_files = [os.path.join(self.input_dir, name) for name in
+                      ['full_go_annotated.json', 'taxon_lkp.json', 'human_iba_gene_info.json',
+                       'human_iba_annotations.json']] + [os.path.join(self.test_data_dir, 'clean-articles.json')]
+        for file_path in test_files:
+            if not os.path.exists(file_path):
+                self.skipTest(f"Required test file not found: {file_path}")
+        terms_file, taxon_file, genes_file, annos_file, articles_file = test_files
+
+        terms_df = get_terms_map(terms_file)
+        articles_df = get_articles_map(articles_file)
+        genes_df = get_genes_map(genes_file, get_taxon_map(taxon_file))
+
+        def records(df):
+            result = json.loads(df.to_json(orient="records"))
+            for record in result:
+                record['groups'] = sorted(record['groups'])
+            return result
+
+        expected = records(get_annos(annos_file, terms_df, genes_df, articles_df))
+        chunks = list(get_annos_chunks(annos_file, terms_df, genes_df, articles_df, 3))
+        self.assertEqual(len(chunks), (len(expected) + 2) // 3)
+        self.assertEqual([r for chunk in chunks for r in records(chunk)], expected)
+
     def test_integration_with_real_test_data(self):
         """Test with real test data files"""
         if not os.path.exists(self.input_dir):
@@ -8,7 +8,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.clean_articles import (
-    main, parse_arguments, parse_article, parse_articles, write_to_json
+    main, parse_arguments, parse_article, parse_articles
 )
 
 
@@ -105,30 +105,6 @@ class TestCleanArticles(unittest.TestCase):
         self.assertIn('authors', result)  # Empty list is still included
         self.assertEqual(result['authors'], [])
 
-    def test_write_to_json(self):
-        """Test write_to_json function"""
-        test_data = [
-            {"pmid": "PMID:123", "title": "Test article 1"},
-            {"pmid": "PMID:456", "title": "Test article 2"}
-        ]
-        
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-            temp_file = f.name
-        
-        try:
-            write_to_json(test_data, temp_file)
-            
-            # Verify file was written correctly
-            self.assertTrue(os.path.exists(temp_file))
-            
-            with open(temp_file, 'r', encoding='utf-8') as f:
-                loaded_data = json.load(f)
-            
-            self.assertEqual(loaded_data, test_data)
-            
-        finally:
-            os.unlink(temp_file)
-
     def test_parse_articles(self):
         """Test parse_articles function"""
         # Create a temporary directory with test JSON files
@@ -228,6 +204,28 @@ class TestCleanArticles(unittest.TestCase):
             finally:
                 os.unlink(output_file)
 
+    def test_parse_articles_ndjson_duplicates(self):
+        """Test parse_articles writes NDJSON from worker processes, each PMID once"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            in_dir = os.path.join(temp_dir, 'articles')
+            os.makedirs(in_dir)
+            duplicate = json.loads(json.dumps(self.sample_article_data))
+            duplicate['result']['8138176']['title'] = 'Later record'
+            duplicate['result']['uids'].append('12345')
+            duplicate['result']['12345'] = self.sample_article_no_authors['result']['12345']
+            for i, data in enumerate([self.sample_article_data, duplicate]):
+                with open(os.path.join(in_dir, f'articles-{i}.json'), 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+            output_file = os.path.join(temp_dir, 'clean-articles.ndjson')
+
+            parse_articles(in_dir, output_file, workers=2)
+
+            with open(output_file, 'r', encoding='utf-8') as f:
+                result = [json.loads(line) for line in f]
+            self.assertEqual([article['pmid'] for article in result], ['PMID:8138176', 'PMID:11884604', 'PMID:12345'])
+            # The first file in path order wins
+            self.assertEqual(result[0]['title'], self.sample_article_data['result']['8138176']['title'])
+
     def test_integration_with_real_test_data(self):
         """Test with real test data structure"""
         downloads_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'downloads', 'articles')
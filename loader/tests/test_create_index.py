@@ -0,0 +1,133 @@
+import unittest
+import os
+import sys
+from elasticsearch import Elasticsearch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('PANGO_ES_URL', 'http://localhost:9200')
+
+from src.config.base import TableAggType
+from src.create_index import (LOAD_SETTINGS, apply_load_settings, create_index, get_alias_indices,
+                              get_physical_indices, restore_serving_settings, rollback_aliases, serving_settings,
+                              swap_aliases, warm_index)
+from tests.fake_bulk_server import FakeBulkServer
+
+
+class TestLoadSettings(unittest.TestCase):
+
+    def setUp(self):
+        """Run from the loader directory so data/es_settings resolves"""
+        self.cwd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def test_serving_settings(self):
+        """Test serving settings come from settings.json with Elasticsearch defaults"""
+        settings = serving_settings()
+        self.assertEqual(settings['number_of_replicas'], 0)
+        self.assertEqual(settings['refresh_interval'], '1s')
+        self.assertEqual(settings['translog'], {'durability': 'request'})
+        self.assertEqual(set(settings), set(LOAD_SETTINGS))
+
+    def test_load_settings_applied_and_restored(self):
+        """Test the load profile is applied, then serving settings restored, force-merged and refreshed"""
+        with FakeBulkServer() as server:
+            client = Elasticsearch(server.url)
+            apply_load_settings('test-annotations', client=client)
+            restore_serving_settings('test-annotations', max_num_segments=2, client=client)
+
+            self.assertEqual(server.settings['test-annotations'], [LOAD_SETTINGS, serving_settings()])
+            self.assertEqual(server.requests, [
+                ('PUT', 'test-annotations/_settings'),
+                ('PUT', 'test-annotations/_settings'),
+                ('POST', 'test-annotations/_forcemerge'),
+                ('POST', 'test-annotations/_refresh'),
+            ])
+
+    def test_load_settings_logged_with_timings(self):
+        """Test each step is logged with its duration"""
+        with FakeBulkServer() as server:
+            client = Elasticsearch(server.url)
+            with self.assertLogs('src.create_index', level='INFO') as logs:
+                apply_load_settings('test-genes', client=client)
+                restore_serving_settings('test-genes', client=client)
+
+            self.assertEqual(len(logs.output), 4)
+            self.assertIn('test-genes: applying load settings took', logs.output[0])
+            self.assertIn('force-merging to 1 segments took', logs.output[2])
+
+
+class TestAliasSwap(unittest.TestCase):
+
+    def setUp(self):
+        """Run from the loader directory so data/es_settings resolves"""
+        self.cwd = os.getcwd()
+        os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.server = FakeBulkServer().__enter__()
+        self.client = Elasticsearch(self.server.url)
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        os.chdir(self.cwd)
+
+    def build(self, es_index, docs=1):
+        self.client.indices.create(index=es_index)
+        self.server.documents[es_index] = {str(i): {'gene': f'UniProtKB:P{i:05d}'} for i in range(docs)}
+        return es_index
+
+    def test_create_index_is_timestamped(self):
+        """Test create_index builds a new physical index named after the alias"""
+        es_index = create_index(TableAggType.ANNOTATIONS.value, 'pango-2', client=self.client)
+
+        self.assertRegex(es_index, r'^pango-2-.+-\d{14}$')
+        self.assertEqual(get_physical_indices(es_index.rsplit('-', 1)[0], client=self.client), [es_index])
+        self.assertIn(('PUT', f'{es_index}/_mapping'), self.server.requests)
+
+    def test_swap_is_atomic_and_keeps_previous(self):
+        """Test both aliases move in one _aliases request and older indices are pruned beyond keep"""
+        for stamp in ['20240101000000', '20240201000000', '20240301000000']:
+            self.build(f'pango-2-annotations-{stamp}')
+            self.build(f'pango-2-genes-{stamp}')
+        swap_aliases({'pango-2-annotations': 'pango-2-annotations-20240201000000',
+                      'pango-2-genes': 'pango-2-genes-20240201000000'}, keep=None, client=self.client)
+
+        swap_aliases({'pango-2-annotations': 'pango-2-annotations-20240301000000',
+                      'pango-2-genes': 'pango-2-genes-20240301000000'}, keep=1, client=self.client)
+
+        self.assertEqual([r for r in self.server.requests if r[1] == '_aliases'], [('POST', '_aliases')] * 2)
+        self.assertEqual(get_alias_indices('pango-2-annotations', client=self.client),
+                         ['pango-2-annotations-20240301000000'])
+        self.assertEqual(get_physical_indices('pango-2-genes', client=self.client),
+                         ['pango-2-genes-20240201000000', 'pango-2-genes-20240301000000'])
+
+    def test_swap_replaces_concrete_index(self):
+        """Test an unaliased index with the alias name is removed in the same request"""
+        self.build('pango-2-annotations')
+        new_index = self.build('pango-2-annotations-20240101000000')
+
+        swap_aliases({'pango-2-annotations': new_index}, client=self.client)
+
+        self.assertNotIn('pango-2-annotations', self.server.documents)
+        self.assertEqual(self.client.count(index='pango-2-annotations')['count'], 1)
+
+    def test_rollback(self):
+        """Test rollback points the alias at the index before the one served"""
+        self.build('pango-2-genes-20240101000000')
+        self.build('pango-2-genes-20240201000000')
+        swap_aliases({'pango-2-genes': 'pango-2-genes-20240201000000'}, client=self.client)
+
+        self.assertEqual(rollback_aliases(['pango-2-genes'], client=self.client),
+                         {'pango-2-genes': 'pango-2-genes-20240101000000'})
+        self.assertEqual(get_alias_indices('pango-2-genes', client=self.client), ['pango-2-genes-20240101000000'])
+        self.assertEqual(len(get_physical_indices('pango-2-genes', client=self.client)), 2)
+        with self.assertRaises(ValueError):
+            rollback_aliases(['pango-2-genes'], client=self.client)
+
+    def test_warm_index(self):
+        """Test warming returns the document count"""
+        self.assertEqual(warm_index(self.build('pango-2-genes-20240101000000', docs=3), client=self.client), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
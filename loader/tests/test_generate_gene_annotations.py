@@ -9,7 +9,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.generate_gene_annotations import (
     main, parse_arguments, uniquify_term, uniquify_slim_terms, 
-    group_terms, get_annos, COLUMNS_TO_EXTRACT
+    group_terms, get_annos, get_genes_df, COLUMNS_TO_EXTRACT
 )
 
 
@@ -285,6 +285,33 @@ class TestGenerateGeneAnnotations(unittest.TestCase):
         finally:
             os.unlink(temp_file)
 
+    def test_get_genes_df_matches_group_terms(self):
+        """Test get_genes_df builds the same genes as groupby('gene').apply(group_terms)"""
+        later = dict(self.sample_clean_annos[0], gene='UniProtKB:A0A000', evidence_type='homology',
+                     term=dict(self.sample_clean_annos[0]['term'], id='GO:0000001'))
+        annos_df = pd.DataFrame(self.sample_clean_annos + [
+            later, dict(later, term=None, evidence_type='direct'), dict(later, term=None, slim_terms=None),
+            dict(later, gene=None)]).drop(['evidence'], axis=1)
+
+        result_df = get_genes_df(annos_df)
+        expected_df = annos_df.groupby('gene').apply(group_terms).reset_index()
+        expected_df = expected_df.sort_values(by='term_count', ascending=False).reset_index(drop=True)
+
+        self.assertEqual(result_df.to_json(orient='records'), expected_df.to_json(orient='records'))
+        self.assertEqual(list(result_df['gene']), ['UniProtKB:Q8TD07', 'UniProtKB:A0A000'])
+        # A slim term shared by annotations keeps the last annotation's evidence type
+        self.assertEqual([(t['id'], t['evidence_type']) for t in result_df.iloc[1]['slim_terms']],
+                         [('GO:0002376', 'direct')])
+
+    def test_get_genes_df_duplicate_terms(self):
+        """Test get_genes_df rejects a gene annotated twice with one term"""
+        annos_df = pd.DataFrame([self.sample_clean_annos[0], self.sample_clean_annos[0]]).drop(['evidence'], axis=1)
+
+        with self.assertRaises(ValueError) as context:
+            get_genes_df(annos_df)
+
+        self.assertIn("Duplicate term found", str(context.exception))
+
     def test_integration_with_real_test_data(self):
         """Test with real test data files"""
         clean_annos_file = os.path.join(self.output_dir, 'human_iba_annotations_clean.json')
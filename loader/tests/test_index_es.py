@@ -0,0 +1,128 @@
+import unittest
+import argparse
+import json
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+from elasticsearch import Elasticsearch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('PANGO_ES_URL', 'http://localhost:9200')
+
+from src.checkpoint import LoadCheckpoint
+from src.config.base import TableAggType
+from src.index_es import bulk_load, get_doc_id, load_index
+from tests.fake_bulk_server import FakeBulkServer
+
+ANNOTATIONS = TableAggType.ANNOTATIONS.value
+
+
+class TestDocIds(unittest.TestCase):
+
+    def test_annotation_ids(self):
+        """Test annotation IDs depend only on gene, term and qualifier"""
+        anno = {'gene': 'UniProtKB:P12345', 'term': {'id': 'GO:0006955', 'label': 'immune response'}}
+
+        self.assertEqual(get_doc_id(ANNOTATIONS, anno), get_doc_id(ANNOTATIONS, dict(anno, evidence_count=2)))
+        self.assertNotEqual(get_doc_id(ANNOTATIONS, anno), get_doc_id(ANNOTATIONS, dict(anno, qualifier='NOT')))
+        self.assertNotEqual(get_doc_id(ANNOTATIONS, anno),
+                            get_doc_id(ANNOTATIONS, dict(anno, term={'id': 'GO:0002376'})))
+
+    def test_gene_ids(self):
+        """Test genes are keyed by gene ID"""
+        self.assertEqual(get_doc_id(TableAggType.GENES.value, {'gene': 'UniProtKB:P12345'}), 'UniProtKB:P12345')
+
+
+class TestResumableLoad(unittest.TestCase):
+
+    def setUp(self):
+        """Write 100 annotations as NDJSON and point index_es at a fake bulk endpoint"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.annotations_file = os.path.join(self.temp_dir.name, 'annotations.ndjson')
+        with open(self.annotations_file, 'w') as f:
+            for i in range(100):
+                f.write(json.dumps({'gene': f'UniProtKB:P{i:05d}', 'term': {'id': 'GO:0006955'}}) + '\n')
+        self.checkpoint = LoadCheckpoint(os.path.join(self.temp_dir.name, 'checkpoint.json'))
+        self.args = argparse.Namespace(load_settings=False, index_prefix='', max_num_segments=1)
+        self.bulk_options = {'thread_count': 2, 'chunk_size': 10}
+
+        self.server = FakeBulkServer().__enter__()
+        self.es_patch = patch('src.index_es.es', Elasticsearch(self.server.url))
+        self.es_patch.start()
+
+    def tearDown(self):
+        self.es_patch.stop()
+        self.server.__exit__(None, None, None)
+        self.temp_dir.cleanup()
+
+    def test_checkpoint_records_acknowledged_offset(self):
+        """Test the checkpoint file holds the offset of the acknowledged records"""
+        self.checkpoint.start(self.annotations_file, 'test-annotations')
+        success, errors = bulk_load(self.annotations_file, 'test-annotations', ANNOTATIONS, self.checkpoint,
+                                    **self.bulk_options)
+
+        self.assertEqual(success, 100)
+        saved = LoadCheckpoint.load(self.checkpoint.path)
+        self.assertEqual(saved.entry(self.annotations_file)['offset'], 100)
+        self.assertEqual(saved.entry(self.annotations_file)['index'], 'test-annotations')
+
+    def test_reload_does_not_duplicate(self):
+        """Test shipping the same records twice overwrites them"""
+        for _ in range(2):
+            bulk_load(self.annotations_file, 'test-annotations', ANNOTATIONS, **self.bulk_options)
+
+        self.assertEqual(len(self.server.documents['test-annotations']), 100)
+        # The ID is stored in the source too, for the API to sort on
+        self.assertTrue(all(doc['doc_id'] == doc_id for doc_id, doc in self.server.documents['test-annotations'].items()))
+
+    def test_resume_ships_remainder(self):
+        """Test a resumed load continues the checkpointed index after the acknowledged records"""
+        self.checkpoint.start(self.annotations_file, 'test-annotations')
+        bulk_load(self.annotations_file, 'test-annotations', ANNOTATIONS, **self.bulk_options)
+        self.checkpoint.update(self.annotations_file, 60)
+
+        index_name, success, errors = load_index(self.annotations_file, ANNOTATIONS, self.args, self.bulk_options,
+                                                 LoadCheckpoint.load(self.checkpoint.path))
+
+        self.assertEqual(index_name, 'test-annotations')
+        self.assertEqual(success, 40)
+        self.assertEqual(len(self.server.documents['test-annotations']), 100)
+        self.assertTrue(LoadCheckpoint.load(self.checkpoint.path).entry(self.annotations_file)['done'])
+
+    def test_errors_leave_load_resumable(self):
+        """Test a load with errors is not marked done, and resuming ships the records from the failed chunk"""
+        self.checkpoint.start(self.annotations_file, 'test-annotations')
+        self.server.documents['test-annotations'] = {}
+        self.server.reject_items = 5
+        self.bulk_options.update(thread_count=1, max_retries=0)
+        index_name, success, errors = load_index(self.annotations_file, ANNOTATIONS, self.args, self.bulk_options,
+                                                 self.checkpoint)
+
+        self.assertEqual(len(errors), 5)
+        entry = LoadCheckpoint.load(self.checkpoint.path).entry(self.annotations_file)
+        self.assertEqual((entry['offset'], entry['done']), (0, False))
+
+        index_name, success, errors = load_index(self.annotations_file, ANNOTATIONS, self.args, self.bulk_options,
+                                                 LoadCheckpoint.load(self.checkpoint.path))
+
+        self.assertEqual((success, errors), (100, []))
+        self.assertEqual(len(self.server.documents[index_name]), 100)
+        self.assertTrue(LoadCheckpoint.load(self.checkpoint.path).entry(self.annotations_file)['done'])
+
+    def test_resume_rejects_changed_input(self):
+        """Test resuming fails if the input file changed since it was checkpointed"""
+        self.checkpoint.start(self.annotations_file, 'test-annotations')
+        with open(self.annotations_file, 'a') as f:
+            f.write(json.dumps({'gene': 'UniProtKB:P99999', 'term': {'id': 'GO:0006955'}}) + '\n')
+
+        with self.assertRaises(ValueError):
+            LoadCheckpoint.load(self.checkpoint.path).entry(self.annotations_file)
+
+    def test_resume_without_checkpoint(self):
+        """Test resuming without a checkpoint file fails"""
+        with self.assertRaises(ValueError):
+            LoadCheckpoint.load(os.path.join(self.temp_dir.name, 'missing.json'))
+
+
+if __name__ == '__main__':
+    unittest.main()
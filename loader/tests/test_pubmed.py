@@ -0,0 +1,188 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.article_store import ArticleStore
+from src.get_articles import get_pubmed_metadata, get_store_paths
+from src.pubmed import TokenBucket, fetch_articles
+from tests.fake_eutils_server import FakeEutilsServer, sample_summary
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_acquire_waits_for_tokens(self):
+        """Test acquire spaces calls 1/rate apart once the initial capacity is spent"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=4, capacity=2, clock=clock, sleep=clock.sleep)
+
+        times = []
+        for _ in range(5):
+            bucket.acquire()
+            times.append(clock.now)
+
+        self.assertEqual(times[:2], [0.0, 0.0])
+        for earlier, later in zip(times[1:], times[2:]):
+            self.assertAlmostEqual(later - earlier, 0.25)
+
+
+class TestFetchArticles(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a fake eUtils with PMIDs 1 to 50"""
+        self.articles = {str(pmid): sample_summary(str(pmid)) for pmid in range(1, 51)}
+
+    def fetch(self, server, pmids, **kwargs):
+        articles = []
+        options = dict(eutils_url=server.url, rate=50, batch_size=10, thread_count=3, initial_backoff=0.01)
+        options.update(kwargs)
+        stats = fetch_articles(pmids, articles.extend, **options)
+        return stats, articles
+
+    def test_fetch_articles(self):
+        """Test every PMID is fetched with POST, a batch per request"""
+        with FakeEutilsServer(articles=self.articles) as server:
+            stats, articles = self.fetch(server, [str(pmid) for pmid in range(1, 51)])
+
+            self.assertEqual(sorted(a['pmid'] for a in articles), sorted(f'PMID:{pmid}' for pmid in range(1, 51)))
+            self.assertEqual(articles[0]['authors'], ['Author A', 'Author B'])
+            self.assertEqual(stats.fetched, 50)
+            self.assertEqual(stats.failed, {})
+            self.assertEqual(len(server.requests), 5)
+            self.assertTrue(all(request['method'] == 'POST' for request in server.requests))
+
+    def test_rate_limit(self):
+        """Test requests from every thread together start no faster than the rate"""
+        with FakeEutilsServer(articles=self.articles) as server:
+            self.fetch(server, [str(pmid) for pmid in range(1, 51)], rate=20, batch_size=5, thread_count=4)
+
+            times = sorted(request['time'] for request in server.requests)
+            # 10 requests at 20/sec take at least 9 intervals of 0.05s
+            self.assertGreaterEqual(times[-1] - times[0], 0.4)
+
+    def test_api_key(self):
+        """Test the API key is sent with every request"""
+        with FakeEutilsServer(articles=self.articles) as server:
+            self.fetch(server, ['1', '2'], api_key='secret')
+
+            self.assertEqual([request['api_key'] for request in server.requests], ['secret'])
+
+    def test_retries_rejected_requests(self):
+        """Test batches answered with 429 are retried"""
+        with FakeEutilsServer(articles=self.articles, reject_requests=3) as server:
+            stats, articles = self.fetch(server, [str(pmid) for pmid in range(1, 21)])
+
+            self.assertEqual(len(articles), 20)
+            self.assertEqual(stats.failed, {})
+            self.assertEqual(stats.requests, 5)
+
+    def test_failed_pmids(self):
+        """Test unknown PMIDs and batches out of retries are reported as failed"""
+        with FakeEutilsServer(articles=self.articles, reject_requests=2) as server:
+            stats, articles = self.fetch(server, ['1', '999'], max_retries=1)
+
+            self.assertEqual(articles, [])
+            self.assertEqual(sorted(stats.failed), ['PMID:1', 'PMID:999'])
+
+        with FakeEutilsServer(articles=self.articles) as server:
+            stats, articles = self.fetch(server, ['1', '999'])
+
+            self.assertEqual([a['pmid'] for a in articles], ['PMID:1'])
+            self.assertEqual(stats.failed, {'PMID:999': 'cannot get document summary'})
+
+
+class TestGetPubmedMetadata(unittest.TestCase):
+
+    def test_fetches_new_pmids_and_writes_manifest(self):
+        """Test only PMIDs missing from the store are fetched and appended, and failures are listed"""
+        annotations = [{'gene': 'UniProtKB:P38398', 'evidence': [
+            {'references': ['PMID:1', 'PMID:2']}, {'references': ['PMID:3', 'PMID:999']}]}]
+        articles = {str(pmid): sample_summary(str(pmid)) for pmid in range(1, 4)}
+
+        with tempfile.TemporaryDirectory() as temp_dir, FakeEutilsServer(articles=articles) as server:
+            annotations_fp = os.path.join(temp_dir, 'annotations.json')
+            out_fp = os.path.join(temp_dir, 'articles.ndjson')
+            failed_fp = os.path.join(temp_dir, 'failed.json')
+            with open(annotations_fp, 'w') as f:
+                json.dump(annotations, f)
+            existing = {'pmid': 'PMID:1', 'title': 'Existing', 'date': None}
+            with open(out_fp, 'w') as f:
+                f.write(json.dumps(existing) + '\n')
+
+            get_pubmed_metadata(annotations_fp, out_fp, None, failed_fp, eutils_url=server.url, rate=50)
+
+            with open(out_fp) as f:
+                result = [json.loads(line) for line in f]
+            with open(failed_fp) as f:
+                failed = json.load(f)
+
+            self.assertEqual(result[0], existing)
+            self.assertEqual(sorted(a['pmid'] for a in result), ['PMID:1', 'PMID:2', 'PMID:3'])
+            self.assertEqual(sorted(server.requests[0]['pmids']), ['2', '3', '999'])
+            self.assertEqual(failed, [{'pmid': 'PMID:999', 'error': 'cannot get document summary'}])
+
+            # A second run only asks for the PMID that failed
+            get_pubmed_metadata(annotations_fp, out_fp, None, failed_fp, eutils_url=server.url, rate=50)
+
+            self.assertEqual(server.requests[-1]['pmids'], ['999'])
+
+    def test_imports_existing_json(self):
+        """Test articles from a JSON array given with -e are imported into the store and not fetched"""
+        annotations = [{'gene': 'UniProtKB:P38398', 'evidence': [{'references': ['PMID:1', 'PMID:2']}]}]
+        articles = {str(pmid): sample_summary(str(pmid)) for pmid in range(1, 3)}
+
+        with tempfile.TemporaryDirectory() as temp_dir, FakeEutilsServer(articles=articles) as server:
+            annotations_fp = os.path.join(temp_dir, 'annotations.json')
+            existing_fp = os.path.join(temp_dir, 'articles.json')
+            out_fp = os.path.join(temp_dir, 'articles.ndjson')
+            with open(annotations_fp, 'w') as f:
+                json.dump(annotations, f)
+            with open(existing_fp, 'w') as f:
+                json.dump([{'pmid': 'PMID:1', 'title': 'Existing', 'date': None}], f)
+
+            get_pubmed_metadata(annotations_fp, out_fp, existing_fp, eutils_url=server.url, rate=50)
+
+            with ArticleStore(out_fp) as store:
+                self.assertEqual(store.get('PMID:1')['title'], 'Existing')
+                self.assertEqual(store.get('PMID:2')['title'], 'Article 2')
+            self.assertEqual(server.requests[0]['pmids'], ['2'])
+
+    def test_deprecated_json_output(self):
+        """Test a .json -o path keeps the store next to it, importing and rewriting the JSON array"""
+        annotations = [{'gene': 'UniProtKB:P38398', 'evidence': [{'references': ['PMID:1', 'PMID:2']}]}]
+        articles = {str(pmid): sample_summary(str(pmid)) for pmid in range(1, 3)}
+
+        with tempfile.TemporaryDirectory() as temp_dir, FakeEutilsServer(articles=articles) as server:
+            annotations_fp = os.path.join(temp_dir, 'annotations.json')
+            json_fp = os.path.join(temp_dir, 'articles.json')
+            with open(annotations_fp, 'w') as f:
+                json.dump(annotations, f)
+            with open(json_fp, 'w') as f:
+                json.dump([{'pmid': 'PMID:1', 'title': 'Existing', 'date': None}], f)
+
+            with self.assertLogs('src.get_articles', 'WARNING'):
+                out_fp, legacy_fp = get_store_paths(json_fp)
+            get_pubmed_metadata(annotations_fp, out_fp, legacy_fp, None, legacy_fp, eutils_url=server.url, rate=50)
+
+            self.assertEqual(out_fp, os.path.join(temp_dir, 'articles.ndjson'))
+            with open(json_fp) as f:
+                self.assertEqual([a['title'] for a in json.load(f)], ['Existing', 'Article 2'])
+            self.assertEqual(server.requests[0]['pmids'], ['2'])
+            self.assertEqual(get_store_paths(out_fp), (out_fp, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,7 +7,8 @@ import pandas as pd
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils import write_to_json, load_json, get_pd_row, get_pd_row_key
+from src.utils import (write_to_json, load_json, get_pd_row, get_pd_row_key, get_pd_row_lookup, is_ndjson,
+                       iter_json_records, iter_evidence_refs, iter_unique_refs, write_df_chunks_to_ndjson)
 
 
 class TestUtils(unittest.TestCase):
@@ -150,6 +151,54 @@ class TestUtils(unittest.TestCase):
         finally:
             os.unlink(temp_file)
 
+    def test_is_ndjson(self):
+        """Test is_ndjson detection by file extension"""
+        self.assertTrue(is_ndjson('annotations.ndjson'))
+        self.assertTrue(is_ndjson('annotations.jsonl.gz'))
+        self.assertFalse(is_ndjson('annotations.json'))
+        self.assertFalse(is_ndjson('annotations.json.gz'))
+
+    def test_iter_json_records(self):
+        """Test iter_json_records reads JSON arrays and NDJSON, gzipped or not"""
+        records = [{"id": 1, "name": "Café", "score": 1.5}, {"id": 2, "name": None, "tags": ["a"]}]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            array_file = os.path.join(temp_dir, 'records.json')
+            write_to_json(records, array_file)
+            self.assertEqual(list(iter_json_records(array_file)), records)
+            self.assertEqual(list(iter_json_records(array_file, skip=1)), records[1:])
+
+            for filename in ['records.ndjson', 'records.ndjson.gz']:
+                ndjson_file = os.path.join(temp_dir, filename)
+                record_count = write_df_chunks_to_ndjson(
+                    [pd.DataFrame(records[:1]), pd.DataFrame(records[1:])], ndjson_file)
+                self.assertEqual(record_count, 2)
+                loaded = list(iter_json_records(ndjson_file))
+                # DataFrame rows gain the columns of the other records as null
+                self.assertEqual(loaded[0], {"id": 1, "name": "Café", "score": 1.5})
+                self.assertEqual(loaded[1], {"id": 2, "name": None, "tags": ["a"]})
+                self.assertEqual([r['id'] for r in iter_json_records(ndjson_file, skip=1)], [2])
+
+            with gzip.open(os.path.join(temp_dir, 'records.ndjson.gz'), 'rt') as f:
+                self.assertEqual(len(f.read().splitlines()), 2)
+
+    def test_iter_unique_refs(self):
+        """Test iter_unique_refs streams unique evidence references from JSON arrays and NDJSON"""
+        annotations = [
+            {"gene": "UniProtKB:P1", "evidence": [{"references": ["PMID:2", "PMID:1"]}, {"references": ["PMID:2"]}]},
+            {"gene": "UniProtKB:P2", "evidence": []},
+            {"gene": "UniProtKB:P3", "evidence": [{"with_gene_id": "MGI:1", "references": ["PMID:3", "PMID:1"]}]}
+        ]
+        self.assertEqual(list(iter_evidence_refs(annotations)), ["PMID:2", "PMID:1", "PMID:2", "PMID:3", "PMID:1"])
+        with tempfile.TemporaryDirectory() as temp_dir:
+            array_file = os.path.join(temp_dir, 'annotations.json')
+            write_to_json(annotations, array_file)
+            self.assertEqual(list(iter_unique_refs(array_file)), ["PMID:2", "PMID:1", "PMID:3"])
+
+            for filename in ['annotations.ndjson', 'annotations.ndjson.gz']:
+                ndjson_file = os.path.join(temp_dir, filename)
+                write_df_chunks_to_ndjson([pd.DataFrame(annotations)], ndjson_file)
+                self.assertEqual(list(iter_unique_refs(ndjson_file)), ["PMID:2", "PMID:1", "PMID:3"])
+
     def test_get_pd_row(self):
         """Test get_pd_row function"""
         result = get_pd_row(self.sample_df, 'A')
@@ -257,6 +306,22 @@ class TestUtils(unittest.TestCase):
         # data should be excluded (None)
         self.assertNotIn('data', result)
 
+    def test_get_pd_row_lookup(self):
+        """Test get_pd_row_lookup matches get_pd_row for every key"""
+        complex_df = pd.DataFrame({
+            'id': ['X1', 'X2', 'X3'],
+            'data': [{'nested': 'value1'}, {'nested': 'value2'}, None],
+            'numbers': [1.5, None, 3.7],
+            'lists': [[1, 2, 3], [], [4, 5]]
+        }).set_index('id')
+
+        for df in [self.sample_df, complex_df]:
+            lookup = get_pd_row_lookup(df)
+            self.assertEqual(list(lookup.keys()), list(df.index))
+            for key in df.index:
+                self.assertEqual(lookup[key], get_pd_row(df, key))
+        self.assertNotIn('age', get_pd_row_lookup(self.sample_df)['C'])
+
     def test_integration_with_test_data(self):
         """Test utils functions with actual test data"""
         test_data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'test_data')